@@ -0,0 +1,62 @@
+"""
+Benchmark del análisis del registro de eventos: genera un registro sintético con EventLog
+(coches alternando direcciones en lotes) y mide la carga y el análisis de server/analytics.py.
+
+    python benchmarks/bench_analytics.py [--crossings 500000] [--cars 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from model.Direccion import Direccion
+from server.event_log import EventLog
+from server import analytics
+
+
+def synthetic_log(path, crossings, cars, seed = 0):
+    """Escribe crossings cruces (ENQUEUE, GRANT, ENTER, EXIT y los SWITCH) con tiempos simulados."""
+    rng = random.Random(seed)
+    log = EventLog(path, flush_interval=float("inf"))
+    now = 0.0
+    direction = Direccion.LEFT
+    for i in range(crossings):
+        if i % rng.randint(1, 6) == 0:
+            direction = Direccion.RIGHT if direction == Direccion.LEFT else Direccion.LEFT
+            now += rng.uniform(0.3, 0.8)
+            log.append(EventLog.SWITCH, direction=direction, at=now)
+        car_id = f"car-{rng.randrange(cars)}"
+        log.append(EventLog.ENQUEUE, car_id, direction, at=now - rng.uniform(0.0, 20.0))
+        log.append(EventLog.GRANT, car_id, direction, at=now)
+        now += rng.uniform(0.05, 0.2)
+        log.append(EventLog.ENTER, car_id, direction, at=now)
+        now += rng.uniform(1.0, 3.0)
+        log.append(EventLog.EXIT, car_id, direction, at=now)
+        now += rng.uniform(0.05, 0.2)
+    log.close()
+    return log.events
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--crossings", type=int, default=500000)
+    parser.add_argument("--cars", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "eventos.bin")
+        start = time.perf_counter()
+        events = synthetic_log(path, args.crossings, args.cars)
+        generated = time.perf_counter()
+        log = analytics.load(path)
+        loaded = time.perf_counter()
+        report = analytics.analyze(log)
+        done = time.perf_counter()
+        print(f"Registro sintético: {events} eventos, {os.path.getsize(path) / 1e6:.1f} MB ({generated - start:.1f}s para generarlo)")
+        print(f"Carga:   {(loaded - generated) * 1000:8.1f} ms")
+        print(f"Análisis:{(done - loaded) * 1000:8.1f} ms  ({events / (done - generated) / 1e6:.1f} M eventos/s)")
+        print(f"Utilización {report['utilization']:.3f}, p95 espera {report['waits']['p95']}s, "
+              f"{report['switches']['count']} cambios con {report['switches']['overhead_s']}s de costo")
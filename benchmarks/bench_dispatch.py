@@ -0,0 +1,147 @@
+"""
+Benchmark del camino de cada mensaje en el servidor: compara el esquema anterior (Direccion[...upper()],
+MessageType(...) con excepciones, cadena if/elif y template_response + json.dumps con un timestamp nuevo
+por respuesta) con la tabla de despacho y las respuestas pre-codificadas de server.responses.
+
+Mide CPU por mensaje (time.process_time) de dos partes por separado:
+    respuestas: construir y codificar la trama de las respuestas frecuentes
+    despacho: validar y despachar el mensaje ya decodificado, incluida la respuesta de los rechazos
+
+    python benchmarks/bench_dispatch.py [--messages 200000]
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import sys
+import time
+from datetime import timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from model.Direccion import Direccion
+from model.MessageType import MessageType
+from server import responses
+from server.commands import Command, CommandKind
+from server.server import Server
+
+
+class _NullSocket:
+    def sendall(self, data):
+        pass
+
+
+def legacy_response(status, current_direction, message, data = None, trace_id = None):
+    response = {
+        'status': status,
+        'message': message,
+        'current_direction': current_direction.value,
+        'timestamp': datetime.datetime.now(timezone.utc).isoformat()
+    }
+    if data:
+        response['data'] = data
+    if trace_id is not None:
+        response['trace_id'] = trace_id
+    return (json.dumps(response) + "\n").encode('utf-8')
+
+
+def legacy_process(server, car_id, message, client_socket):
+    """Validación y despacho anteriores de process_client_request."""
+    if message.get('type') == MessageType.ADMIN.value:
+        return
+    car_direction_str = message.get('direction')
+    if not car_direction_str:
+        client_socket.sendall(legacy_response(MessageType.PERMISSION_DENIED.value, Direccion.NONE, "Dirección de vehículo no especificada."))
+        return
+    try:
+        car_direction = Direccion[car_direction_str.upper()]
+    except KeyError:
+        client_socket.sendall(legacy_response(MessageType.PERMISSION_DENIED.value, Direccion.NONE, f"Dirección de vehículo inválida: {car_direction_str}."))
+        return
+    msg_type_str = message.get('type')
+    if not msg_type_str:
+        client_socket.sendall(legacy_response(MessageType.PERMISSION_DENIED.value, server.current_direction, "Tipo de mensaje no especificado."))
+        return
+    try:
+        msg_type = MessageType(msg_type_str)
+    except ValueError:
+        client_socket.sendall(legacy_response(MessageType.PERMISSION_DENIED.value, server.current_direction, f"Tipo de mensaje desconocido: {msg_type_str}."))
+        return
+    if msg_type == MessageType.REQUEST:
+        server._call(Command(CommandKind.REQUEST, car_id, car_direction, client_socket, message))
+    elif msg_type == MessageType.END_CROSS:
+        server._call(Command(CommandKind.EXIT, car_id, car_direction, client_socket, message))
+    elif msg_type == MessageType.RESERVE:
+        server._call(Command(CommandKind.RESERVE, car_id, car_direction, client_socket, message))
+    else:
+        client_socket.sendall(legacy_response(MessageType.PERMISSION_DENIED.value, server.current_direction, "Tipo de mensaje desconocido."))
+
+
+def _messages(count):
+    """Mezcla típica: casi todo REQUEST/END_CROSS, con algunos mensajes inválidos."""
+    mix = [
+        {'id': 'car-1', 'direction': 'LEFT', 'type': MessageType.REQUEST.value},
+        {'id': 'car-1', 'direction': 'LEFT', 'type': MessageType.END_CROSS.value},
+        {'id': 'car-2', 'direction': 'RIGHT', 'type': MessageType.REQUEST.value},
+        {'id': 'car-2', 'direction': 'RIGHT', 'type': MessageType.END_CROSS.value},
+        {'id': 'car-3', 'direction': 'RIGHT', 'type': MessageType.RESERVE.value, 'not_before': 1.0},
+        {'id': 'car-4', 'type': MessageType.REQUEST.value},
+        {'id': 'car-5', 'direction': 'LEFT', 'type': 'NOPE'},
+        {'id': 'car-6', 'direction': 'LEFT', 'type': MessageType.PERMISSION_GRANTED.value},
+    ]
+    return [mix[i % len(mix)] for i in range(count)]
+
+
+def _cpu_per_message(fn, count):
+    start = time.process_time()
+    fn()
+    return (time.process_time() - start) / count * 1e6
+
+
+def bench_responses(count):
+    data = {"queue_position": 3, "eta_seconds": 4.25}
+    clock = responses.CoarseClock()
+    third = count // 3
+
+    def legacy():
+        for _ in range(third):
+            legacy_response(MessageType.PERMISSION_GRANTED.value, Direccion.LEFT, "Tienes permiso para cruzar. ¡Adelante!", trace_id="0123456789abcdef")
+            legacy_response(MessageType.PERMISSION_DENIED.value, Direccion.LEFT, "Puente ocupado o esperando alternancia. Debes esperar tu turno.", data=data, trace_id="0123456789abcdef")
+            legacy_response(MessageType.STATUS_UPDATE.value, Direccion.LEFT, "El vehículo car-1 ha cruzado el puente exitosamente.", trace_id="0123456789abcdef")
+
+    def templates():
+        for _ in range(third):
+            responses.GRANTED.render(Direccion.LEFT, clock.now(), trace_id="0123456789abcdef")
+            responses.WAIT_TURN.render(Direccion.LEFT, clock.now(), "car-1", data=data, trace_id="0123456789abcdef")
+            responses.CROSSED.render(Direccion.LEFT, clock.now(), "car-1", trace_id="0123456789abcdef")
+
+    return _cpu_per_message(legacy, third * 3), _cpu_per_message(templates, third * 3)
+
+
+def bench_dispatch(count):
+    server = Server(port=0)
+    server._call = lambda command: None # Solo se mide el hilo de conexión, no el núcleo
+    sock = _NullSocket()
+    messages = _messages(count)
+
+    def legacy():
+        for message in messages:
+            legacy_process(server, message['id'], message, sock)
+
+    def table():
+        for message in messages:
+            server.process_client_request(message['id'], message, sock)
+
+    with contextlib.redirect_stdout(io.StringIO()): # Los [DEBUG] de _send_bytes no cuentan
+        return _cpu_per_message(legacy, count), _cpu_per_message(table, count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200000)
+    args = parser.parse_args()
+
+    for name, bench in (("respuestas", bench_responses), ("despacho", bench_dispatch)):
+        before, after = bench(args.messages)
+        print(f"{name:<11} anterior {before:6.2f} us/msg   nuevo {after:6.2f} us/msg   ({before / after:.1f}x)")
@@ -0,0 +1,109 @@
+"""
+Benchmark del separador de mensajes: compara el esquema anterior (buffer += data / split)
+con LineFramer, primero en memoria y luego sobre un socketpair a 100k mensajes por segundo.
+
+    python benchmarks/bench_framing.py [--messages 200000] [--rate 100000]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.framing import LineFramer
+
+
+def _sample_stream(count):
+    message = json.dumps({
+        'id': 'car-0001',
+        'direction': 'LEFT',
+        'type': 'REQUEST_ACCESS',
+        'timestamp': '2026-01-01T00:00:00.000000+00:00',
+        'trace_id': '0123456789abcdef',
+        'sampled': False
+    }).encode('utf-8') + b"\n"
+    return message * count
+
+
+def _chunks(stream, size):
+    return [stream[i:i + size] for i in range(0, len(stream), size)]
+
+
+def legacy_split(chunks):
+    frames = 0
+    buffer = b""
+    for data in chunks:
+        buffer += data
+        while b"\n" in buffer:
+            msg_bytes, buffer = buffer.split(b"\n", 1)
+            frames += 1
+    return frames
+
+
+def line_framer(chunks):
+    frames = 0
+    framer = LineFramer()
+    for data in chunks:
+        framer.feed(data)
+        for _ in framer.frames():
+            frames += 1
+    return frames
+
+
+def bench_memory(messages, chunk_size):
+    chunks = _chunks(_sample_stream(messages), chunk_size)
+    for name, fn in (("legacy split", legacy_split), ("LineFramer", line_framer)):
+        start = time.perf_counter()
+        frames = fn(chunks)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<14} chunk={chunk_size:>6}B  {frames} tramas en {elapsed:.3f}s -> {frames / elapsed:>12,.0f} msg/s")
+
+
+def bench_socket(rate, seconds):
+    """Envía a ritmo fijo por un socketpair y mide si el receptor con recv_into mantiene el paso."""
+    sender, receiver = socket.socketpair()
+    batch = max(1, rate // 1000) # Ráfagas cada milisegundo
+    payload = _sample_stream(batch)
+    total = batch * int(seconds * 1000)
+    received = 0
+
+    def send():
+        start = time.perf_counter()
+        for i in range(int(seconds * 1000)):
+            delay = start + i / 1000 - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            sender.sendall(payload)
+        sender.shutdown(socket.SHUT_WR)
+
+    t = threading.Thread(target=send, daemon=True)
+    framer = LineFramer()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    t.start()
+    while framer.recv_into(receiver, 65536):
+        for _ in framer.frames():
+            received += 1
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    t.join()
+    sender.close()
+    receiver.close()
+    print(f"  objetivo {rate:,} msg/s durante {seconds}s: {received}/{total} tramas en {wall:.2f}s "
+          f"({received / wall:,.0f} msg/s, CPU del proceso {cpu:.2f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--rate", type=int, default=100000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print("En memoria:")
+    for chunk_size in (4096, 65536, 1 << 20):
+        bench_memory(args.messages, chunk_size)
+    print("Sobre socketpair:")
+    bench_socket(args.rate, args.seconds)
@@ -7,6 +7,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from model.Vehicle import Vehicle
 from model.MessageType import MessageType
 from model.Direccion import Direccion
+from model.Prioridad import Prioridad
+from common.tracing import Tracer
+from common.framing import LineFramer
 
 import random
 import socket
@@ -34,7 +37,9 @@ class Client:
         port,
         velocidad,
         tiempo_retraso,
-        direccion
+        direccion,
+        tracer: Tracer = None,
+        prioridad: Prioridad = Prioridad.NORMAL
     ):
         """
         Constructor
@@ -46,6 +51,8 @@ class Client:
             velocidad: Velocidad del vehiculo
             tiempo_retraso: Tiempo promedio de retraso después de cruzar
             direccion: Direccion del vehiculo
+            tracer (Tracer): Registro de spans; por defecto se configura desde el entorno
+            prioridad (Prioridad): Clase de prioridad que se declara al servidor al conectarse
         """
         self.host = host
         self.port = port
@@ -57,11 +64,20 @@ class Client:
             id = id,
             velocidad = velocidad,
             tiempo_retraso = tiempo_retraso,
-            direccion = direccion 
+            direccion = direccion,
+            prioridad = prioridad
         )
         self.permission_event = threading.Event()
         self.last_server_message = None
         self.lock = threading.Lock()
+        self.tracer = tracer or Tracer.from_env()
+        self.trace_id = Tracer.new_trace_id() # Identificador de correlación del ciclo de cruce actual
+        self.trace_sampled = False
+        self.queue_position = None # Última posición en la cola informada por el servidor
+        self.eta_segundos = None   # Tiempo estimado hasta el permiso informado por el servidor
+        self.eta_recibido = 0.0    # Instante (monotónico) en que llegó la estimación
+        self.historial = None      # Última respuesta de consultar_historial (columnas por segundo)
+        self.estado_puente = None  # Último STATUS_UPDATE con datos (su data incluye la versión)
         
         # Iniciar la conexión y el hilo receptor al crear el cliente
         self.conexion()
@@ -114,26 +130,40 @@ class Client:
         """
         Hilo receptor que escucha mensajes del servidor y actualiza el estado del cliente.
         """
-        buffer = b""
+        framer = LineFramer()
         while self.is_running:
             if not self.is_connected or self.client_socket is None:
                 time.sleep(1) # Esperar antes de reintentar si no está conectado
                 continue
             try:
-                data = self.client_socket.recv(4096)
-                if not data: # Servidor cerró la conexión
+                if not framer.recv_into(self.client_socket): # Servidor cerró la conexión
                     logger.warning(f"[{self.vehicle.id}] Servidor desconectado. Intentando reconectar...")
                     self.is_connected = False
+                    framer.reset() # Los datos parciales pertenecen a la conexión anterior
                     self.conexion()
                     continue
                 
-                buffer += data
-                while b"\n" in buffer:
-                    msg_bytes, buffer = buffer.split(b"\n", 1)
+                for msg_bytes in framer.frames():
                     if not msg_bytes.strip(): # Saltar líneas vacías
                         continue
                     try:
                         message = json.loads(msg_bytes.decode('utf-8'))
+                        self._actualizar_estimacion(message)
+                        if message.get('status') == MessageType.QUEUE_POSITION.value:
+                            # Actualización informativa: no reemplaza la última respuesta que espera cruzar()
+                            logger.debug(f"[{self.vehicle.id}] Posición en cola: {self.queue_position}, ETA: {self.eta_segundos}s")
+                            continue
+                        if message.get('status') == MessageType.RESERVE.value:
+                            # Confirmación de la reserva del próximo cruce: tampoco es respuesta a un REQUEST
+                            logger.debug(f"[{self.vehicle.id}] Reserva confirmada: {message.get('data')}")
+                            continue
+                        if message.get('status') == MessageType.HISTORY.value:
+                            self.historial = message.get('data')
+                            continue
+                        if message.get('status') == MessageType.STATUS_NOT_MODIFIED.value:
+                            continue # estado_puente sigue vigente
+                        if message.get('status') == MessageType.STATUS_UPDATE.value and isinstance(message.get('data'), dict):
+                            self.estado_puente = message
                         with self.lock:
                             self.last_server_message = message
                         logger.info(f"[{self.vehicle.id}] Recibido del servidor: {message.get('type', message.get('status'))} - {message.get('message')}")
@@ -152,13 +182,14 @@ class Client:
                             self.permission_event.clear() # Limpiar si el permiso es denegado
                             logger.info(f"[{self.vehicle.id}] Permiso denegado.")
                     except json.JSONDecodeError as e:
+                        # Solo se descarta la trama malformada; las siguientes del mismo recv siguen siendo válidas
                         logger.error(f"[{self.vehicle.id}] Error al decodificar JSON: {e} - Data: {msg_bytes}")
-                        buffer = b"" 
             except socket.timeout:
                 pass # Esto es normal si no hay datos disponibles
             except (ConnectionResetError, BrokenPipeError, OSError) as e:
                 logger.error(f"[{self.vehicle.id}] Error de conexión en hilo receptor: {e}. Reconectando...")
                 self.is_connected = False
+                framer.reset()
                 self.conexion()
             except Exception as e:
                 logger.error(f"[{self.vehicle.id}] Error inesperado en hilo receptor: {e}")
@@ -171,6 +202,11 @@ class Client:
         cruzando = False
         while self.is_running:
             self.permission_event.clear()
+            # Cada ciclo de cruce (REQUEST -> permiso -> cruce -> END_CROSS) comparte un trace_id
+            self.trace_id = Tracer.new_trace_id()
+            self.trace_sampled = self.tracer.should_sample()
+            trace_id = self.trace_id if self.trace_sampled else None
+            self.tracer.begin("client.wait_grant", trace_id, car_id=self.vehicle.id, direction=self.vehicle.direccion.value)
             while self.is_running:
                 # Solo enviar REQUEST si no estamos cruzando
                 if not cruzando:
@@ -180,16 +216,15 @@ class Client:
                         continue
                     logger.info(f"[{self.vehicle.id}] Solicitud enviada. Esperando permiso para cruzar...")
 
-                if self.permission_event.wait(timeout=20):
+                # Mientras esperamos el aviso del scheduler dormimos hasta el tiempo estimado por el servidor
+                if self.permission_event.wait(timeout=self._espera_estimada(20)):
                     with self.lock:
                         last_msg = self.last_server_message
 
-                    # Si el servidor nos notifica que es nuestro turno, debemos enviar un nuevo REQUEST solo si no estamos cruzando
-                    if last_msg and last_msg.get('status') == MessageType.PERMISSION_GRANTED.value and last_msg.get('message', '').startswith('Tu turno ha llegado') and not cruzando:
+                    # Si el servidor nos notifica que es nuestro turno, el REQUEST se envía al inicio del ciclo
+                    if self._es_notificacion(last_msg) and not cruzando:
                         logger.info(f"[{self.vehicle.id}] Recibido notificación del scheduler. Enviando REQUEST para cruzar...")
-                        if not self._send_raw_message(self.mensaje_template(MessageType.REQUEST.value)):
-                            time.sleep(2)
-                            continue
+                        self.permission_event.clear()
                         continue
 
                     # Si recibimos permiso para cruzar y no estamos cruzando, procedemos
@@ -199,15 +234,20 @@ class Client:
                         self.permission_event.clear()
                         break
                     elif last_msg and last_msg.get('status') == MessageType.STATUS_UPDATE.value and 'ya está en el puente' in last_msg.get('message', ''):
-                        # Ignorar mensajes de status si ya estamos cruzando
-                        logger.debug(f"[{self.vehicle.id}] Ignorando mensaje de status: {last_msg.get('message')}")
-                        continue
+                        # El servidor ya nos registró en el puente (respuesta a un REQUEST repetido): cruzamos
+                        logger.debug(f"[{self.vehicle.id}] El servidor indica que ya estamos en el puente: {last_msg.get('message')}")
+                        cruzando = True
+                        self.permission_event.clear()
+                        break
                     elif last_msg and last_msg.get('status') == MessageType.PERMISSION_DENIED.value:
                         logger.warning(f"[{self.vehicle.id}] Permiso denegado explícitamente. Esperando notificación del scheduler.")
                         self.permission_event.clear()
-                        time.sleep(5)
+                        self.permission_event.wait(timeout=self._espera_estimada(5))
                         with self.lock:
                             current_last_msg = self.last_server_message
+                            if self.permission_event.is_set() and self._es_notificacion(current_last_msg):
+                                self.permission_event.clear()
+                                continue # El REQUEST para ocupar el turno se envía al inicio del ciclo
                             if self.permission_event.is_set() and current_last_msg and current_last_msg.get('status') == MessageType.PERMISSION_GRANTED.value and not cruzando:
                                 logger.info(f"[{self.vehicle.id}] Recibido permiso del scheduler después de espera pasiva. ¡Procediendo a cruzar!")
                                 cruzando = True
@@ -226,20 +266,26 @@ class Client:
                     continue
 
             # --- A partir de aquí, el coche TIENE permiso para cruzar ---
+            self.tracer.end("client.wait_grant", trace_id, car_id=self.vehicle.id)
             tiempo_cruce = random.uniform(1, self.vehicle.velocidad)
             logger.info(f"[{self.vehicle.id}] Cruzando puente por {tiempo_cruce:.2f} segundos...")
-            time.sleep(tiempo_cruce)
+            with self.tracer.span("client.crossing", trace_id, car_id=self.vehicle.id):
+                time.sleep(tiempo_cruce)
 
             # Notifica fin de cruce
-            if not self._send_raw_message(self.mensaje_template(MessageType.END_CROSS.value)):
-                logger.error(f"[{self.vehicle.id}] No se pudo notificar el fin del cruce.")
+            with self.tracer.span("client.end_cross", trace_id, car_id=self.vehicle.id):
+                if not self._send_raw_message(self.mensaje_template(MessageType.END_CROSS.value)):
+                    logger.error(f"[{self.vehicle.id}] No se pudo notificar el fin del cruce.")
 
             logger.info(f"[{self.vehicle.id}] Terminó de cruzar. Esperando antes de volver a intentar.")
             cruzando = False
 
             tiempo_espera = random.uniform(1, self.vehicle.tiempo_retraso)
+            # Avisar al servidor con antelación cuándo volveremos a pedir paso en sentido contrario
+            self.reservar_regreso(time.time() + tiempo_espera)
             logger.info(f"[{self.vehicle.id}] Esperando {tiempo_espera:.2f} segundos antes de volver a cruzar.")
-            time.sleep(tiempo_espera)
+            with self.tracer.span("client.retraso", trace_id, car_id=self.vehicle.id):
+                time.sleep(tiempo_espera)
 
             self.vehicle.cambiar_direccion() # type: ignore
             logger.info(f"[{self.vehicle.id}] Cambia dirección a: {self.vehicle.direccion.value}")
@@ -247,6 +293,59 @@ class Client:
         logger.info(f"[{self.vehicle.id}] Hilo de cruce finalizado.")
 
 
+    def _actualizar_estimacion(self, message):
+        """Guarda la posición en la cola y el tiempo estimado que acompañan a denegaciones y actualizaciones."""
+        status = message.get('status')
+        data = message.get('data') or {}
+        if status in (MessageType.PERMISSION_DENIED.value, MessageType.QUEUE_POSITION.value) and 'eta_seconds' in data:
+            self.queue_position = data.get('queue_position')
+            self.eta_segundos = data.get('eta_seconds')
+            self.eta_recibido = time.monotonic()
+        elif status == MessageType.PERMISSION_GRANTED.value:
+            self.queue_position = None
+            self.eta_segundos = None
+
+    def _espera_estimada(self, por_defecto):
+        """
+        Segundos a esperar el aviso del scheduler antes de reintentar el REQUEST.
+        Con una estimación del servidor se espera hasta la hora prevista más un margen; sin ella, por_defecto.
+        """
+        if self.eta_segundos is None:
+            return por_defecto
+        restante = max(0.0, self.eta_segundos - (time.monotonic() - self.eta_recibido))
+        return min(60.0, max(1.0, restante + max(2.0, restante * 0.5)))
+
+    @staticmethod
+    def _es_notificacion(message):
+        """Aviso del scheduler de que es nuestro turno (hay que confirmar con un REQUEST)."""
+        return bool(message) and message.get('status') == MessageType.PERMISSION_GRANTED.value and message.get('message', '').startswith('Tu turno ha llegado')
+
+    def reservar_regreso(self, not_before):
+        """
+        Reserva el próximo cruce en la dirección contraria a la actual
+
+        Args:
+            not_before (float): Instante (segundos epoch) a partir del cual se pedirá paso
+        """
+        mensaje = self.mensaje_template(MessageType.RESERVE.value)
+        mensaje['direction'] = (Direccion.LEFT if self.vehicle.direccion == Direccion.RIGHT else Direccion.RIGHT).value
+        mensaje['not_before'] = not_before
+        if not self._send_raw_message(mensaje):
+            logger.warning(f"[{self.vehicle.id}] No se pudo reservar el cruce de regreso.")
+
+    def consultar_historial(self, segundos = 600, step = 1):
+        """
+        Pide al servidor el historial por segundo de los últimos segundos; la respuesta queda en self.historial
+
+        Args:
+            segundos (float): Ventana hacia atrás desde ahora
+            step (int): Segundos por punto (el servidor agrega)
+        """
+        mensaje = self.mensaje_template(MessageType.HISTORY.value)
+        mensaje['since'] = time.time() - segundos
+        mensaje['step'] = step
+        self._send_raw_message(mensaje)
+
     def mensaje_template(self, message_type):
         """
         Template para enviar un mensaje (token) al servidor
@@ -261,7 +360,10 @@ class Client:
             'id': self.vehicle.id,
             'direction': self.vehicle.direccion.value,
             'type': message_type,
-            'timestamp': datetime.datetime.now(timezone.utc).isoformat()
+            'timestamp': datetime.datetime.now(timezone.utc).isoformat(),
+            'trace_id': self.trace_id,
+            'sampled': self.trace_sampled,
+            'priority': self.vehicle.prioridad.value
         }
         
     def cerrar(self):
@@ -277,24 +379,24 @@ class Client:
                 self.client_socket = None
         if hasattr(self, 'receiver_thread') and self.receiver_thread.is_alive():
             self.receiver_thread.join(timeout=2) # Esperar un poco a que el hilo termine
+        if self.tracer.output_path:
+            self.tracer.export_chrome_trace()
             
     def actualizar_estado_puente(self, bridge_state):
         """
         Solicita el estado del puente al servidor y actualiza el diccionario bridge_state.
+        Se envía la versión del último estado recibido: si no cambió, el servidor responde "sin cambios".
         """
         if not self.is_connected:
             return
         try:
-            self._send_raw_message({
-                'id': self.vehicle.id,
-                'direction': self.vehicle.direccion.value,
-                'type': MessageType.STATUS_UPDATE.value,  # <-- aquí el cambio
-                'timestamp': datetime.datetime.now(timezone.utc).isoformat()
-            })
+            mensaje = self.mensaje_template(MessageType.STATUS_UPDATE.value)
+            if self.estado_puente:
+                mensaje['version'] = self.estado_puente['data'].get('version')
+            self._send_raw_message(mensaje)
             time.sleep(0.1)
-            with self.lock:
-                msg = self.last_server_message
-            if msg and msg.get('status') == MessageType.STATUS_UPDATE.value and msg.get('data'):
+            msg = self.estado_puente
+            if msg and msg.get('data'):
                 data = msg['data']
                 bridge_state["ocupado"] = data.get("bridge_occupied", False)
                 bridge_state["direccion"] = msg.get("current_direction", "LEFT")
@@ -340,6 +442,14 @@ if __name__ == "__main__":
             break
         else:
             print("Dirección inválida. Debe ser 'left' o 'right'.")
+
+    while True:
+        entrada = input("Prioridad [normal/service/emergency] (normal): ").strip().upper() or Prioridad.NORMAL.value
+        try:
+            prioridad = Prioridad(entrada)
+            break
+        except ValueError:
+            print("Prioridad inválida. Debe ser 'normal', 'service' o 'emergency'.")
     
     client = Client(
         id=id_vehiculo,
@@ -347,7 +457,8 @@ if __name__ == "__main__":
         port=port,
         velocidad=velocidad,
         tiempo_retraso=tiempo_retraso,
-        direccion=direccion
+        direccion=direccion,
+        prioridad=prioridad
     )
     try:
         client.cruzar()
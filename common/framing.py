@@ -0,0 +1,103 @@
+class LineFramer:
+    """
+    Separador incremental de mensajes terminados en salto de linea sobre un bytearray reutilizable.
+
+    Recibe con recv_into directamente en el buffer y busca el separador solo en los bytes nuevos,
+    de modo que cada trama se copia una unica vez (al entregarla) sin importar cuantas lleguen juntas.
+    Las tramas que superan max_frame_size se descartan hasta el siguiente salto de linea.
+    """
+    def __init__(
+        self,
+        max_frame_size: int = 64 * 1024,
+        initial_size: int = 8192
+    ):
+        """
+        Constructor de la clase
+
+        Args:
+            max_frame_size (int): Tamaño maximo de una trama (sin el salto de linea)
+            initial_size (int): Tamaño inicial del buffer
+        """
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray(max(initial_size, 1024))
+        self._view = memoryview(self._buffer)
+        self._start = 0       # Inicio de los datos aun no entregados
+        self._end = 0         # Fin de los datos validos
+        self._scan = 0        # Desde donde buscar el siguiente separador
+        self._discarding = False
+        self.dropped_frames = 0
+
+    def reset(self):
+        """Descarta cualquier dato pendiente (por ejemplo tras reconectar)."""
+        self._start = self._end = self._scan = 0
+        self._discarding = False
+
+    def pending(self):
+        """Bytes recibidos que aun no forman una trama completa."""
+        return bytes(self._view[self._start:self._end])
+
+    def _reserve(self, size):
+        """Garantiza al menos size bytes libres al final del buffer."""
+        if len(self._buffer) - self._end >= size:
+            return
+        pending = self._end - self._start
+        if self._start > 0:
+            # Mover solo la trama parcial al inicio
+            self._buffer[:pending] = self._view[self._start:self._end]
+            self._scan -= self._start
+            self._start, self._end = 0, pending
+        if len(self._buffer) - self._end < size:
+            new_size = len(self._buffer)
+            while new_size - self._end < size:
+                new_size *= 2
+            self._view.release()
+            grown = bytearray(new_size)
+            grown[:self._end] = self._buffer[:self._end]
+            self._buffer = grown
+            self._view = memoryview(self._buffer)
+
+    def recv_into(self, sock, size: int = 4096):
+        """
+        Lee del socket directamente en el buffer
+
+        Returns:
+            int: Bytes leidos (0 si el otro extremo cerro la conexion)
+        """
+        self._reserve(size)
+        n = sock.recv_into(self._view[self._end:self._end + size])
+        self._end += n
+        return n
+
+    def feed(self, data):
+        """Agrega bytes ya recibidos por otro medio."""
+        self._reserve(len(data))
+        self._buffer[self._end:self._end + len(data)] = data
+        self._end += len(data)
+
+    def frames(self):
+        """
+        Genera las tramas completas disponibles (bytes, sin el salto de linea).
+        Debe consumirse completo antes de la siguiente lectura.
+        """
+        while True:
+            idx = self._buffer.find(b"\n", self._scan, self._end)
+            if idx < 0:
+                if self._end - self._start > self.max_frame_size:
+                    # Trama demasiado grande: se descarta lo acumulado y se resincroniza en el siguiente separador
+                    if not self._discarding:
+                        self.dropped_frames += 1
+                    self._discarding = True
+                    self._start = self._end
+                self._scan = self._end
+                if self._start == self._end:
+                    self._start = self._end = self._scan = 0
+                return
+            start, self._start = self._start, idx + 1
+            self._scan = self._start
+            if self._discarding:
+                self._discarding = False
+                continue
+            if idx - start > self.max_frame_size:
+                self.dropped_frames += 1
+                continue
+            yield bytes(self._view[start:idx])
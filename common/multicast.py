@@ -0,0 +1,175 @@
+import os
+import socket
+import struct
+import time
+
+from model.Direccion import Direccion
+from common.status_page import DIRECTION_CODES, DIRECTIONS_BY_CODE
+
+DEFAULT_GROUP = "239.255.77.77"
+DEFAULT_PORT = 7778
+
+
+class StatusDatagram:
+    """
+    Codificacion compacta de un cambio de estado del puente en un solo datagrama.
+
+        <4s magic><Q epoch><Q seq><d timestamp><B direccion><H ocupacion><I cola_izq><I cola_der><B flags><B n_ids>
+        y luego n_ids veces <B largo><id utf-8>
+
+    epoch identifica al emisor (instante de arranque y pid): seq vuelve a empezar en 1 con cada servidor,
+    tambien tras un reinicio en caliente. Si los IDs no caben en MAX_SIZE se marca FLAG_TRUNCATED y el
+    receptor debe pedir el estado completo por TCP.
+    """
+    MAGIC = b"PMC2"
+    HEADER = struct.Struct("<4sQQdBHIIBB")
+    MAX_SIZE = 1400 # Por debajo del MTU tipico de Ethernet
+    FLAG_TRUNCATED = 0x01
+
+    @classmethod
+    def encode(cls, epoch, seq, direction: Direccion, occupancy, left_size, right_size, car_ids):
+        body = bytearray()
+        n_ids = 0
+        flags = 0
+        for car_id in car_ids:
+            raw = str(car_id).encode("utf-8")[:255]
+            if cls.HEADER.size + len(body) + 1 + len(raw) > cls.MAX_SIZE or n_ids == 255:
+                flags |= cls.FLAG_TRUNCATED
+                break
+            body.append(len(raw))
+            body += raw
+            n_ids += 1
+        header = cls.HEADER.pack(cls.MAGIC, epoch, seq, time.time(), DIRECTION_CODES[direction],
+                                 min(occupancy, 0xFFFF), left_size, right_size, flags, n_ids)
+        return header + bytes(body)
+
+    @classmethod
+    def decode(cls, data):
+        """
+        Returns:
+            dict[str, Any] | None: Estado contenido en el datagrama, o None si no es un datagrama del puente
+                o llego incompleto
+        """
+        if len(data) < cls.HEADER.size or not data.startswith(cls.MAGIC):
+            return None
+        _, epoch, seq, timestamp, direction, occupancy, left_size, right_size, flags, n_ids = cls.HEADER.unpack_from(data, 0)
+        ids = []
+        pos = cls.HEADER.size
+        for _ in range(n_ids):
+            if pos >= len(data) or pos + 1 + data[pos] > len(data):
+                return None # Datagrama truncado
+            length = data[pos]
+            ids.append(data[pos + 1:pos + 1 + length].decode("utf-8", errors="replace"))
+            pos += 1 + length
+        return {
+            "epoch": epoch,
+            "seq": seq,
+            "timestamp": timestamp,
+            "current_direction": DIRECTIONS_BY_CODE.get(direction, Direccion.NONE).value,
+            "cars_on_bridge_count": occupancy,
+            "cars_on_bridge": ids,
+            "left_traffic_size": left_size,
+            "right_traffic_size": right_size,
+            "truncated": bool(flags & cls.FLAG_TRUNCATED),
+        }
+
+
+class StatusMulticaster:
+    """
+    Emite cada cambio de estado del puente una sola vez a un grupo multicast
+    """
+    def __init__(
+        self,
+        group: str = DEFAULT_GROUP,
+        port: int = DEFAULT_PORT,
+        interface: str = "127.0.0.1",
+        ttl: int = 1
+    ):
+        """
+        Args:
+            group (str): Direccion del grupo multicast
+            port (int): Puerto UDP del grupo
+            interface (str): IP de la interfaz de salida (loopback por defecto, la IP de la LAN para otros equipos)
+            ttl (int): Saltos permitidos (1 = solo la red local)
+        """
+        self.group = group
+        self.port = port
+        self.epoch = (int(time.time() * 1000) << 22) | (os.getpid() & 0x3FFFFF)
+        self.seq = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+
+    def publish(self, direction: Direccion, occupancy, left_size, right_size, car_ids):
+        self.seq += 1
+        datagram = StatusDatagram.encode(self.epoch, self.seq, direction, occupancy, left_size, right_size, car_ids)
+        try:
+            self.sock.sendto(datagram, (self.group, self.port))
+        except OSError as e:
+            print(f"[WARNING] No se pudo emitir el estado por multicast: {e}")
+
+    def close(self):
+        self.sock.close()
+
+
+class StatusMulticastReceiver:
+    """
+    Observador del grupo multicast que detecta huecos en la secuencia
+    """
+    def __init__(
+        self,
+        group: str = DEFAULT_GROUP,
+        port: int = DEFAULT_PORT,
+        interface: str = "127.0.0.1",
+        on_resync = None
+    ):
+        """
+        Args:
+            group (str): Direccion del grupo multicast
+            port (int): Puerto UDP del grupo
+            interface (str): IP de la interfaz por la que se une al grupo
+            on_resync: Callable sin argumentos que pide el estado completo por TCP
+                (por ejemplo Client.actualizar_estado_puente); se llama ante huecos o IDs truncados
+        """
+        self.on_resync = on_resync
+        self.epoch = None
+        self.last_seq = None
+        self.gaps = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("", port))
+        membership = struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton(interface))
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+
+    def receive(self, timeout = None):
+        """
+        Espera el siguiente datagrama de estado
+
+        Returns:
+            dict[str, Any] | None: Estado recibido, o None si vence el timeout
+        """
+        self.sock.settimeout(timeout)
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(StatusDatagram.MAX_SIZE)
+            except socket.timeout:
+                return None
+            state = StatusDatagram.decode(data)
+            if state is None:
+                continue
+            if state["epoch"] != self.epoch:
+                self.epoch = state["epoch"] # Otro servidor (reinicio): su secuencia empieza de nuevo
+                self.last_seq = None
+            if self.last_seq is not None and state["seq"] <= self.last_seq:
+                continue # Duplicado o fuera de orden
+            gap = self.last_seq is not None and state["seq"] != self.last_seq + 1
+            if gap:
+                self.gaps += 1
+            self.last_seq = state["seq"]
+            if (gap or state["truncated"]) and self.on_resync:
+                self.on_resync()
+            return state
+
+    def close(self):
+        self.sock.close()
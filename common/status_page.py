@@ -0,0 +1,156 @@
+import mmap
+import os
+import struct
+import time
+
+from model.Direccion import Direccion
+
+DIRECTION_CODES = {Direccion.NONE: 0, Direccion.LEFT: 1, Direccion.RIGHT: 2}
+DIRECTIONS_BY_CODE = {code: direccion for direccion, code in DIRECTION_CODES.items()}
+
+
+class StatusPage:
+    """
+    Disposicion fija del registro de estado del puente en un archivo mapeado en memoria.
+
+        cabecera: <4s magic><H version><H max_ids><Q seq>
+        cuerpo:   <d timestamp><B direccion><H ocupacion><I cola_izq><I cola_der><H n_ids>
+        ids:      max_ids ranuras de ID_SIZE bytes (utf-8 rellenado con ceros)
+
+    seq es impar mientras el escritor modifica el cuerpo; un lector que ve el mismo valor par
+    antes y despues de copiar el cuerpo obtuvo una lectura consistente.
+    """
+    MAGIC = b"PSTA"
+    VERSION = 1
+    ID_SIZE = 32
+    HEADER = struct.Struct("<4sHHQ")
+    SEQ = struct.Struct("<Q")
+    SEQ_OFFSET = 8
+    BODY = struct.Struct("<dBHIIH")
+
+    @classmethod
+    def size(cls, max_ids):
+        return cls.HEADER.size + cls.BODY.size + max_ids * cls.ID_SIZE
+
+
+class StatusPageWriter(StatusPage):
+    """
+    Publica el estado del puente en el archivo compartido (un solo escritor: el servidor)
+    """
+    def __init__(self, path, max_ids: int = 32):
+        """
+        Args:
+            path: Ruta del archivo compartido. La pagina se arma en un archivo temporal y se reemplaza
+                con os.replace: nunca se trunca un archivo que un lector (o el proceso anterior de un
+                reinicio en caliente) tenga mapeado, lo que le daria SIGBUS
+            max_ids (int): Cantidad maxima de IDs en el puente que se publican
+        """
+        self.path = path
+        self.max_ids = max_ids
+        self.seq = 0
+        size = self.size(max_ids)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"\0" * size)
+        self._file = open(tmp_path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        self.HEADER.pack_into(self._mm, 0, self.MAGIC, self.VERSION, max_ids, self.seq)
+        os.replace(tmp_path, path)
+
+    def publish(self, direction: Direccion, occupancy, left_size, right_size, car_ids):
+        """Escribe un nuevo estado protegido por el contador de secuencia."""
+        if self._mm.closed:
+            return
+        ids = list(car_ids)[:self.max_ids]
+        self.seq += 1 # Impar: escritura en curso
+        self.SEQ.pack_into(self._mm, self.SEQ_OFFSET, self.seq)
+        offset = self.HEADER.size
+        self.BODY.pack_into(self._mm, offset, time.time(), DIRECTION_CODES[direction],
+                            min(occupancy, 0xFFFF), left_size, right_size, len(ids))
+        offset += self.BODY.size
+        for i, car_id in enumerate(ids):
+            raw = str(car_id).encode("utf-8")[:self.ID_SIZE]
+            start = offset + i * self.ID_SIZE
+            self._mm[start:start + self.ID_SIZE] = raw.ljust(self.ID_SIZE, b"\0")
+        self.seq += 1 # Par: estado consistente
+        self.SEQ.pack_into(self._mm, self.SEQ_OFFSET, self.seq)
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+class StatusPageReader(StatusPage):
+    """
+    Lee el estado publicado por el servidor sin llamadas al sistema por lectura
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_ids, _ = self.HEADER.unpack_from(self._mm, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{path} no es una página de estado del puente compatible")
+        self.last_seq = 0
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
+    def replaced(self):
+        """
+        Returns:
+            bool: Si otro servidor (por ejemplo, el sucesor de un reinicio en caliente) publico una pagina
+                nueva en path; la mapeada sigue siendo valida pero ya no se actualiza, hay que reabrir
+        """
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except OSError:
+            return False
+
+    @classmethod
+    def open_if_exists(cls, path):
+        """Retorna un lector si el archivo existe y es valido, o None."""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError):
+            return None
+
+    def read(self, retries: int = 100):
+        """
+        Copia el estado actual
+
+        Returns:
+            dict[str, Any] | None: Estado del puente, o None si aun no se publico o no se logro una lectura consistente
+        """
+        body_start = self.HEADER.size
+        body_end = body_start + self.BODY.size + self.max_ids * self.ID_SIZE
+        for _ in range(retries):
+            (seq,) = self.SEQ.unpack_from(self._mm, self.SEQ_OFFSET)
+            if seq == 0:
+                return None
+            if seq & 1:
+                continue # Escritura en curso
+            raw = self._mm[body_start:body_end]
+            (seq_after,) = self.SEQ.unpack_from(self._mm, self.SEQ_OFFSET)
+            if seq_after != seq:
+                continue # Lectura rasgada, reintentar
+            timestamp, direction, occupancy, left_size, right_size, n_ids = self.BODY.unpack_from(raw, 0)
+            ids = []
+            for i in range(min(n_ids, self.max_ids)):
+                start = self.BODY.size + i * self.ID_SIZE
+                ids.append(raw[start:start + self.ID_SIZE].rstrip(b"\0").decode("utf-8", errors="replace"))
+            self.last_seq = seq
+            return {
+                "seq": seq,
+                "timestamp": timestamp,
+                "current_direction": DIRECTIONS_BY_CODE.get(direction, Direccion.NONE).value,
+                "cars_on_bridge_count": occupancy,
+                "cars_on_bridge": ids,
+                "left_traffic_size": left_size,
+                "right_traffic_size": right_size,
+            }
+        return None
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import random
+import threading
+import zlib
+from collections import deque
+from contextlib import contextmanager
+
+
+class Tracer:
+    """
+    Registro de spans para seguir un ciclo de cruce de extremo a extremo entre cliente y servidor.
+    Los eventos se guardan en memoria y se exportan en el formato trace-event de Chrome/Perfetto.
+    """
+    CATEGORY = "puente"
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        max_events: int = 100000,
+        output_path = None
+    ):
+        """
+        Constructor de la clase
+
+        Args:
+            sample_rate (float): Fraccion de ciclos de cruce que se registran (0.0 - 1.0)
+            max_events (int): Cantidad maxima de eventos en memoria (los mas viejos se descartan)
+            output_path: Ruta del archivo JSON donde exportar la traza al cerrar
+        """
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.output_path = output_path
+        self.events = deque(maxlen=max_events)
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, output_path = None):
+        """
+        Construye un Tracer a partir de PUENTE_TRACE_SAMPLE y PUENTE_TRACE_FILE.
+        Sin variables definidas el muestreo queda desactivado.
+
+        Args:
+            output_path: Ruta de exportación en lugar de PUENTE_TRACE_FILE
+        """
+        try:
+            sample_rate = float(os.environ.get("PUENTE_TRACE_SAMPLE", "0"))
+        except ValueError:
+            sample_rate = 0.0
+        return cls(sample_rate=sample_rate, output_path=output_path or os.environ.get("PUENTE_TRACE_FILE"))
+
+    @staticmethod
+    def new_trace_id():
+        """Genera un identificador de correlacion de 64 bits en hexadecimal."""
+        return f"{random.getrandbits(64):016x}"
+
+    def should_sample(self):
+        """Decide si el siguiente ciclo de cruce se registra."""
+        return self.sample_rate > 0.0 and random.random() < self.sample_rate
+
+    def keeps(self, trace_id):
+        """
+        Decide con el sample_rate propio si se registra un ciclo muestreado por otro proceso (el servidor,
+        para los ciclos que el cliente marcó con sampled). Depende solo del trace_id, así que todos los
+        mensajes del ciclo reciben la misma respuesta.
+        """
+        if self.sample_rate <= 0.0:
+            return False
+        if self.sample_rate >= 1.0:
+            return True
+        return zlib.crc32(str(trace_id).encode("utf-8")) / 2**32 < self.sample_rate
+
+    @staticmethod
+    def now_us():
+        # Tiempo de pared en microsegundos para poder combinar trazas de varios procesos del mismo host
+        return time.time_ns() // 1000
+
+    def _add(self, event):
+        event["cat"] = self.CATEGORY
+        event["pid"] = self.pid
+        event["tid"] = threading.get_ident()
+        with self._lock:
+            self.events.append(event)
+
+    def complete(self, name, trace_id, start_us, end_us, **args):
+        """Registra un span ya terminado (evento 'X')."""
+        if trace_id is None:
+            return
+        args["trace_id"] = trace_id
+        self._add({"name": name, "ph": "X", "ts": start_us, "dur": max(0, end_us - start_us), "args": args})
+
+    @contextmanager
+    def span(self, name, trace_id, **args):
+        """Context manager que mide la duracion del bloque y la registra como span."""
+        if trace_id is None:
+            yield
+            return
+        start = self.now_us()
+        try:
+            yield
+        finally:
+            self.complete(name, trace_id, start, self.now_us(), **args)
+
+    def begin(self, name, trace_id, **args):
+        """Abre un span asincrono (evento 'b'), util para esperas que cruzan hilos."""
+        if trace_id is None:
+            return
+        args["trace_id"] = trace_id
+        self._add({"name": name, "ph": "b", "id": trace_id, "ts": self.now_us(), "args": args})
+
+    def end(self, name, trace_id, **args):
+        """Cierra un span asincrono abierto con begin()."""
+        if trace_id is None:
+            return
+        args["trace_id"] = trace_id
+        self._add({"name": name, "ph": "e", "id": trace_id, "ts": self.now_us(), "args": args})
+
+    def instant(self, name, trace_id, **args):
+        """Registra un evento puntual (evento 'i')."""
+        if trace_id is None:
+            return
+        args["trace_id"] = trace_id
+        self._add({"name": name, "ph": "i", "s": "t", "ts": self.now_us(), "args": args})
+
+    def export_chrome_trace(self, path = None):
+        """
+        Escribe los eventos en formato trace-event JSON (abrir con chrome://tracing o ui.perfetto.dev)
+
+        Args:
+            path: Ruta de salida, por defecto output_path
+
+        Returns:
+            int: Cantidad de eventos exportados
+        """
+        path = path or self.output_path
+        if not path:
+            return 0
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
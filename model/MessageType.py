@@ -5,4 +5,9 @@ class MessageType(str, Enum):
     END_CROSS = "CROSSING_COMPLETE"         # Cliente informa que terminó de cruzar
     STATUS_UPDATE = "UPDATE_BRIDGE_STATUS"  # Servidor envía estado del puente a todos
     PERMISSION_GRANTED = "PERMISSION_GRANTED" # Servidor permite cruzar a un coche específico
-    PERMISSION_DENIED = "PERMISSION_DENIED"   # Servidor deniega acceso a un coche específico
\ No newline at end of file
+    PERMISSION_DENIED = "PERMISSION_DENIED"   # Servidor deniega acceso a un coche específico
+    QUEUE_POSITION = "QUEUE_POSITION_UPDATE" # Servidor informa la posición en la cola y el tiempo estimado de espera
+    ADMIN = "ADMIN_COMMAND"                   # Diagnóstico del servidor (estadísticas de bloqueo, perfilado)
+    RESERVE = "RESERVE_CROSSING"             # Cliente reserva su próximo cruce ("no antes de" not_before)
+    HISTORY = "HISTORY_QUERY"                # Consulta del historial por segundo (colas, cruces, cambios, esperas)
+    STATUS_NOT_MODIFIED = "BRIDGE_STATUS_NOT_MODIFIED" # El estado no cambió desde la versión que el cliente ya tiene
\ No newline at end of file
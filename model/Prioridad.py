@@ -0,0 +1,13 @@
+from enum import Enum
+
+class Prioridad(str, Enum):
+    EMERGENCY = "EMERGENCY"  # Ambulancias, bomberos: adelantan a todos y pueden forzar el cambio de dirección
+    SERVICE = "SERVICE"      # Vehículos de servicio: adelantan a los ordinarios
+    NORMAL = "NORMAL"
+
+    @property
+    def rank(self):
+        """Orden de atención: menor es más urgente."""
+        return _RANKS[self]
+
+_RANKS = {Prioridad.EMERGENCY: 0, Prioridad.SERVICE: 1, Prioridad.NORMAL: 2}
@@ -1,4 +1,5 @@
 from model.Direccion import Direccion
+from model.Prioridad import Prioridad
 
 class Vehicle:
     """
@@ -9,7 +10,8 @@ class Vehicle:
         id: str,
         velocidad: float = 0.0,
         tiempo_retraso: float = 0.0,
-        direccion: Direccion = Direccion.NONE
+        direccion: Direccion = Direccion.NONE,
+        prioridad: Prioridad = Prioridad.NORMAL
     ):
         """
         Constructor de la clase
@@ -19,11 +21,13 @@ class Vehicle:
             velocidad (float): Velocidad del vehiculo en el puente 
             tiempo_retraso (float): Tiempo promedio despues de cruzar del vehiculo antes de intentar otro cruce
             direccion (Direccion): Direccion de rumbo inicial del vehiculo
+            prioridad (Prioridad): Clase de prioridad declarada al conectarse
         """
         self.id = id
         self.velocidad = velocidad
         self.tiempo_retraso = tiempo_retraso
         self.direccion = direccion 
+        self.prioridad = prioridad
         
     def cambiar_direccion(self):
         """
@@ -7,6 +7,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from client.client import Client
 from model.Direccion import Direccion
+from common.status_page import StatusPageReader
 
 carro_anim_start_time = 0
 carro_anim_total_time = 1
@@ -28,11 +29,36 @@ carro_id = None
 
 import time
 
+# Si el servidor corre en este mismo equipo con PUENTE_STATUS_PAGE, el estado se lee de memoria compartida
+status_page = None
+status_page_checked = 0.0
+
+def leer_pagina_estado():
+    global status_page, status_page_checked
+    if status_page is not None and time.monotonic() - status_page_checked >= 1.0:
+        status_page_checked = time.monotonic()
+        if status_page.replaced(): # Un servidor nuevo publicó su propia página (reinicio en caliente)
+            status_page.close()
+            status_page = None
+    if status_page is None:
+        status_page = StatusPageReader.open_if_exists(os.environ.get("PUENTE_STATUS_PAGE"))
+        if status_page is None:
+            return False
+    estado = status_page.read()
+    if estado is None:
+        return False
+    bridge_state["ocupado"] = estado["cars_on_bridge_count"] > 0
+    bridge_state["direccion"] = estado["current_direction"]
+    bridge_state["en_puente"] = estado["cars_on_bridge"]
+    bridge_state["cola_izquierda"] = ["?"] * estado["left_traffic_size"]
+    bridge_state["cola_derecha"] = ["?"] * estado["right_traffic_size"]
+    return True
+
 def actualizar_estado_puente():
     global carro_cruzando, carro_dir, carro_id, carro_pos
     global carro_anim_start_time, carro_anim_total_time, carro_anim_in_progress
 
-    if cliente_iniciado and cliente_obj is not None:
+    if not leer_pagina_estado() and cliente_iniciado and cliente_obj is not None:
         cliente_obj.actualizar_estado_puente(bridge_state)
 
     # Solo animar si el carro en el puente es el de este cliente
@@ -89,6 +115,13 @@ cliente_iniciado = False
 cliente_thread = None
 cliente_obj = None
 
+def render_espera():
+    """Posición en la cola y tiempo estimado de este vehículo, según el servidor."""
+    if cliente_obj is None or cliente_obj.eta_segundos is None:
+        return ""
+    restante = max(0.0, cliente_obj.eta_segundos - (time.monotonic() - cliente_obj.eta_recibido))
+    return f"<b>Mi turno:</b> posición {cliente_obj.queue_position}, en ~{restante:.1f} s<br>"
+
 def render_estado():
     html = f"""
     <b>Ocupado:</b> {"Sí" if bridge_state["ocupado"] else "No"}<br>
@@ -96,6 +129,7 @@ def render_estado():
     <b>Vehículos en Puente:</b> {bridge_state["en_puente"]}<br>
     <b>Cola Izquierda:</b> {bridge_state["cola_izquierda"]}<br>
     <b>Cola Derecha:</b> {bridge_state["cola_derecha"]}<br>
+    {render_espera()}
     """
     status_panel.set_text(html)
 
@@ -125,6 +159,46 @@ puente_rect = pygame.Rect(200, 350, 400, 60)  # Más grande y centrado
 carro_size = 40  # Más grande
 carro_speed = 3  # píxeles por frame
 
+# Gráfico de los últimos 10 minutos con el historial que guarda el servidor (puntos de 5 s)
+grafico_rect = pygame.Rect(20, 430, 760, 150)
+HISTORIAL_VENTANA = 600
+HISTORIAL_STEP = 5
+HISTORIAL_INTERVALO = 2.0 # Segundos entre consultas
+historial_consultado = 0.0
+
+def dibujar_historial(surface):
+    """Utilización del puente (barras) y profundidad de cada cola (líneas) según el historial del servidor."""
+    global historial_consultado
+    if cliente_obj is None:
+        return
+    if time.monotonic() - historial_consultado >= HISTORIAL_INTERVALO:
+        historial_consultado = time.monotonic()
+        cliente_obj.consultar_historial(HISTORIAL_VENTANA, HISTORIAL_STEP)
+    historial = cliente_obj.historial
+    pygame.draw.rect(surface, (45, 45, 45), grafico_rect)
+    if not historial or not historial.get("t"):
+        return
+    inicio = time.time() - HISTORIAL_VENTANA
+    ancho = grafico_rect.width * HISTORIAL_STEP / HISTORIAL_VENTANA
+    def x_de(t):
+        return grafico_rect.left + (t - inicio) / HISTORIAL_VENTANA * grafico_rect.width
+    for t, utilizacion in zip(historial["t"], historial["utilization"]):
+        alto = utilizacion * grafico_rect.height
+        pygame.draw.rect(surface, (70, 110, 70), (x_de(t), grafico_rect.bottom - alto, max(1, ancho - 1), alto))
+    maximo = max(max(historial["left_queue"]), max(historial["right_queue"]), 1)
+    for columna, color in (("left_queue", (80, 160, 255)), ("right_queue", (255, 160, 60))):
+        puntos = [
+            (x_de(t + HISTORIAL_STEP / 2), grafico_rect.bottom - valor / maximo * (grafico_rect.height - 4))
+            for t, valor in zip(historial["t"], historial[columna])
+        ]
+        if len(puntos) > 1:
+            pygame.draw.lines(surface, color, False, puntos, 2)
+    font = pygame.font.SysFont(None, 20)
+    cruces = sum(historial["crossings"])
+    cambios = sum(historial["switches"])
+    leyenda = f"Últimos 10 min: utilización (barras), cola izq. (azul) / der. (naranja), máx. {maximo}; {cruces} cruces, {cambios} cambios"
+    surface.blit(font.render(leyenda, True, (220, 220, 220)), (grafico_rect.left + 4, grafico_rect.top + 4))
+
 while is_running:
     time_delta = clock.tick(30) / 1000.0
     for event in pygame.event.get():
@@ -171,6 +245,8 @@ while is_running:
         text = font.render(str(carro_id), True, (255, 255, 255))
         window_surface.blit(text, (carro_pos + 5, puente_rect.top + 10))
 
+    dibujar_historial(window_surface)
+
     pygame.display.update()
 
 if cliente_obj:
@@ -0,0 +1,64 @@
+"""
+Órdenes de diagnóstico para un servidor en ejecución (sin reiniciarlo).
+
+    python server/admin.py lock_stats
+    python server/admin.py profile --seconds 10 > puente.folded   # flamegraph.pl puente.folded > puente.svg
+    python server/admin.py latency        # espera hasta el permiso por clase de prioridad (p50/p95/p99)
+    python server/admin.py reset_stats
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from model.MessageType import MessageType
+from common.framing import LineFramer
+
+
+def admin_request(action, host = "127.0.0.1", port = 7777, **params):
+    """
+    Envía una orden ADMIN_COMMAND y espera su respuesta
+
+    Returns:
+        dict[str, Any]: Respuesta del servidor
+    """
+    message = {'id': 'admin', 'type': MessageType.ADMIN.value, 'action': action}
+    message.update(params)
+    timeout = float(params.get('seconds', 0)) + 30
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall(json.dumps(message).encode('utf-8') + b"\n")
+        framer = LineFramer(max_frame_size=64 * 1024 * 1024) # Las pilas colapsadas pueden ser grandes
+        while framer.recv_into(sock, 65536):
+            for frame in framer.frames():
+                response = json.loads(frame)
+                if response.get('status') in (MessageType.ADMIN.value, MessageType.PERMISSION_DENIED.value):
+                    return response
+    raise ConnectionError("El servidor cerró la conexión sin responder.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=["lock_stats", "reset_stats", "profile", "latency"])
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duración del perfil")
+    parser.add_argument("--interval", type=float, default=0.005, help="Segundos entre muestras del perfil")
+    parser.add_argument("--per-thread", action="store_true", help="Desglose de lock_stats por hilo")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    args = parser.parse_args()
+
+    params = {}
+    if args.action == "profile":
+        params = {'seconds': args.seconds, 'interval': args.interval}
+    elif args.action == "lock_stats":
+        params = {'per_thread': args.per_thread}
+    response = admin_request(args.action, args.host, args.port, **params)
+    if response.get('status') != MessageType.ADMIN.value:
+        sys.exit(f"[ADMIN] {response.get('message')}")
+    data = response.get('data', {})
+    if args.action == "profile":
+        print(data.get('collapsed', ''))
+        print(f"[ADMIN] {data.get('samples')} muestras en {data.get('seconds')}s", file=sys.stderr)
+    else:
+        print(json.dumps(data, indent=2, ensure_ascii=False))
@@ -0,0 +1,209 @@
+"""
+Análisis del registro de eventos del puente (PUENTE_EVENT_LOG) con NumPy.
+
+Carga uno o más archivos generados por server.event_log.EventLog y calcula utilización del puente,
+distribución de esperas (cola -> puente), rendimiento por dirección y costo de los cambios de dirección.
+
+    python server/analytics.py eventos.bin [otro.bin ...] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from server.event_log import EventLog
+from common.status_page import DIRECTIONS_BY_CODE
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def load(path):
+    """
+    Lee un archivo del registro; cada columna del bloque se toma del buffer sin copiar evento por evento
+
+    Returns:
+        dict[str, np.ndarray | dict]: Columnas t (segundos desde el inicio), car, code, direction,
+            y names {handle: car_id} y start_time
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, start_time = EventLog.HEADER.unpack_from(data, 0)
+    if magic != EventLog.MAGIC or version != EventLog.VERSION:
+        raise ValueError(f"{path} no es un registro de eventos del puente.")
+    offset = EventLog.HEADER.size
+    columns = {"t": [], "car": [], "code": [], "direction": []}
+    names = {}
+    while offset + EventLog.CHUNK.size <= len(data):
+        chunk_magic, n, m = EventLog.CHUNK.unpack_from(data, offset)
+        if chunk_magic != EventLog.CHUNK_MAGIC:
+            raise ValueError(f"Bloque corrupto en {path} (byte {offset}).")
+        offset += EventLog.CHUNK.size
+        for _ in range(m):
+            handle, size = EventLog.NAME.unpack_from(data, offset)
+            offset += EventLog.NAME.size
+            names[handle] = data[offset:offset + size].decode("utf-8")
+            offset += size
+        if offset + n * 14 > len(data):
+            break # Último bloque a medio escribir (el servidor sigue corriendo)
+        for key, dtype, width in (("t", "<f8", 8), ("car", "<u4", 4), ("code", "u1", 1), ("direction", "u1", 1)):
+            columns[key].append(np.frombuffer(data, dtype=dtype, count=n, offset=offset))
+            offset += n * width
+    result = {
+        key: np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+        for (key, parts), dtype in zip(columns.items(), ("<f8", "<u4", "u1", "u1"))
+    }
+    result["names"] = names
+    result["start_time"] = start_time
+    return result
+
+
+def _pairs(t, car, code, first, second):
+    """
+    Empareja cada evento first con el siguiente evento del mismo coche entre first, second y
+    DISCONNECT (los demás, como GRANT, se ignoran), si ese evento es second
+
+    Args:
+        second (int | tuple[int]): Código o códigos que cierran el par
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Índices (en el orden original) de cada first y de su second
+    """
+    second = np.atleast_1d(second)
+    rows = np.nonzero(np.isin(code, np.concatenate(([first, EventLog.DISCONNECT], second))))[0]
+    order = rows[np.lexsort((t[rows], car[rows]))] # Por coche y, dentro de cada coche, por tiempo
+    c, k = car[order], code[order]
+    match = (k[:-1] == first) & np.isin(k[1:], second) & (c[:-1] == c[1:])
+    idx = np.nonzero(match)[0]
+    return order[idx], order[idx + 1]
+
+
+def _distribution(values):
+    if values.size == 0:
+        return {"count": 0}
+    result = {"count": int(values.size), "mean": round(float(values.mean()), 3), "max": round(float(values.max()), 3)}
+    for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        result[f"p{p}"] = round(float(value), 3)
+    return result
+
+
+def analyze(log):
+    """
+    Métricas del registro cargado con load()
+
+    Returns:
+        dict[str, Any]: utilization, waits (global y por dirección), throughput por dirección y switches
+    """
+    t, car, code, direction = log["t"], log["car"], log["code"], log["direction"]
+    if t.size == 0:
+        return {"events": 0}
+    span = float(t.max() - t.min()) or 1.0
+    minutes = span / 60.0
+
+    # Utilización: tiempo con un coche en el puente (ENTER -> primer EXIT o DISCONNECT del mismo coche).
+    # El servidor deja pasar un coche a la vez, así que los intervalos no se superponen y basta sumarlos
+    entered_at, left_at = _pairs(t, car, code, EventLog.ENTER, (EventLog.EXIT, EventLog.DISCONNECT))
+    busy_time = float((t[left_at] - t[entered_at]).sum())
+
+    # Espera: de entrar a la cola a entrar al puente
+    queued, entered = _pairs(t, car, code, EventLog.ENQUEUE, EventLog.ENTER)
+    waits = t[entered] - t[queued]
+    wait_direction = direction[queued]
+
+    # Rendimiento: salidas por minuto en cada dirección
+    exits = direction[code == EventLog.EXIT]
+    counts = np.bincount(exits, minlength=3)
+
+    # Cambios de dirección: hueco entre una salida y la siguiente entrada, con y sin cambio
+    flow = np.nonzero((code == EventLog.ENTER) | (code == EventLog.EXIT))[0]
+    flow = flow[np.argsort(t[flow], kind="stable")]
+    gap = (code[flow[:-1]] == EventLog.EXIT) & (code[flow[1:]] == EventLog.ENTER)
+    before, after = flow[:-1][gap], flow[1:][gap]
+    gaps = t[after] - t[before]
+    switched = direction[before] != direction[after]
+    switch_gaps, same_gaps = gaps[switched], gaps[~switched]
+    baseline = float(np.median(same_gaps)) if same_gaps.size else 0.0
+    switches = int((code == EventLog.SWITCH).sum())
+
+    return {
+        "events": int(t.size),
+        "span_s": round(span, 3),
+        "cars": int(np.unique(car[car != EventLog.NO_CAR]).size),
+        "utilization": round(min(1.0, busy_time / span), 4),
+        "waits": _distribution(waits),
+        "waits_by_direction": {
+            DIRECTIONS_BY_CODE[d].value: _distribution(waits[wait_direction == d]) for d in (1, 2)
+        },
+        "throughput_per_min": {
+            DIRECTIONS_BY_CODE[d].value: round(float(counts[d]) / minutes, 3) for d in (1, 2)
+        },
+        "switches": {
+            "count": switches,
+            "per_min": round(switches / minutes, 3),
+            "gap_with_switch": _distribution(switch_gaps),
+            "gap_same_direction": _distribution(same_gaps),
+            # Tiempo de puente vacío atribuible a los cambios (por encima del hueco típico sin cambio)
+            "overhead_s": round(float(np.clip(switch_gaps - baseline, 0, None).sum()), 3),
+        },
+    }
+
+
+def load_all(paths):
+    """
+    Concatena varios registros (por ejemplo, los de cada proceso de un reinicio en caliente); los instantes
+    de cada uno se alinean por su hora de inicio y los coches se identifican por su car_id en todos
+    """
+    logs = [load(path) for path in paths]
+    if len(logs) == 1:
+        return logs[0]
+    origin = min(log["start_time"] for log in logs)
+    merged = {"names": {}, "start_time": origin}
+    # Los handles son locales a cada archivo: se traducen a uno común por car_id
+    handles = {}
+    cars = []
+    for log in logs:
+        lookup = np.full(max(log["names"], default=0) + 1, EventLog.NO_CAR, dtype="<u4")
+        for handle, name in log["names"].items():
+            lookup[handle] = handles.setdefault(name, len(handles))
+        car = log["car"]
+        valid = (car != EventLog.NO_CAR) & (car < lookup.size)
+        cars.append(np.where(valid, lookup[np.where(valid, car, 0)], EventLog.NO_CAR).astype("<u4"))
+    merged["names"] = {handle: name for name, handle in handles.items()}
+    merged["t"] = np.concatenate([log["t"] + (log["start_time"] - origin) for log in logs])
+    merged["car"] = np.concatenate(cars)
+    merged["code"] = np.concatenate([log["code"] for log in logs])
+    merged["direction"] = np.concatenate([log["direction"] for log in logs])
+    return merged
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="Archivos generados con PUENTE_EVENT_LOG")
+    parser.add_argument("--json", action="store_true", help="Salida completa en JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    log = load_all(args.paths)
+    loaded = time.perf_counter()
+    report = analyze(log)
+    done = time.perf_counter()
+    report["load_ms"] = round((loaded - start) * 1000, 1)
+    report["analyze_ms"] = round((done - loaded) * 1000, 1)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        sys.exit(0)
+    print(f"[ANALISIS] {report['events']} eventos de {report.get('cars', 0)} coches en {report.get('span_s', 0)} s "
+          f"(carga {report['load_ms']} ms, análisis {report['analyze_ms']} ms)")
+    if report["events"]:
+        waits = report["waits"]
+        print(f"[ANALISIS] Utilización del puente: {report['utilization'] * 100:.1f}%")
+        print(f"[ANALISIS] Espera cola -> puente: {waits['count']} cruces, p50 {waits.get('p50')}s, p95 {waits.get('p95')}s, p99 {waits.get('p99')}s, máx {waits.get('max')}s")
+        for direction, rate in report["throughput_per_min"].items():
+            print(f"[ANALISIS] {direction}: {rate} cruces/min, p95 espera {report['waits_by_direction'][direction].get('p95')}s")
+        switches = report["switches"]
+        print(f"[ANALISIS] Cambios de dirección: {switches['count']} ({switches['per_min']}/min), "
+              f"hueco medio con cambio {switches['gap_with_switch'].get('mean', '-')}s vs {switches['gap_same_direction'].get('mean', '-')}s sin cambio, "
+              f"costo total {switches['overhead_s']}s")
@@ -0,0 +1,308 @@
+"""
+Autoajuste de la política del planificador mediante simulación.
+
+Toma un perfil de tráfico (JSON, captura de PUENTE_CAPTURE_FILE o sintético), simula muchas
+combinaciones de batch_size / max_wait / hysteresis / lookahead en paralelo y guarda la que maximiza el
+rendimiento (cruces por minuto) respetando un límite de equidad sobre el percentil 95 de espera. Todas las
+configuraciones se simulan con las mismas semillas y los mismos cruces y retrasos por coche; diferencias de
+rendimiento dentro de --throughput-tolerance cuentan como empate y las decide la espera p95.
+
+    python server/autotune.py --synthetic 8,4 --output politica.json
+    python server/autotune.py --capture captura.bin --max-p95-wait 20 --output politica.json
+    python server/autotune.py --synthetic 8,4 --event-log eventos.bin --output politica.json
+    PUENTE_SCHEDULER_POLICY=politica.json python server/server.py
+
+El servidor deja pasar un coche a la vez y cambiar de dirección no le agrega tiempo, así que por defecto
+switch_cost es 0: sin costo de cambio, alternar y agrupar rinden lo mismo y la búsqueda se decide por la
+espera p95. Con --event-log se mide el costo real de cada cambio en registros de PUENTE_EVENT_LOG
+(server/analytics.py, switches.overhead_s) y el orden de las políticas pasa a depender de ese valor.
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from model.Direccion import Direccion
+from model.MessageType import MessageType
+from server.scheduler_policy import SchedulerPolicy
+from server.capture import TrafficCapture
+
+BATCH_SIZES = (1, 2, 3, 4, 6, 8)
+MAX_WAITS = (None, 5.0, 10.0, 20.0, 40.0)
+HYSTERESIS = (1, 2, 3, 4)
+LOOKAHEADS = (0.0, 2.0, 5.0)
+THROUGHPUT_TOLERANCE = 0.02 # Diferencia relativa de cruces/min que se considera empate
+
+
+def _opposite(direction: Direccion):
+    return Direccion.RIGHT if direction == Direccion.LEFT else Direccion.LEFT
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def simulate(policy: SchedulerPolicy, profile, seed, duration):
+    """
+    Simulación de eventos discretos del puente con un solo coche a la vez, como el servidor.
+    Cada coche cruza durante uniform(1, velocidad), espera uniform(1, tiempo_retraso) y vuelve
+    a pedir paso en la dirección contraria, igual que Client.cruzar; ese regreso queda reservado
+    desde que sale del puente, como con Client.reservar_regreso.
+
+    Cada coche sortea con su propio generador (semilla, índice del coche): con la misma semilla, el
+    n-ésimo cruce y el n-ésimo retraso de cada coche son iguales para todas las políticas, así que las
+    diferencias entre políticas se deben a sus decisiones y no al orden en que se consumió el azar.
+
+    Args:
+        policy (SchedulerPolicy): Política a evaluar
+        profile (dict): {"cars": [{velocidad, tiempo_retraso, direccion}], "switch_cost", "grant_overhead"}
+        seed (int): Semilla del generador aleatorio
+        duration (float): Segundos simulados
+
+    Returns:
+        dict[str, float]: Métricas de la corrida
+    """
+    cars = profile["cars"]
+    rngs = [random.Random(seed * 1_000_003 + i) for i in range(len(cars))]
+    switch_cost = profile.get("switch_cost", 0.0)
+    grant_overhead = profile.get("grant_overhead", 0.1)
+    counter = itertools.count()
+
+    arrivals = []
+    for i, car in enumerate(cars):
+        heapq.heappush(arrivals, (rngs[i].uniform(0, 1.0), next(counter), i, Direccion(car["direccion"]), False))
+    queues = {Direccion.LEFT: deque(), Direccion.RIGHT: deque()}
+    now = 0.0
+    current = Direccion.NONE
+    streak = 0
+    waits = []
+    busy = 0.0
+    switches = 0
+
+    while now < duration:
+        while arrivals and arrivals[0][0] <= now:
+            arrived_at, _, i, direction, _ = heapq.heappop(arrivals)
+            queues[direction].append((i, arrived_at))
+        left, right = queues[Direccion.LEFT], queues[Direccion.RIGHT]
+        if not left and not right:
+            if not arrivals:
+                break
+            current, streak = Direccion.NONE, 0 # Igual que next_car cuando no hay nadie esperando
+            now = arrivals[0][0]
+            continue
+        upcoming = {Direccion.LEFT: 0, Direccion.RIGHT: 0}
+        if policy.lookahead:
+            horizon = now + policy.lookahead
+            for at, _, _, arrival_direction, reserved in arrivals:
+                if reserved and at <= horizon:
+                    upcoming[arrival_direction] += 1
+        direction = policy.choose(
+            current,
+            streak,
+            len(left),
+            len(right),
+            now - left[0][1] if left else 0.0,
+            now - right[0][1] if right else 0.0,
+            upcoming[Direccion.LEFT],
+            upcoming[Direccion.RIGHT]
+        )
+        i, arrived_at = queues[direction].popleft()
+        start = now + grant_overhead
+        if current not in (Direccion.NONE, direction):
+            start += switch_cost
+            switches += 1
+        streak = streak + 1 if direction == current else 1
+        current = direction
+        crossing = rngs[i].uniform(1, max(1.0, cars[i]["velocidad"]))
+        waits.append(start - arrived_at)
+        busy += crossing
+        now = start + crossing
+        delay = rngs[i].uniform(1, max(1.0, cars[i]["tiempo_retraso"]))
+        heapq.heappush(arrivals, (now + delay, next(counter), i, _opposite(direction), True))
+
+    elapsed = min(now, duration) or 1.0
+    return {
+        "crossings_per_min": 60.0 * len(waits) / elapsed,
+        "p50_wait": _percentile(waits, 0.50),
+        "p95_wait": _percentile(waits, 0.95),
+        "max_wait": max(waits) if waits else 0.0,
+        "switches_per_min": 60.0 * switches / elapsed,
+        "utilization": min(1.0, busy / elapsed),
+    }
+
+
+def _evaluate(args):
+    """
+    Corre varias semillas de una configuración y promedia (se ejecuta en el pool de procesos).
+    crossings_per_min_se es el error estándar del rendimiento entre semillas.
+    """
+    params, profile, seeds, duration = args
+    policy = SchedulerPolicy.from_dict(params)
+    runs = [simulate(policy, profile, seed, duration) for seed in range(seeds)]
+    metrics = {key: sum(run[key] for run in runs) / len(runs) for key in runs[0]}
+    metrics["max_wait"] = max(run["max_wait"] for run in runs)
+    throughputs = [run["crossings_per_min"] for run in runs]
+    metrics["crossings_per_min_se"] = statistics.stdev(throughputs) / len(runs) ** 0.5 if len(runs) > 1 else 0.0
+    return params, metrics
+
+
+def search(profile, seeds = 4, duration = 600.0, max_p95_wait = 30.0, workers = None, throughput_tolerance = THROUGHPUT_TOLERANCE):
+    """
+    Evalúa la grilla de parámetros en paralelo. Entre las configuraciones factibles, las que quedan a menos
+    de la tolerancia del mejor rendimiento (relativa, o dos errores estándar de ese mejor si es mayor)
+    empatan, y gana la de menor p95; si no hay factibles, la de menor p95
+
+    Returns:
+        tuple[dict, dict, list]: Mejor política, sus métricas y todos los resultados
+    """
+    grid = [
+        {"batch_size": b, "max_wait": w, "hysteresis": h, "lookahead": l}
+        for b, w, h, l in itertools.product(BATCH_SIZES, MAX_WAITS, HYSTERESIS, LOOKAHEADS)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_evaluate, [(params, profile, seeds, duration) for params in grid], chunksize=4))
+
+    def by_wait(item):
+        return (item[1]["p95_wait"], -item[1]["crossings_per_min"])
+
+    feasible = [item for item in results if item[1]["p95_wait"] <= max_p95_wait]
+    if not feasible:
+        best_params, best_metrics = min(results, key=by_wait)
+        return best_params, best_metrics, results
+    _, top = max(feasible, key=lambda item: item[1]["crossings_per_min"])
+    # El ruido de muestreo no decide: lo que queda dentro de la tolerancia se ordena por espera p95
+    tolerance = max(throughput_tolerance * top["crossings_per_min"], 2 * top["crossings_per_min_se"])
+    tied = [item for item in feasible if item[1]["crossings_per_min"] >= top["crossings_per_min"] - tolerance]
+    best_params, best_metrics = min(tied, key=by_wait)
+    return best_params, best_metrics, results
+
+
+def synthetic_profile(left, right, velocidad = 5.0, tiempo_retraso = 3.0, seed = 0):
+    """Perfil con left coches que empiezan a la izquierda y right a la derecha, con parámetros variados."""
+    rng = random.Random(seed)
+    cars = []
+    for direction, count in ((Direccion.LEFT, left), (Direccion.RIGHT, right)):
+        for _ in range(count):
+            cars.append({
+                "velocidad": rng.uniform(1.5, velocidad),
+                "tiempo_retraso": rng.uniform(1.5, tiempo_retraso),
+                "direccion": direction.value
+            })
+    return {"cars": cars}
+
+
+def profile_from_capture(path):
+    """
+    Deriva un perfil de una captura: por coche, dirección inicial, duración media de cruce
+    (último REQUEST -> END_CROSS) y retraso medio (END_CROSS -> siguiente REQUEST).
+    Como el cliente sortea uniform(1, x), x se estima como 2 * media - 1.
+    """
+    _, records = TrafficCapture.read(path)
+    first_direction = {}
+    last_request, last_exit = {}, {}
+    crossings, delays = defaultdict(list), defaultdict(list)
+    for record in records:
+        if record.kind != TrafficCapture.MESSAGE:
+            continue
+        try:
+            message = json.loads(record.payload)
+        except ValueError:
+            continue
+        car_id, msg_type = message.get("id"), message.get("type")
+        if not car_id:
+            continue
+        if msg_type == MessageType.REQUEST.value:
+            first_direction.setdefault(car_id, message.get("direction", Direccion.LEFT.value))
+            if car_id in last_exit:
+                delays[car_id].append(record.timestamp - last_exit.pop(car_id))
+            last_request[car_id] = record.timestamp
+        elif msg_type == MessageType.END_CROSS.value and car_id in last_request:
+            crossings[car_id].append(record.timestamp - last_request.pop(car_id))
+            last_exit[car_id] = record.timestamp
+
+    def uniform_upper(values, default):
+        return max(1.0, 2 * sum(values) / len(values) - 1) if values else default
+
+    return {"cars": [
+        {
+            "id": car_id,
+            "velocidad": uniform_upper(crossings[car_id], 3.0),
+            "tiempo_retraso": uniform_upper(delays[car_id], 3.0),
+            "direccion": direction
+        }
+        for car_id, direction in first_direction.items()
+    ]}
+
+
+def switch_cost_from_event_log(paths):
+    """
+    Costo medio de un cambio de dirección medido en registros de PUENTE_EVENT_LOG: tiempo de puente
+    vacío por encima del hueco típico sin cambio (switches.overhead_s de server/analytics.py) por cambio
+
+    Returns:
+        float | None: Segundos por cambio, o None si los registros no tienen cambios de dirección
+    """
+    from server import analytics # NumPy solo hace falta con --event-log
+    switches = analytics.analyze(analytics.load_all(paths)).get("switches")
+    if not switches or not switches["gap_with_switch"]["count"]:
+        return None
+    return switches["overhead_s"] / switches["gap_with_switch"]["count"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--profile", help="JSON con {'cars': [{velocidad, tiempo_retraso, direccion}, ...]}")
+    source.add_argument("--capture", help="Captura generada con PUENTE_CAPTURE_FILE")
+    source.add_argument("--synthetic", help="'izq,der': cantidad de coches que empiezan en cada lado")
+    parser.add_argument("--switch-cost", type=float, default=0.0, help="Segundos perdidos al cambiar de dirección (el servidor no agrega ninguno)")
+    parser.add_argument("--event-log", nargs="+", help="Registros de PUENTE_EVENT_LOG de los que se mide el costo de cambio")
+    parser.add_argument("--duration", type=float, default=600.0, help="Segundos simulados por corrida")
+    parser.add_argument("--seeds", type=int, default=4, help="Corridas por configuración")
+    parser.add_argument("--max-p95-wait", type=float, default=30.0, help="Límite de equidad: p95 de espera en segundos")
+    parser.add_argument("--throughput-tolerance", type=float, default=THROUGHPUT_TOLERANCE, help="Diferencia relativa de cruces/min que cuenta como empate (la decide el p95)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="politica.json")
+    args = parser.parse_args()
+
+    if args.profile:
+        with open(args.profile, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    elif args.capture:
+        profile = profile_from_capture(args.capture)
+    else:
+        left, right = (int(x) for x in args.synthetic.split(","))
+        profile = synthetic_profile(left, right)
+    if not profile["cars"]:
+        sys.exit("[AUTOTUNE] El perfil no tiene coches.")
+    if args.event_log:
+        measured = switch_cost_from_event_log(args.event_log)
+        if measured is None:
+            print("[AUTOTUNE] Los registros no tienen cambios de dirección; se usa --switch-cost.")
+        else:
+            profile["switch_cost"] = measured
+    profile.setdefault("switch_cost", args.switch_cost)
+    print(f"[AUTOTUNE] Costo por cambio de dirección: {profile['switch_cost']:.3f}s")
+    if not profile["switch_cost"]:
+        print("[AUTOTUNE] Sin costo de cambio, agrupar no aumenta el rendimiento: el orden lo decide la espera p95.")
+
+    baseline = _evaluate((SchedulerPolicy().to_dict(), profile, args.seeds, args.duration))[1]
+    best_params, best_metrics, results = search(profile, args.seeds, args.duration, args.max_p95_wait, args.workers, args.throughput_tolerance)
+    print(f"[AUTOTUNE] {len(results)} configuraciones x {args.seeds} corridas de {args.duration:.0f}s ({len(profile['cars'])} coches)")
+    print(f"[AUTOTUNE] Actual   {SchedulerPolicy()}: {baseline['crossings_per_min']:.2f} cruces/min, p95 espera {baseline['p95_wait']:.1f}s")
+    print(f"[AUTOTUNE] Mejor    {SchedulerPolicy.from_dict(best_params)}: {best_metrics['crossings_per_min']:.2f} cruces/min, p95 espera {best_metrics['p95_wait']:.1f}s")
+    if best_metrics["p95_wait"] > args.max_p95_wait:
+        print(f"[AUTOTUNE] Ninguna configuración cumple p95 <= {args.max_p95_wait}s; se guarda la de menor incumplimiento.")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"policy": best_params, "metrics": best_metrics, "baseline": baseline}, f, indent=2)
+    print(f"[AUTOTUNE] Guardado en {args.output}")
@@ -0,0 +1,108 @@
+import struct
+import threading
+import time
+
+
+class CaptureRecord:
+    """
+    Un evento del flujo de entrada capturado en el servidor
+    """
+    __slots__ = ("timestamp", "conn_id", "kind", "payload")
+
+    def __init__(self, timestamp, conn_id, kind, payload = b""):
+        """
+        Args:
+            timestamp (float): Segundos desde el inicio de la captura
+            conn_id (int): Identificador de la conexion dentro de la captura
+            kind (int): TrafficCapture.OPEN, MESSAGE o CLOSE
+            payload (bytes): Trama recibida (solo para MESSAGE), sin el salto de linea final
+        """
+        self.timestamp = timestamp
+        self.conn_id = conn_id
+        self.kind = kind
+        self.payload = payload
+
+
+class TrafficCapture:
+    """
+    Graba el flujo de mensajes que recibe el servidor en un archivo binario compacto.
+
+    Formato: cabecera MAGIC + inicio (float64 epoch) y luego registros
+    <float64 offset><uint32 conn_id><uint8 kind><uint32 largo><payload>.
+    El payload es la trama JSON tal cual llego, por lo que conserva car_id, tipo y timestamp del cliente.
+    """
+    MAGIC = b"PUENTECAP1"
+    HEADER = struct.Struct("<d")
+    RECORD = struct.Struct("<dIBI")
+
+    OPEN = 0
+    MESSAGE = 1
+    CLOSE = 2
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Ruta del archivo de captura (se sobrescribe)
+        """
+        self.path = path
+        self.start_time = time.time()
+        self._start_perf = time.perf_counter()
+        self._file = open(path, "wb")
+        self._file.write(self.MAGIC + self.HEADER.pack(self.start_time))
+        self._lock = threading.Lock()
+        self._next_conn_id = 0
+        self.records = 0
+
+    def connection_opened(self):
+        """Registra una conexion nueva y retorna su identificador dentro de la captura."""
+        with self._lock:
+            conn_id = self._next_conn_id
+            self._next_conn_id += 1
+        self._write(conn_id, self.OPEN, b"")
+        return conn_id
+
+    def record(self, conn_id, payload):
+        """Registra una trama completa recibida en la conexion conn_id."""
+        self._write(conn_id, self.MESSAGE, bytes(payload))
+
+    def connection_closed(self, conn_id):
+        self._write(conn_id, self.CLOSE, b"")
+
+    def _write(self, conn_id, kind, payload):
+        offset = time.perf_counter() - self._start_perf
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(self.RECORD.pack(offset, conn_id, kind, len(payload)))
+            self._file.write(payload)
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    @classmethod
+    def read(cls, path):
+        """
+        Lee un archivo de captura
+
+        Returns:
+            tuple[float, list[CaptureRecord]]: Epoch de inicio y registros en orden de llegada
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(cls.MAGIC):
+            raise ValueError(f"{path} no es un archivo de captura del puente")
+        pos = len(cls.MAGIC)
+        (start_time,) = cls.HEADER.unpack_from(data, pos)
+        pos += cls.HEADER.size
+        records = []
+        while pos + cls.RECORD.size <= len(data):
+            offset, conn_id, kind, length = cls.RECORD.unpack_from(data, pos)
+            pos += cls.RECORD.size
+            if pos + length > len(data):
+                break # Registro truncado (servidor terminado a mitad de escritura)
+            records.append(CaptureRecord(offset, conn_id, kind, data[pos:pos + length]))
+            pos += length
+        return start_time, records
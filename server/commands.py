@@ -0,0 +1,59 @@
+import threading
+from enum import Enum
+
+from common.tracing import Tracer
+
+
+class CommandKind(str, Enum):
+    REGISTER = "REGISTER"       # Asociar un car_id con el socket de su conexion
+    REQUEST = "REQUEST"         # Solicitud de acceso: concede el paso o encola
+    EXIT = "EXIT"               # El coche informa que termino de cruzar
+    DISCONNECT = "DISCONNECT"   # La conexion del coche se cerro
+    RESERVE = "RESERVE"         # Reserva anticipada del proximo cruce
+    HANDOFF = "HANDOFF"         # Congela el nucleo y exporta el estado para el proceso sucesor
+    HISTORY = "HISTORY"         # Consulta del historial por segundo (UtilizationHistory)
+
+
+class Command:
+    """
+    Orden enviada por un hilo de conexion al nucleo del puente.
+    El hilo que la envia espera con wait() a que el nucleo la aplique.
+    """
+    __slots__ = ("kind", "car_id", "direction", "client_socket", "message", "submitted_us", "result", "_done")
+
+    def __init__(
+        self,
+        kind: CommandKind,
+        car_id = None,
+        direction = None,
+        client_socket = None,
+        message = None
+    ):
+        """
+        Args:
+            kind (CommandKind): Tipo de orden
+            car_id: Vehiculo al que se refiere la orden
+            direction (Direccion): Direccion solicitada (REQUEST, END_CROSS y RESERVE)
+            client_socket (socket): Conexion por la que responder
+            message (dict): Mensaje original del cliente, si lo hay
+        """
+        self.kind = kind
+        self.car_id = car_id
+        self.direction = direction
+        self.client_socket = client_socket
+        self.message = message
+        self.submitted_us = Tracer.now_us()
+        self.result = None
+        self._done = threading.Event()
+
+    def complete(self, result = None):
+        self.result = result
+        self._done.set()
+
+    def wait(self, timeout = None):
+        """
+        Returns:
+            Any: El resultado de la orden, o None si no se aplico dentro del timeout
+        """
+        self._done.wait(timeout)
+        return self.result
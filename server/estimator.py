@@ -0,0 +1,162 @@
+import time
+from collections import OrderedDict
+
+from model.Direccion import Direccion
+from model.Prioridad import Prioridad
+
+
+class CrossingEstimator:
+    """
+    Estimaciones del tiempo de cruce (permiso -> END_CROSS) con medias moviles exponenciales (EWMA)
+    por vehiculo y por direccion, y del tiempo de espera de un coche encolado.
+    """
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        default_crossing: float = 3.0,
+        grant_overhead: float = 0.1,
+        max_vehicles: int = 4096
+    ):
+        """
+        Constructor de la clase
+
+        Args:
+            alpha (float): Peso de la ultima observacion en la EWMA
+            default_crossing (float): Tiempo de cruce supuesto sin observaciones
+            grant_overhead (float): Costo fijo por cada permiso (planificador + ida y vuelta del REQUEST)
+            max_vehicles (int): Vehiculos con media propia que se conservan (se descarta el usado hace mas tiempo)
+        """
+        self.alpha = alpha
+        self.default_crossing = default_crossing
+        self.grant_overhead = grant_overhead
+        self.max_vehicles = max_vehicles
+        self.by_vehicle = OrderedDict() # {car_id: EWMA del cruce}, del menos al mas reciente
+        self.by_direction = {}          # {Direccion: EWMA del cruce}
+        self.cycle_by_direction = {}    # {Direccion: EWMA de REQUEST -> END_CROSS}
+        self._requested_at = {}         # {car_id: primer REQUEST del ciclo actual}
+        self._granted_at = {}           # {car_id: (instante del permiso, Direccion)}
+
+    def _update(self, table, key, value):
+        previous = table.get(key)
+        table[key] = value if previous is None else previous + self.alpha * (value - previous)
+
+    def record_request(self, car_id):
+        """Marca el inicio del ciclo (solo el primer REQUEST cuenta)."""
+        self._requested_at.setdefault(car_id, time.monotonic())
+
+    def record_grant(self, car_id, direction: Direccion):
+        self._granted_at[car_id] = (time.monotonic(), direction)
+
+    def record_exit(self, car_id):
+        """Registra el END_CROSS y actualiza las medias."""
+        now = time.monotonic()
+        granted = self._granted_at.pop(car_id, None)
+        requested = self._requested_at.pop(car_id, None)
+        if granted is None:
+            return
+        granted_at, direction = granted
+        self._update(self.by_vehicle, car_id, now - granted_at)
+        self.by_vehicle.move_to_end(car_id)
+        while len(self.by_vehicle) > self.max_vehicles:
+            self.by_vehicle.popitem(last=False)
+        self._update(self.by_direction, direction, now - granted_at)
+        if requested is not None:
+            self._update(self.cycle_by_direction, direction, now - requested)
+
+    def export(self):
+        """
+        Returns:
+            dict[str, list]: Medias y mediciones en curso serializables (time.monotonic es comun a todo el sistema)
+        """
+        return {
+            "by_vehicle": list(self.by_vehicle.items()),
+            "by_direction": [(d.value, v) for d, v in self.by_direction.items()],
+            "cycle_by_direction": [(d.value, v) for d, v in self.cycle_by_direction.items()],
+            "requested_at": list(self._requested_at.items()),
+            "granted_at": [(car_id, t, d.value) for car_id, (t, d) in self._granted_at.items()],
+        }
+
+    def restore(self, data):
+        """Carga lo generado por export() en otro proceso."""
+        self.by_vehicle = OrderedDict((car_id, v) for car_id, v in data.get("by_vehicle", [])[-self.max_vehicles:])
+        self.by_direction = {Direccion(d): v for d, v in data.get("by_direction", [])}
+        self.cycle_by_direction = {Direccion(d): v for d, v in data.get("cycle_by_direction", [])}
+        self._requested_at = dict((car_id, t) for car_id, t in data.get("requested_at", []))
+        self._granted_at = {car_id: (t, Direccion(d)) for car_id, t, d in data.get("granted_at", [])}
+
+    def forget(self, car_id):
+        """Descarta las mediciones en curso de un coche desconectado (conserva su historial)."""
+        self._requested_at.pop(car_id, None)
+        self._granted_at.pop(car_id, None)
+
+    def crossing_time(self, car_id, direction: Direccion = Direccion.NONE):
+        """Tiempo de cruce esperado: del vehiculo, si no de su direccion, si no el valor por defecto."""
+        estimate = self.by_vehicle.get(car_id)
+        if estimate is None:
+            estimate = self.by_direction.get(direction, self.default_crossing)
+        return estimate
+
+    def remaining_on_bridge(self, car_ids):
+        """Tiempo estimado hasta que salgan los coches que estan cruzando."""
+        now = time.monotonic()
+        remaining = 0.0
+        for car_id in car_ids:
+            granted = self._granted_at.get(car_id)
+            if granted is None:
+                continue
+            granted_at, direction = granted
+            remaining = max(remaining, self.crossing_time(car_id, direction) - (now - granted_at))
+        return remaining
+
+    def estimate_waits(self, left, right, current_direction: Direccion, streak, policy, on_bridge, expected = None, until = None, now = None):
+        """
+        Estima la posicion y el tiempo hasta el permiso de los coches encolados repitiendo, en una sola
+        pasada, las decisiones que tomaria la politica del planificador (lotes, histeresis, max_wait y
+        emergencias) sobre las colas actuales.
+
+        Args:
+            left (list[tuple]): PriorityTrafficQueue.entries() de la izquierda (car_id, Prioridad, llegada), en orden
+            right (list[tuple]): Lo mismo para la derecha
+            current_direction (Direccion): Direccion del ultimo permiso
+            streak (int): Permisos seguidos en current_direction
+            policy (SchedulerPolicy): Politica activa del servidor
+            on_bridge (list): Coches cruzando
+            expected: Coche notificado que todavia no entro al puente (cruza antes que los encolados)
+            until: Si se indica, la simulacion termina al llegar a este coche
+            now (float): Instante (time.monotonic) de referencia
+
+        Returns:
+            dict[Any, tuple[int, float]]: {car_id: (posicion en su cola, 1 = siguiente de su lado; segundos estimados)}
+        """
+        now = time.monotonic() if now is None else now
+        queues = {Direccion.LEFT: left, Direccion.RIGHT: right}
+        served = {Direccion.LEFT: 0, Direccion.RIGHT: 0}
+        eta = self.remaining_on_bridge(on_bridge)
+        if expected is not None:
+            eta += self.grant_overhead + self.crossing_time(expected, current_direction)
+        direction = current_direction
+        estimates = {}
+        while served[Direccion.LEFT] < len(left) or served[Direccion.RIGHT] < len(right):
+            heads = {d: queues[d][served[d]] if served[d] < len(queues[d]) else None for d in queues}
+            choice = policy.choose(
+                direction,
+                streak,
+                len(left) - served[Direccion.LEFT],
+                len(right) - served[Direccion.RIGHT],
+                now + eta - heads[Direccion.LEFT][2] if heads[Direccion.LEFT] else 0.0,
+                now + eta - heads[Direccion.RIGHT][2] if heads[Direccion.RIGHT] else 0.0,
+                left_urgent=heads[Direccion.LEFT] is not None and heads[Direccion.LEFT][1] == Prioridad.EMERGENCY,
+                right_urgent=heads[Direccion.RIGHT] is not None and heads[Direccion.RIGHT][1] == Prioridad.EMERGENCY
+            )
+            if choice == Direccion.NONE:
+                break
+            car_id = heads[choice][0]
+            streak = streak + 1 if choice == direction else 1
+            direction = choice
+            served[choice] += 1
+            eta += self.grant_overhead
+            estimates[car_id] = (served[choice], eta)
+            if car_id == until:
+                break
+            eta += self.crossing_time(car_id, choice)
+        return estimates
@@ -0,0 +1,118 @@
+import struct
+import sys
+import time
+from array import array
+
+from model.Direccion import Direccion
+from common.status_page import DIRECTION_CODES
+
+
+class EventLog:
+    """
+    Registro columnar de los eventos del puente: cada columna es un array tipado
+    (instante, coche, evento, direccion) que se vuelca por bloques a un archivo binario.
+
+    Lo escribe solo el nucleo del puente, asi que no necesita bloqueo. Los coches se guardan
+    como handles enteros; cada bloque incluye los nombres nuevos desde el bloque anterior.
+
+    Formato (little-endian):
+        cabecera:  MAGIC, version (u16), inicio (f64, segundos epoch)
+        bloque:    CHUNK_MAGIC, eventos n (u32), nombres m (u32)
+                   m x [handle (u32), largo (u16), car_id utf-8]
+                   n x f64 instante (segundos desde el inicio)
+                   n x u32 handle, n x u8 evento, n x u8 direccion
+    """
+    MAGIC = b"PTEL"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHd")
+    CHUNK_MAGIC = b"CHNK"
+    CHUNK = struct.Struct("<4sII")
+    NAME = struct.Struct("<IH")
+
+    ENQUEUE = 0     # Entra a la cola de su direccion
+    GRANT = 1       # El planificador le da el turno (o pasa sin hacer cola)
+    ENTER = 2       # Entra al puente
+    EXIT = 3        # Sale del puente (END_CROSS)
+    DISCONNECT = 4  # Se desconecta
+    SWITCH = 5      # El puente cambia de direccion
+    NAMES = {ENQUEUE: "enqueue", GRANT: "grant", ENTER: "enter", EXIT: "exit", DISCONNECT: "disconnect", SWITCH: "switch"}
+
+    NO_CAR = 0xFFFFFFFF # Handle de los eventos que no son de un coche (SWITCH)
+
+    def __init__(self, path, flush_interval: float = 1.0, max_buffered: int = 65536):
+        """
+        Args:
+            path: Archivo de salida (se sobrescribe)
+            flush_interval (float): Segundos maximos entre volcados
+            max_buffered (int): Eventos en memoria que fuerzan un volcado
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.start_time = time.time()
+        self._start_perf = time.perf_counter()
+        self._file = open(path, "wb")
+        self._file.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.start_time))
+        self._handles = {}      # {car_id: handle}
+        self._new_names = []    # [(handle, car_id)] aun no volcados
+        self._last_flush = time.monotonic()
+        self.events = 0
+        self._reset_columns()
+
+    def _reset_columns(self):
+        self.timestamps = array("d")
+        self.cars = array("I")
+        self.codes = array("B")
+        self.directions = array("B")
+
+    def _handle(self, car_id):
+        if car_id is None:
+            return self.NO_CAR
+        handle = self._handles.get(car_id)
+        if handle is None:
+            handle = self._handles[car_id] = len(self._handles)
+            self._new_names.append((handle, car_id))
+        return handle
+
+    def append(self, code, car_id = None, direction: Direccion = Direccion.NONE, at = None):
+        """
+        Agrega un evento; vuelca el bloque si corresponde
+
+        Args:
+            at (float | None): Segundos desde el inicio del registro (por defecto, ahora)
+        """
+        self.timestamps.append(time.perf_counter() - self._start_perf if at is None else at)
+        self.cars.append(self._handle(car_id))
+        self.codes.append(code)
+        self.directions.append(DIRECTION_CODES.get(direction, 0))
+        self.events += 1
+        if len(self.codes) >= self.max_buffered:
+            self.flush()
+
+    def maybe_flush(self):
+        """Vuelca si paso flush_interval desde el ultimo volcado (el nucleo lo llama en cada vuelta)."""
+        if self.codes and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self.codes or self._file.closed:
+            return
+        parts = [self.CHUNK.pack(self.CHUNK_MAGIC, len(self.codes), len(self._new_names))]
+        for handle, car_id in self._new_names:
+            raw = str(car_id).encode("utf-8")[:0xFFFF]
+            parts.append(self.NAME.pack(handle, len(raw)) + raw)
+        columns = (self.timestamps, self.cars, self.codes, self.directions)
+        if sys.byteorder != "little":
+            for column in columns:
+                column.byteswap()
+        parts.extend(column.tobytes() for column in columns)
+        self._file.write(b"".join(parts))
+        self._file.flush()
+        self._new_names = []
+        self._reset_columns()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
@@ -0,0 +1,113 @@
+"""
+Traspaso en caliente entre dos procesos del servidor por un socket Unix (solo Linux).
+
+El proceso en ejecución escucha en PUENTE_HANDOFF_SOCKET. Un proceso nuevo que arranca con la misma
+variable se conecta, recibe el estado serializado del puente y los descriptores del socket de escucha
+y de cada conexión de cliente (SCM_RIGHTS vía socket.send_fds), confirma con OK y sigue atendiendo
+sin que los clientes se desconecten.
+
+Formato: cabecera "!II" (largo del JSON, cantidad de descriptores), el JSON y luego los descriptores
+en mensajes de un byte con hasta MAX_FDS_PER_MESSAGE descriptores cada uno.
+"""
+import json
+import os
+import socket
+import struct
+
+HEADER = struct.Struct("!II")
+MAX_FDS_PER_MESSAGE = 200 # Por debajo del límite de SCM_RIGHTS del kernel (253)
+ACK = b"OK"
+
+
+def supported():
+    return hasattr(socket, "AF_UNIX") and hasattr(socket, "send_fds")
+
+
+def successor_path(path, pid = None):
+    """
+    Ruta de un archivo de salida (registro de eventos, captura, traza) para el proceso sucesor: se agrega
+    el pid antes de la extensión (eventos.bin -> eventos.4321.bin) para no truncar el archivo que el
+    proceso anterior todavía está escribiendo
+    """
+    if not path:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid() if pid is None else pid}{ext}"
+
+
+def listen(path):
+    """Socket Unix de escucha para recibir a un proceso sucesor (reemplaza un socket viejo en path)."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    return listener
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("El otro proceso cerró el socket de traspaso.")
+        data += chunk
+    return bytes(data)
+
+
+def send_handoff(sock, payload, fds, timeout = 10.0):
+    """
+    Envía el estado y los descriptores al proceso sucesor y espera su confirmación
+
+    Args:
+        sock (socket): Conexión aceptada en el socket de traspaso
+        payload (dict): Estado serializable a JSON
+        fds (list[int]): Descriptores a traspasar, en el orden que espera el sucesor
+
+    Raises:
+        ConnectionError: Si el sucesor no confirma la recepción
+    """
+    sock.settimeout(timeout)
+    data = json.dumps(payload).encode("utf-8")
+    sock.sendall(HEADER.pack(len(data), len(fds)) + data)
+    for i in range(0, len(fds), MAX_FDS_PER_MESSAGE):
+        socket.send_fds(sock, [b"F"], fds[i:i + MAX_FDS_PER_MESSAGE])
+    if _recv_exact(sock, len(ACK)) != ACK:
+        raise ConnectionError("El sucesor no confirmó el traspaso.")
+
+
+def receive_handoff(path, timeout = 10.0):
+    """
+    Se conecta al servidor en ejecución y recibe su estado y sus descriptores
+
+    Returns:
+        tuple[dict, list[int]] | None: Estado y descriptores, o None si no hay un servidor escuchando en path
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        size, fd_count = HEADER.unpack(_recv_exact(sock, HEADER.size))
+        payload = json.loads(_recv_exact(sock, size))
+        fds = []
+        try:
+            while len(fds) < fd_count:
+                _, received, flags, _ = socket.recv_fds(sock, 1, MAX_FDS_PER_MESSAGE)
+                fds.extend(received)
+                if flags & socket.MSG_CTRUNC:
+                    raise ConnectionError("Descriptores truncados durante el traspaso.")
+                if not received:
+                    raise ConnectionError("El servidor cerró el socket de traspaso antes de enviar los descriptores.")
+            sock.sendall(ACK)
+        except (OSError, ConnectionError):
+            for fd in fds: # Sin confirmación el servidor anterior sigue atendiendo estas conexiones
+                os.close(fd)
+            raise
+        return payload, fds
+    finally:
+        sock.close()
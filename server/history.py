@@ -0,0 +1,157 @@
+import math
+import time
+from array import array
+
+
+class UtilizationHistory:
+    """
+    Historial del puente en memoria: un anillo de tamano fijo con un agregado por segundo
+    (profundidad maxima de cada cola, cruces, cambios de direccion, esperas y fraccion del segundo
+    con el puente ocupado). La memoria no crece con el tiempo de servicio: el segundo mas nuevo
+    reemplaza al mas viejo.
+
+    Lo escribe solo el nucleo del puente; las consultas tambien pasan por el nucleo (orden HISTORY).
+    """
+    COLUMNS = ("left_queue", "right_queue", "crossings", "switches", "avg_wait", "utilization")
+
+    def __init__(self, capacity: int = 3600):
+        """
+        Args:
+            capacity (int): Segundos que se conservan (por defecto, la ultima hora)
+        """
+        self.capacity = capacity
+        self.seconds = array("q", [-1]) * capacity  # Segundo epoch de cada casilla (-1: vacia)
+        self.left_queue = array("I", [0]) * capacity
+        self.right_queue = array("I", [0]) * capacity
+        self.crossings = array("I", [0]) * capacity
+        self.switches = array("I", [0]) * capacity
+        self.wait_sum = array("d", [0.0]) * capacity
+        self.wait_count = array("I", [0]) * capacity
+        self.busy = array("d", [0.0]) * capacity     # Segundos con algun coche en el puente
+        self._current = None        # Segundo epoch en curso
+        self._observed_at = None    # Instante de la ultima observacion
+        self._left = 0              # Ultimo estado observado
+        self._right = 0
+        self._occupied = False
+
+    def _slot(self, now):
+        """Casilla del segundo de now; al pasar a un segundo nuevo se inicializan los intermedios."""
+        second = int(now)
+        if second != self._current:
+            if self._current is None or second < self._current:
+                self._current = second - 1
+            first = max(self._current + 1, second - self.capacity + 1)
+            for s in range(first, second + 1):
+                i = s % self.capacity
+                self.seconds[i] = s
+                # Sin eventos, las colas y la ocupacion siguen como estaban
+                self.left_queue[i] = self._left
+                self.right_queue[i] = self._right
+                self.crossings[i] = 0
+                self.switches[i] = 0
+                self.wait_sum[i] = 0.0
+                self.wait_count[i] = 0
+                self.busy[i] = 0.0 # observe() reparte el tiempo ocupado
+            self._current = second
+        return second % self.capacity
+
+    def observe(self, left_size, right_size, occupied, now = None):
+        """
+        Registra el estado actual del puente (el nucleo lo llama en cada vuelta)
+
+        Args:
+            left_size (int): Coches en la cola izquierda
+            right_size (int): Coches en la cola derecha
+            occupied (bool): Hay algun coche en el puente
+        """
+        now = time.time() if now is None else now
+        i = self._slot(now)
+        if self._occupied and self._observed_at is not None:
+            self._add_busy(self._observed_at, now) # El estado anterior duro hasta ahora
+        self.left_queue[i] = max(self.left_queue[i], left_size)
+        self.right_queue[i] = max(self.right_queue[i], right_size)
+        self._left, self._right, self._occupied = left_size, right_size, occupied
+        self._observed_at = now
+
+    def _add_busy(self, start, end):
+        """Reparte el intervalo ocupado [start, end) entre los segundos que abarca."""
+        t = max(start, end - self.capacity)
+        while t < end:
+            second = math.floor(t)
+            upto = min(end, second + 1)
+            i = second % self.capacity
+            if self.seconds[i] == second:
+                self.busy[i] += upto - t
+            t = upto
+
+    def record_crossing(self, now = None):
+        self.crossings[self._slot(time.time() if now is None else now)] += 1
+
+    def record_switch(self, now = None):
+        self.switches[self._slot(time.time() if now is None else now)] += 1
+
+    def record_wait(self, wait, now = None):
+        i = self._slot(time.time() if now is None else now)
+        self.wait_sum[i] += wait
+        self.wait_count[i] += 1
+
+    def query(self, since = None, until = None, step: int = 1):
+        """
+        Agregados entre since y until (segundos epoch), agrupados de a step segundos
+
+        Args:
+            since (float | None): Inicio (por defecto, los ultimos 10 minutos)
+            until (float | None): Fin (por defecto, ahora)
+            step (int): Segundos por punto: colas con el maximo del grupo, cruces y cambios sumados,
+                espera promedio ponderada y utilizacion media
+
+        Returns:
+            dict[str, Any]: step y una lista por columna ("t" es el inicio de cada grupo)
+        """
+        until = int(time.time() if until is None else until)
+        since = int(until - 600 if since is None else since)
+        step = max(1, int(step))
+        since = max(since, until - self.capacity + 1)
+        result = {"step": step, "t": []}
+        for column in self.COLUMNS:
+            result[column] = []
+        for start in range(since - since % step, until + 1, step):
+            seconds = [s for s in range(max(start, since), min(start + step, until + 1)) if self.seconds[s % self.capacity] == s]
+            if not seconds:
+                continue
+            slots = [s % self.capacity for s in seconds]
+            waits = sum(self.wait_count[i] for i in slots)
+            result["t"].append(start)
+            result["left_queue"].append(max(self.left_queue[i] for i in slots))
+            result["right_queue"].append(max(self.right_queue[i] for i in slots))
+            result["crossings"].append(sum(self.crossings[i] for i in slots))
+            result["switches"].append(sum(self.switches[i] for i in slots))
+            result["avg_wait"].append(round(sum(self.wait_sum[i] for i in slots) / waits, 3) if waits else None)
+            result["utilization"].append(round(min(1.0, sum(self.busy[i] for i in slots) / len(slots)), 3))
+        return result
+
+    def export(self):
+        """Casillas con datos, en orden, para el proceso sucesor de un reinicio en caliente."""
+        if self._current is None:
+            return []
+        rows = []
+        for s in range(self._current - self.capacity + 1, self._current + 1):
+            i = s % self.capacity
+            if self.seconds[i] == s:
+                rows.append((s, self.left_queue[i], self.right_queue[i], self.crossings[i], self.switches[i],
+                             self.wait_sum[i], self.wait_count[i], self.busy[i]))
+        return rows
+
+    def restore(self, rows):
+        for s, left, right, crossings, switches, wait_sum, wait_count, busy in rows:
+            i = s % self.capacity
+            self.seconds[i] = s
+            self.left_queue[i] = left
+            self.right_queue[i] = right
+            self.crossings[i] = crossings
+            self.switches[i] = switches
+            self.wait_sum[i] = wait_sum
+            self.wait_count[i] = wait_count
+            self.busy[i] = busy
+            self._current = s if self._current is None else max(self._current, s)
+            self._left, self._right = left, right
@@ -0,0 +1,155 @@
+import bisect
+import itertools
+import time
+from collections import deque
+
+from model.Prioridad import Prioridad
+
+
+class PriorityTrafficQueue:
+    """
+    Cola de espera de una direccion ordenada por clase de prioridad, con desempate FIFO y envejecimiento.
+
+    EMERGENCY es una clase estricta: siempre va delante de las demas, por mucho que hayan esperado, asi
+    que su espera queda acotada aunque haya cientos de coches ordinarios. Entre SERVICE y NORMAL la clave es
+    enqueue_time + rank * aging_interval: un coche ordinario que ya lleva esperando aging_interval
+    pasa delante de un vehiculo de servicio recien llegado, y ninguna de las dos espera sin limite.
+
+    La clave no cambia con el tiempo, por eso basta una lista ordenada (insercion con bisect); el orden
+    de atencion, el primero y la cantidad de emergencias se leen sin ordenar.
+    Mantiene la interfaz de queue.Queue que usa el servidor (put/get/get_nowait/qsize/empty/queue).
+    """
+    def __init__(self, aging_interval: float = 30.0):
+        """
+        Args:
+            aging_interval (float): Segundos de espera que equivalen a subir una clase de prioridad (SERVICE/NORMAL)
+        """
+        self.aging_interval = aging_interval
+        self._ordered = []     # [clase estricta, key, seq, car_id, prioridad], en orden de atencion
+        self._entries = {}     # {car_id: entrada de _ordered}
+        self._emergencies = 0
+        self._counter = itertools.count()
+
+    def put(self, car_id, prioridad: Prioridad = Prioridad.NORMAL, now = None):
+        if car_id in self._entries:
+            self.remove(car_id)
+        now = time.monotonic() if now is None else now
+        urgent = prioridad == Prioridad.EMERGENCY
+        entry = [0 if urgent else 1, now + prioridad.rank * self.aging_interval, next(self._counter), car_id, prioridad]
+        self._entries[car_id] = entry
+        self._emergencies += urgent
+        bisect.insort(self._ordered, entry)
+
+    def remove(self, car_id):
+        """
+        Quita un coche de la cola en O(log n) (mas el corrimiento de la lista)
+
+        Returns:
+            bool: Si el coche estaba encolado
+        """
+        entry = self._entries.pop(car_id, None)
+        if entry is None:
+            return False
+        del self._ordered[bisect.bisect_left(self._ordered, entry)]
+        self._emergencies -= entry[4] == Prioridad.EMERGENCY
+        return True
+
+    def get(self):
+        """
+        Returns:
+            Any: El coche con menor clave
+
+        Raises:
+            IndexError: Si la cola esta vacia
+        """
+        if not self._ordered:
+            raise IndexError("La cola está vacía.")
+        _, _, _, car_id, prioridad = self._ordered.pop(0)
+        del self._entries[car_id]
+        self._emergencies -= prioridad == Prioridad.EMERGENCY
+        return car_id
+
+    get_nowait = get
+
+    def peek(self):
+        """
+        Returns:
+            tuple[Any, Prioridad] | None: Coche y clase del primero de la cola, sin sacarlo
+        """
+        if not self._ordered:
+            return None
+        return self._ordered[0][3], self._ordered[0][4]
+
+    def head_priority(self):
+        head = self.peek()
+        return head[1] if head else None
+
+    def has_emergency(self):
+        """Hay alguna emergencia esperando (por ser clase estricta, es la primera de la cola)."""
+        return self._emergencies > 0
+
+    def priority_of(self, car_id):
+        entry = self._entries.get(car_id)
+        return entry[4] if entry else None
+
+    def qsize(self):
+        return len(self._entries)
+
+    def empty(self):
+        return not self._entries
+
+    def __contains__(self, car_id):
+        return car_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def entries(self):
+        """
+        Returns:
+            list[tuple]: (car_id, Prioridad, instante de llegada) en orden de atencion; put(..., now=llegada) los restaura
+        """
+        return [(car_id, prioridad, key - prioridad.rank * self.aging_interval) for _, key, _, car_id, prioridad in self._ordered]
+
+    @property
+    def queue(self):
+        """Coches en orden de atencion (como queue.Queue.queue)."""
+        return [entry[3] for entry in self._ordered]
+
+
+class WaitStats:
+    """Esperas (encolado -> permiso) recientes por clase de prioridad, para percentiles de cola."""
+    def __init__(self, window: int = 2000):
+        """
+        Args:
+            window (int): Esperas guardadas por clase (las mas antiguas se descartan)
+        """
+        self._waits = {prioridad: deque(maxlen=window) for prioridad in Prioridad}
+        self._totals = {prioridad: 0 for prioridad in Prioridad}
+
+    def record(self, prioridad: Prioridad, wait):
+        self._waits[prioridad].append(wait)
+        self._totals[prioridad] += 1
+
+    @staticmethod
+    def _percentile(ordered, fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def snapshot(self):
+        """
+        Returns:
+            dict[str, dict]: Por clase: permisos totales y p50/p95/p99/max de la ventana (segundos)
+        """
+        result = {}
+        for prioridad, waits in self._waits.items():
+            if not waits:
+                continue
+            ordered = sorted(waits)
+            result[prioridad.value] = {
+                "grants": self._totals[prioridad],
+                "p50": round(self._percentile(ordered, 0.50), 3),
+                "p95": round(self._percentile(ordered, 0.95), 3),
+                "p99": round(self._percentile(ordered, 0.99), 3),
+                "max": round(ordered[-1], 3),
+            }
+        return result
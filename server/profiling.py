@@ -0,0 +1,183 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class ContentionStats:
+    """
+    Acumuladores de espera y retencion por sitio de llamada.
+    Cada hilo escribe en su propia tabla (sin bloqueo); snapshot() las combina.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._tables = []  # [(nombre del hilo, tabla)]
+        self._tables_lock = threading.Lock()
+
+    def _table(self):
+        table = getattr(self._local, "table", None)
+        if table is None:
+            table = self._local.table = {}
+            with self._tables_lock:
+                self._tables.append((threading.current_thread().name, table))
+        return table
+
+    def add(self, site, wait, hold):
+        """
+        Args:
+            site (str): Sitio de llamada (REQUEST, END_CROSS, next_car, ...)
+            wait (float): Segundos esperando el recurso
+            hold (float): Segundos reteniendo el recurso
+        """
+        entry = self._table().get(site)
+        if entry is None:
+            entry = self._table()[site] = [0, 0.0, 0.0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += wait
+        entry[2] = max(entry[2], wait)
+        entry[3] += hold
+        entry[4] = max(entry[4], hold)
+
+    def reset(self):
+        with self._tables_lock:
+            for _, table in self._tables:
+                table.clear()
+
+    def snapshot(self, per_thread: bool = False):
+        """
+        Returns:
+            dict[str, dict]: Por sitio: llamadas, espera total/max/promedio y retencion total/max (en ms)
+        """
+        merged = {}
+        threads = {}
+        with self._tables_lock:
+            tables = [(name, dict(table)) for name, table in self._tables]
+        for thread_name, table in tables:
+            for site, (count, wait, wait_max, hold, hold_max) in table.items():
+                entry = merged.setdefault(site, [0, 0.0, 0.0, 0.0, 0.0])
+                entry[0] += count
+                entry[1] += wait
+                entry[2] = max(entry[2], wait_max)
+                entry[3] += hold
+                entry[4] = max(entry[4], hold_max)
+                if per_thread:
+                    threads.setdefault(thread_name, {})[site] = self._format(count, wait, wait_max, hold, hold_max)
+        result = {site: self._format(*entry) for site, entry in sorted(merged.items())}
+        if per_thread:
+            return {"sites": result, "threads": threads}
+        return result
+
+    @staticmethod
+    def _format(count, wait, wait_max, hold, hold_max):
+        return {
+            "count": count,
+            "wait_total_ms": round(wait * 1000, 3),
+            "wait_max_ms": round(wait_max * 1000, 3),
+            "wait_avg_us": round(wait * 1e6 / count, 2) if count else 0.0,
+            "hold_total_ms": round(hold * 1000, 3),
+            "hold_max_ms": round(hold_max * 1000, 3),
+        }
+
+
+class InstrumentedLock:
+    """
+    threading.Lock que mide cuanto se espera para tomarlo y cuanto se retiene, por sitio de llamada.
+    Se usa igual que un Lock; con at(site) se etiqueta el sitio.
+    """
+    def __init__(self, stats: ContentionStats = None):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = stats or ContentionStats()
+
+    def acquire(self, blocking = True, timeout = -1, site = "unknown"):
+        start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        if acquired:
+            now = time.perf_counter()
+            self._local.state = (site, now - start, now)
+        return acquired
+
+    def release(self):
+        site, wait, acquired_at = getattr(self._local, "state", ("unknown", 0.0, time.perf_counter()))
+        hold = time.perf_counter() - acquired_at
+        self._lock.release()
+        self.stats.add(site, wait, hold)
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    @contextmanager
+    def at(self, site):
+        """with lock.at("REQUEST"): ... toma el lock registrando el sitio de llamada."""
+        self.acquire(site=site)
+        try:
+            yield self
+        finally:
+            self.release()
+
+
+class SamplingProfiler:
+    """
+    Perfilador por muestreo de todos los hilos del proceso (sys._current_frames).
+    Produce pilas colapsadas ("hilo;f1;f2;f3 N") compatibles con flamegraph.pl y speedscope.
+    """
+    _running = threading.Lock() # Un solo perfil a la vez por proceso
+    MIN_INTERVAL = 0.001 # Por debajo, el hilo de muestreo compite por la CPU con el servidor
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        """
+        Args:
+            interval (float): Segundos entre muestras (como minimo MIN_INTERVAL)
+            max_depth (int): Marcos maximos por pila
+        """
+        self.interval = max(interval, self.MIN_INTERVAL)
+        self.max_depth = max_depth
+
+    @staticmethod
+    def _label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def run(self, seconds):
+        """
+        Muestrea durante seconds segundos en el hilo que llama
+
+        Returns:
+            tuple[str, int]: Pilas colapsadas (una por linea) y cantidad de muestras
+
+        Raises:
+            RuntimeError: Si ya hay un perfil en curso
+        """
+        if not self._running.acquire(blocking=False):
+            raise RuntimeError("Ya hay un perfil en curso.")
+        try:
+            me = threading.get_ident()
+            stacks = Counter()
+            samples = 0
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == me:
+                        continue
+                    labels = []
+                    while frame is not None and len(labels) < self.max_depth:
+                        labels.append(self._label(frame))
+                        frame = frame.f_back
+                    labels.append(names.get(thread_id, str(thread_id)))
+                    stacks[";".join(reversed(labels))] += 1
+                samples += 1
+                time.sleep(self.interval)
+            collapsed = "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+            return collapsed, samples
+        finally:
+            self._running.release()
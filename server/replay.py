@@ -0,0 +1,144 @@
+import argparse
+import contextlib
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from server.capture import TrafficCapture
+
+
+def _drain(sock):
+    """Lee y descarta las respuestas del servidor para que sus envíos no se bloqueen."""
+    try:
+        while sock.recv(65536):
+            pass
+    except OSError:
+        pass
+
+
+def replay(path, host, port, speed = 1.0):
+    """
+    Reenvía una captura contra un servidor respetando los tiempos originales
+
+    Args:
+        path: Archivo generado por TrafficCapture
+        host: Host del servidor destino
+        port: Puerto del servidor destino
+        speed (float | None): Factor de aceleración (1, 10, ...). None envía a máxima velocidad
+
+    Returns:
+        dict[str, Any]: Resumen de la reproducción
+    """
+    _, records = TrafficCapture.read(path)
+    sockets = {}
+    drains = []
+    sent = 0
+    start = time.perf_counter()
+    for record in records:
+        if speed:
+            delay = start + record.timestamp / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if record.kind == TrafficCapture.OPEN:
+            sock = socket.create_connection((host, port))
+            sockets[record.conn_id] = sock
+            t = threading.Thread(target=_drain, args=(sock,), daemon=True)
+            t.start()
+            drains.append(t)
+        elif record.kind == TrafficCapture.MESSAGE:
+            sock = sockets.get(record.conn_id)
+            if sock is None:
+                continue # Conexión abierta antes de iniciar la captura
+            try:
+                sock.sendall(record.payload + b"\n")
+                sent += 1
+            except OSError:
+                sockets.pop(record.conn_id, None)
+        elif record.kind == TrafficCapture.CLOSE:
+            sock = sockets.pop(record.conn_id, None)
+            if sock:
+                sock.close()
+    elapsed = time.perf_counter() - start
+    for sock in sockets.values():
+        sock.close()
+    for t in drains:
+        t.join(timeout=1)
+    return {
+        "records": len(records),
+        "messages_sent": sent,
+        "elapsed_s": elapsed,
+        "captured_s": records[-1].timestamp if records else 0.0,
+        "messages_per_s": sent / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def summarize(path):
+    """Cuenta mensajes por tipo y por car_id sin reproducir la captura."""
+    start_time, records = TrafficCapture.read(path)
+    types, cars = Counter(), Counter()
+    for record in records:
+        if record.kind != TrafficCapture.MESSAGE:
+            continue
+        try:
+            message = json.loads(record.payload)
+        except ValueError:
+            types["<malformado>"] += 1
+            continue
+        types[message.get("type")] += 1
+        cars[message.get("id")] += 1
+    return {
+        "start_time": start_time,
+        "connections": sum(1 for r in records if r.kind == TrafficCapture.OPEN),
+        "messages": sum(types.values()),
+        "types": dict(types),
+        "cars": dict(cars),
+    }
+
+
+def _parse_speed(value):
+    if value.lower() == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("La velocidad debe ser positiva o 'max'.")
+    return speed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reproduce una captura de tráfico contra el servidor del puente.")
+    parser.add_argument("capture", help="Archivo generado con PUENTE_CAPTURE_FILE")
+    parser.add_argument("--speed", type=_parse_speed, default=1.0, help="Factor de aceleración (1, 10, ...) o 'max'")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="Servidor existente; si se omite se levanta uno nuevo en proceso")
+    parser.add_argument("--summary", action="store_true", help="Solo muestra un resumen de la captura")
+    args = parser.parse_args()
+
+    if args.summary:
+        print(summarize(args.capture))
+        sys.exit(0)
+
+    server = None
+    port = args.port
+    server_output = open(os.devnull, "w")
+    if port is None:
+        from server.server import Server
+        server = Server(host=args.host, port=0)
+        with contextlib.redirect_stdout(server_output):
+            threading.Thread(target=server.start, daemon=True).start()
+            server.ready.wait(timeout=5)
+        port = server.port
+    try:
+        with contextlib.redirect_stdout(server_output) if server else contextlib.nullcontext():
+            result = replay(args.capture, args.host, port, args.speed)
+    finally:
+        if server:
+            with contextlib.redirect_stdout(server_output):
+                server.stop()
+    speed_label = "max" if args.speed is None else f"{args.speed:g}x"
+    print(f"[REPLAY] {result['messages_sent']} mensajes ({result['records']} registros) a {speed_label} "
+          f"en {result['elapsed_s']:.2f}s (capturado: {result['captured_s']:.2f}s) -> {result['messages_per_s']:.0f} msg/s")
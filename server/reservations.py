@@ -0,0 +1,87 @@
+import bisect
+
+from model.Direccion import Direccion
+
+
+class ReservationBook:
+    """
+    Reservas anticipadas de cruce: cada vehiculo puede tener una reserva pendiente
+    (direccion, "no antes de"). Por direccion se mantiene una lista ordenada por tiempo
+    para consultar rangos con busqueda binaria.
+    """
+    def __init__(self):
+        self._by_direction = {Direccion.LEFT: [], Direccion.RIGHT: []}  # [(not_before, car_id)] ordenadas
+        self._by_car = {}  # {car_id: (Direccion, not_before)}
+
+    def __len__(self):
+        return len(self._by_car)
+
+    def __contains__(self, car_id):
+        return car_id in self._by_car
+
+    def reserve(self, car_id, direction: Direccion, not_before):
+        """Registra (o reemplaza) la reserva del vehiculo."""
+        self.cancel(car_id)
+        bisect.insort(self._by_direction[direction], (not_before, car_id))
+        self._by_car[car_id] = (direction, not_before)
+
+    def cancel(self, car_id):
+        """
+        Elimina la reserva del vehiculo
+
+        Returns:
+            tuple[Direccion, float] | None: La reserva eliminada
+        """
+        reservation = self._by_car.pop(car_id, None)
+        if reservation is None:
+            return None
+        direction, not_before = reservation
+        entries = self._by_direction[direction]
+        i = bisect.bisect_left(entries, (not_before, car_id))
+        if i < len(entries) and entries[i] == (not_before, car_id):
+            del entries[i]
+        return reservation
+
+    def claim(self, car_id, direction: Direccion):
+        """El vehiculo llego a pedir paso: su reserva en esa direccion queda cumplida."""
+        reservation = self._by_car.get(car_id)
+        if reservation and reservation[0] == direction:
+            self.cancel(car_id)
+
+    def between(self, direction: Direccion, start, end):
+        """Reservas (not_before, car_id) de la direccion con start <= not_before < end."""
+        entries = self._by_direction[direction]
+        lo = bisect.bisect_left(entries, (start,))
+        hi = bisect.bisect_left(entries, (end,))
+        return entries[lo:hi]
+
+    def count_between(self, direction: Direccion, start, end):
+        """Cantidad de reservas de la direccion en [start, end) en O(log n)."""
+        entries = self._by_direction[direction]
+        return bisect.bisect_left(entries, (end,)) - bisect.bisect_left(entries, (start,))
+
+    def expire(self, before):
+        """
+        Descarta las reservas con not_before anterior a before (el vehiculo nunca llego)
+
+        Returns:
+            int: Cantidad de reservas descartadas
+        """
+        expired = 0
+        for entries in self._by_direction.values():
+            cut = bisect.bisect_left(entries, (before,))
+            for _, car_id in entries[:cut]:
+                self._by_car.pop(car_id, None)
+            del entries[:cut]
+            expired += cut
+        return expired
+
+    def items(self):
+        """
+        Returns:
+            list[tuple]: (car_id, Direccion, not_before) de todas las reservas pendientes
+        """
+        return [(car_id, direction, not_before) for car_id, (direction, not_before) in self._by_car.items()]
+
+    def counts(self):
+        return {direction.value: len(entries) for direction, entries in self._by_direction.items()}
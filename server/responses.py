@@ -0,0 +1,130 @@
+"""
+Respuestas pre-codificadas del servidor.
+
+Las respuestas frecuentes (permiso, espera, salida, posición en cola...) tienen estado y mensaje fijos:
+ResponseTemplate serializa una vez por dirección del puente todo lo fijo y en cada envío solo inserta
+los campos variables (timestamp, car_id, data, trace_id). El resultado es byte a byte lo mismo que
+json.dumps(template_response(...)) + "\n".
+"""
+import datetime
+import json
+import re
+import time
+from datetime import timezone
+
+from model.Direccion import Direccion
+from model.MessageType import MessageType
+
+_TS = "@@TIMESTAMP@@"
+_CAR = "@@CAR_ID@@"
+_TS_SLOT = _TS.encode("ascii")
+_SLOTS = re.compile(f"({re.escape(_TS)}|{re.escape(_CAR)})".encode("ascii"))
+
+
+class CoarseClock:
+    """
+    Timestamp ISO (UTC) de las respuestas, ya codificado para JSON, recalculado como mucho una vez por
+    resolution segundos. Lo comparten todos los hilos: la tupla se reemplaza de una vez, sin bloqueo.
+    """
+    def __init__(self, resolution: float = 0.01):
+        self.resolution = resolution
+        self._cached = (0.0, b"")
+
+    def now(self):
+        """
+        Returns:
+            bytes: El instante actual entre comillas, listo para insertar en una trama JSON
+        """
+        stamp, encoded = self._cached
+        now = time.time()
+        if now - stamp >= self.resolution:
+            iso = datetime.datetime.fromtimestamp(now, timezone.utc).isoformat()
+            encoded = b'"' + iso.encode("ascii") + b'"'
+            self._cached = (now, encoded)
+        return encoded
+
+
+class ResponseTemplate:
+    """
+    Respuesta con estado y mensaje fijos. El mensaje y los campos extra pueden usar {direction}
+    (dirección actual del puente) y {car_id}.
+    """
+    __slots__ = ("status", "message", "_frames")
+
+    def __init__(self, status: MessageType, message, **extra):
+        """
+        Args:
+            status (MessageType): Estado de la respuesta
+            message (str): Mensaje para el cliente
+            extra: Campos adicionales fijos de la respuesta (por ejemplo expected_direction)
+        """
+        self.status = status.value
+        self.message = message
+        self._frames = {}
+        for direction in Direccion:
+            response = {
+                'status': self.status,
+                'message': message.format(direction=direction.value, car_id=_CAR),
+                'current_direction': direction.value,
+                'timestamp': _TS
+            }
+            for key, value in extra.items():
+                response[key] = value.format(direction=direction.value, car_id=_CAR) if isinstance(value, str) else value
+            encoded = json.dumps(response)[:-1].encode("ascii") # Sin la llave final: data y trace_id van después
+            # Partes fijas intercaladas con los nombres de los huecos (índices impares)
+            self._frames[direction] = _SLOTS.split(encoded.replace(b'"' + _TS_SLOT + b'"', _TS_SLOT))
+
+    def render(self, direction: Direccion, timestamp, car_id = None, data = None, trace_id = None, raw_data = None):
+        """
+        Args:
+            direction (Direccion): Dirección actual del puente
+            timestamp (bytes): Instante ya codificado (CoarseClock.now())
+            car_id: Vehículo que se nombra en el mensaje, si el mensaje lo usa
+            data (dict | None): Campo data de la respuesta (se omite si está vacío)
+            raw_data (bytes | None): Campo data ya serializado (en lugar de data)
+            trace_id: Identificador de correlación del ciclo del coche
+
+        Returns:
+            bytes: Trama JSON terminada en salto de línea
+        """
+        parts = self._frames[direction]
+        out = [parts[0]]
+        for i in range(1, len(parts), 2):
+            if parts[i] == _TS_SLOT:
+                out.append(timestamp)
+            else:
+                out.append(json.dumps(str(car_id))[1:-1].encode("ascii"))
+            out.append(parts[i + 1])
+        if raw_data:
+            out.append(b', "data": ' + raw_data)
+        elif data:
+            out.append(b', "data": ' + json.dumps(data).encode("ascii"))
+        if trace_id is not None:
+            out.append(b', "trace_id": ' + json.dumps(trace_id).encode("ascii"))
+        out.append(b"}\n")
+        return b"".join(out)
+
+
+# Respuestas frecuentes del servidor
+GRANTED = ResponseTemplate(MessageType.PERMISSION_GRANTED, "Tienes permiso para cruzar. ¡Adelante!")
+TURN_ARRIVED = ResponseTemplate(
+    MessageType.PERMISSION_GRANTED,
+    "Tu turno ha llegado. ¡Envía un REQUEST para cruzar!",
+    expected_direction="{direction}"
+)
+WAIT_TURN = ResponseTemplate(MessageType.PERMISSION_DENIED, "Puente ocupado o esperando alternancia. Debes esperar tu turno.")
+ALREADY_ON_BRIDGE = ResponseTemplate(
+    MessageType.STATUS_UPDATE,
+    "Coche {car_id} ya está en el puente. Cruzando en dirección {direction}."
+)
+CROSSED = ResponseTemplate(MessageType.STATUS_UPDATE, "El vehículo {car_id} ha cruzado el puente exitosamente.")
+NOT_ON_BRIDGE = ResponseTemplate(MessageType.PERMISSION_DENIED, "Error: El vehículo {car_id} no estaba registrado en el puente.")
+QUEUE_POSITION = ResponseTemplate(MessageType.QUEUE_POSITION, "Posición en la cola actualizada.")
+RESERVED = ResponseTemplate(MessageType.RESERVE, "Reserva registrada.")
+BRIDGE_STATUS = ResponseTemplate(MessageType.STATUS_UPDATE, "Datos del Puente")
+STATUS_NOT_MODIFIED = ResponseTemplate(MessageType.STATUS_NOT_MODIFIED, "Sin cambios desde la versión informada.")
+HISTORY = ResponseTemplate(MessageType.HISTORY, "Historial del puente")
+NO_DIRECTION = ResponseTemplate(MessageType.PERMISSION_DENIED, "Dirección de vehículo no especificada.")
+NO_TYPE = ResponseTemplate(MessageType.PERMISSION_DENIED, "Tipo de mensaje no especificado.")
+UNKNOWN_TYPE = ResponseTemplate(MessageType.PERMISSION_DENIED, "Tipo de mensaje desconocido.")
+BAD_RESERVATION = ResponseTemplate(MessageType.PERMISSION_DENIED, "Reserva sin not_before válido.")
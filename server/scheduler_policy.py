@@ -0,0 +1,123 @@
+import json
+
+from model.Direccion import Direccion
+
+
+class SchedulerPolicy:
+    """
+    Parametros de la decision de next_car: cuando seguir en la direccion actual y cuando alternar.
+    Los valores por defecto reproducen la alternancia estricta original (un coche por lado).
+    """
+    def __init__(
+        self,
+        batch_size: int = 1,
+        max_wait = None,
+        hysteresis: int = 1,
+        lookahead: float = 0.0
+    ):
+        """
+        Constructor de la clase
+
+        Args:
+            batch_size (int): Coches seguidos en la misma direccion antes de ceder a la contraria
+            max_wait (float | None): Si el primero de la cola contraria espera mas que esto (s), se alterna ya
+            hysteresis (int): Coches que deben esperar en la contraria para interrumpir la direccion actual
+            lookahead (float): Segundos hacia adelante en que se cuentan las reservas como demanda (0 las ignora)
+        """
+        self.batch_size = max(1, int(batch_size))
+        self.max_wait = max_wait
+        self.hysteresis = max(1, int(hysteresis))
+        self.lookahead = max(0.0, float(lookahead))
+
+    def choose(
+        self,
+        current_direction: Direccion,
+        streak,
+        left_size,
+        right_size,
+        left_head_wait = 0.0,
+        right_head_wait = 0.0,
+        left_upcoming = 0,
+        right_upcoming = 0,
+        left_urgent = False,
+        right_urgent = False
+    ):
+        """
+        Decide la direccion del siguiente coche
+
+        Args:
+            current_direction (Direccion): Direccion del ultimo permiso
+            streak (int): Permisos seguidos en current_direction
+            left_size (int): Coches esperando a la izquierda
+            right_size (int): Coches esperando a la derecha
+            left_head_wait (float): Segundos que lleva esperando el primero de la izquierda
+            right_head_wait (float): Segundos que lleva esperando el primero de la derecha
+            left_upcoming (int): Reservas a la izquierda que llegan dentro de lookahead
+            right_upcoming (int): Reservas a la derecha que llegan dentro de lookahead
+            left_urgent (bool): El primero de la izquierda es una emergencia
+            right_urgent (bool): El primero de la derecha es una emergencia
+
+        Returns:
+            Direccion: Direccion de la que sale el siguiente coche (NONE si no hay nadie esperando)
+        """
+        if not self.lookahead:
+            left_upcoming = right_upcoming = 0
+
+        if current_direction == Direccion.NONE:
+            if left_size and right_size and left_urgent != right_urgent:
+                return Direccion.LEFT if left_urgent else Direccion.RIGHT
+            if left_size and right_size and right_size + right_upcoming > left_size + left_upcoming:
+                return Direccion.RIGHT # Se arranca por el lado con mas demanda conocida
+            if left_size:
+                return Direccion.LEFT
+            return Direccion.RIGHT if right_size else Direccion.NONE
+
+        if current_direction == Direccion.LEFT:
+            same_size, opposite_size, opposite_wait, opposite = left_size, right_size, right_head_wait, Direccion.RIGHT
+            opposite_upcoming, same_urgent, opposite_urgent = right_upcoming, left_urgent, right_urgent
+        else:
+            same_size, opposite_size, opposite_wait, opposite = right_size, left_size, left_head_wait, Direccion.LEFT
+            opposite_upcoming, same_urgent, opposite_urgent = left_upcoming, right_urgent, left_urgent
+
+        if opposite_size:
+            if not same_size:
+                return opposite
+            # Una emergencia no espera a que termine el lote ni a la histeresis
+            if opposite_urgent and not same_urgent:
+                return opposite
+            if same_urgent and not opposite_urgent:
+                return current_direction
+            if self.max_wait is not None and opposite_wait >= self.max_wait:
+                return opposite
+            # Las reservas proximas de la contraria cuentan para la histeresis: el cambio servira a un lote mayor
+            if streak >= self.batch_size and opposite_size + opposite_upcoming >= self.hysteresis:
+                return opposite
+        if same_size:
+            return current_direction
+        return Direccion.NONE
+
+    def to_dict(self):
+        return {
+            "batch_size": self.batch_size,
+            "max_wait": self.max_wait,
+            "hysteresis": self.hysteresis,
+            "lookahead": self.lookahead
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        data = data.get("policy", data) # Acepta también la salida completa del autotuner
+        return cls(
+            batch_size=data.get("batch_size", 1),
+            max_wait=data.get("max_wait"),
+            hysteresis=data.get("hysteresis", 1),
+            lookahead=data.get("lookahead", 0.0)
+        )
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def __repr__(self):
+        return f"SchedulerPolicy(batch_size={self.batch_size}, max_wait={self.max_wait}, hysteresis={self.hysteresis}, lookahead={self.lookahead})"
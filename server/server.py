@@ -7,23 +7,73 @@ import os
 import traceback
 import time
 import datetime
+import base64
+import select
+import math
 from datetime import timezone
 
 from enum import Enum
 
 # Asegúrate de que las rutas sean correctas para Direccion y MessageType
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from model.Direccion import Direccion
 from model.MessageType import MessageType
+from model.Prioridad import Prioridad
+from common.tracing import Tracer
+from common.framing import LineFramer
+from common.status_page import StatusPageWriter
+from common.multicast import StatusMulticaster, DEFAULT_GROUP, DEFAULT_PORT
+from server.capture import TrafficCapture
+from server.commands import Command, CommandKind
+from server.estimator import CrossingEstimator
+from server.scheduler_policy import SchedulerPolicy
+from server.profiling import ContentionStats, InstrumentedLock, SamplingProfiler
+from server.reservations import ReservationBook
+from server.priority import PriorityTrafficQueue, WaitStats
+from server import handoff
+from server.event_log import EventLog
+from server import responses
+from server.responses import CoarseClock, ResponseTemplate
+from server.history import UtilizationHistory
+from server.snapshot import BridgeSnapshot
 
 class Server:
     """
         Representacion logica del servidor para manejar las solicitudes del cliente
     """
+    SCHEDULER_INTERVAL = 0.1 # Segundos entre decisiones del planificador mientras el puente está libre
+    COMMAND_TIMEOUT = 5      # Segundos que un hilo de conexión espera a que el núcleo aplique su orden
+    RESERVATION_GRACE = 30   # Segundos tras not_before en que una reserva sin REQUEST se descarta
+    RESERVATION_HORIZON = 3600 # Máxima anticipación aceptada para not_before (segundos)
+    RECV_POLL = 0.5          # Cada cuánto el hilo de aceptación revisa si hay un traspaso en curso
+    CLIENT_IDLE_TIMEOUT = 300 # Segundos de inactividad tras los que se cierra una conexión
+    HANDOFF_QUIESCE_TIMEOUT = 5 # Segundos máximos para que los hilos de conexión se detengan antes de un traspaso
+    GRANT_TIMEOUT = 5        # Segundos que se guarda el turno a un coche notificado antes de dárselo a otro
+    # Sitio de llamada con el que se etiqueta bridge_lock para cada orden
+    LOCK_SITES = {
+        CommandKind.REGISTER: "REGISTER",
+        CommandKind.REQUEST: "REQUEST",
+        CommandKind.EXIT: "END_CROSS",
+        CommandKind.DISCONNECT: "client_disconnect",
+        CommandKind.RESERVE: "RESERVE",
+        CommandKind.HANDOFF: "HANDOFF",
+        CommandKind.HISTORY: "HISTORY",
+    }
+    # Dirección declarada por el cliente -> Direccion (se aceptan mayúsculas o minúsculas)
+    DIRECTIONS = {name: direction for direction in (Direccion.LEFT, Direccion.RIGHT, Direccion.NONE)
+                  for name in (direction.value, direction.value.lower())}
+    MESSAGE_TYPES = frozenset(message_type.value for message_type in MessageType)
     def __init__(
         self,
         host = "127.0.0.1",
-        port = 7777
+        port = 7777,
+        tracer: Tracer = None,
+        capture: TrafficCapture = None,
+        status_page: StatusPageWriter = None,
+        multicaster: StatusMulticaster = None,
+        policy: SchedulerPolicy = None,
+        handoff_path = None,
+        event_log: EventLog = None
     ):
         """
         Constructor de la clase.
@@ -35,13 +85,39 @@ class Server:
             running: Atributo para iniciar el servidor
             is_occupied_bridge (bool): Indica la existencia de un vehiculo en el puente
             current_direction (Direccion): Direccion actual de carros que pasan por el puente
-            left_traffic (Queue): Trafico en la izquierda del puente
-            right_traffic (Queue): Trafico a la derecha del puente
+            left_traffic (PriorityTrafficQueue): Trafico en la izquierda del puente, por clase de prioridad
+            right_traffic (PriorityTrafficQueue): Trafico a la derecha del puente, por clase de prioridad
             car_on_bridge: El carro actual que esta cruzando el puente
             active_clients: Diccionario de sockets activos por car_id
+            tracer (Tracer): Registro de spans para las trazas de extremo a extremo
+            car_traces: Ultimo (trace_id, sampled) recibido por car_id
+            capture (TrafficCapture): Grabacion opcional del flujo de mensajes entrantes
+            ready (threading.Event): Se activa cuando el socket ya esta escuchando
+            status_page (StatusPageWriter): Pagina de estado en memoria compartida para observadores locales
+            multicaster (StatusMulticaster): Emision opcional de cada cambio de estado a un grupo multicast
             
-            bridge_lock (threading): 
-            bridge_condition (threading):
+            commands (Queue): Órdenes pendientes para el núcleo del puente (_bridge_actor)
+            command_batch_size (int): Máximo de órdenes aplicadas por lote
+            estimator (CrossingEstimator): Tiempos de cruce observados para estimar las esperas
+            policy (SchedulerPolicy): Parámetros de alternancia usados por next_car
+            direction_streak (int): Permisos seguidos en la dirección actual
+            enqueued_at: Instante en que cada coche encolado entró a su cola
+            queue_positions: Última posición informada a cada coche encolado (solo se avisa cuando cambia)
+            bridge_lock (InstrumentedLock): Tomado por el núcleo en cada orden; mide espera y retención por sitio
+            command_stats (ContentionStats): Espera en la cola de órdenes y tiempo de servicio por sitio
+            reservations (ReservationBook): Cruces reservados por adelantado (demanda futura para la política)
+            car_priorities: Clase de prioridad declarada por cada car_id al conectarse
+            wait_stats (WaitStats): Esperas hasta el permiso por clase, para los percentiles de cola
+            handoff_path: Socket Unix donde se espera a un proceso sucesor para el reinicio en caliente
+            handing_off (bool): Traspaso en curso: los hilos de conexión se detienen sin cerrar sus sockets
+            handed_off (bool): El traspaso terminó; los sockets pertenecen ahora al proceso sucesor
+            last_handoff: Tiempos del último reinicio en caliente (ms)
+            event_log (EventLog): Registro columnar opcional de los eventos del puente para server/analytics.py
+            clock (CoarseClock): Timestamp de las respuestas, recalculado cada pocos milisegundos
+            dispatch: Manejador de cada tipo de mensaje de un coche (tabla de despacho)
+            queries: Manejadores de los mensajes que no llevan dirección (administración e historial)
+            history (UtilizationHistory): Agregados por segundo de la última hora (colas, cruces, cambios, esperas)
+            snapshot (BridgeSnapshot): Última copia inmutable del estado; la publica el núcleo y se lee sin bloqueo
         """
         self.host = host
         self.port = port
@@ -51,34 +127,116 @@ class Server:
         self.cars_on_bridge = 0
         self.cars_on_bridge_ids = []
         self.current_direction = Direccion.NONE
-        self.left_traffic: queue.Queue = queue.Queue()
-        self.right_traffic: queue.Queue = queue.Queue()
+        self.left_traffic = PriorityTrafficQueue()
+        self.right_traffic = PriorityTrafficQueue()
         self.active_clients = {}  # {car_id: client_socket}
         self.next_expected_car_id = None  # Nuevo: para saber quién fue notificado para cruzar
-        self.bridge_lock = threading.Lock()
-        self.bridge_condition = threading.Condition(self.bridge_lock)
+        self.next_expected_at = 0.0       # Instante (monotónico) de la notificación
+        self.bridge_lock = InstrumentedLock()
+        self.command_stats = ContentionStats()
+        self.commands: queue.Queue = queue.Queue()
+        self.command_batch_size = 64
+        self.commands_processed = 0
+        self.command_batches = 0
+        self._bridge_freed = False
+        self.estimator = CrossingEstimator(grant_overhead=self.SCHEDULER_INTERVAL)
+        self.policy = policy or SchedulerPolicy()
+        self.direction_streak = 0
+        self.enqueued_at = {}  # {car_id: time.monotonic()}
+        self.queue_positions = {}  # {car_id: última posición en la cola informada al coche}
+        self.reservations = ReservationBook()  # not_before en segundos epoch (time.time())
+        self.car_priorities = {}  # {car_id: Prioridad}
+        self.wait_stats = WaitStats()
+        self.handoff_path = handoff_path
+        self.handing_off = False
+        self.handed_off = False
+        self.last_handoff = None
+        self._frozen = False       # El núcleo no decide más coches (estado ya exportado)
+        self._handlers = threading.Condition()
+        self._live_handlers = 0
+        self._parked = []          # Conexiones detenidas para el traspaso
+        self._wake_r = self._wake_w = None # Par de sockets que despierta a los hilos de conexión al iniciar un traspaso
+        self._accepting = threading.Lock() # Lo toma el bucle de aceptación mientras acepta y lanza un hilo
+        self.event_log = event_log
+        self.clock = CoarseClock()
+        self.dispatch = {
+            MessageType.REQUEST.value: self._on_request,
+            MessageType.END_CROSS.value: self._on_end_cross,
+            MessageType.RESERVE.value: self._on_reserve,
+            MessageType.STATUS_UPDATE.value: self._on_status_update,
+        }
+        self.queries = {
+            MessageType.ADMIN.value: self._handle_admin,
+            MessageType.HISTORY.value: self._on_history,
+        }
+        self.history = UtilizationHistory()
+        self.snapshot = None
+        self._publish_snapshot()
+        self._started_at = None
+        self.tracer = tracer or Tracer()
+        self.car_traces = {}  # {car_id: (trace_id, sampled)}
+        self.capture = capture
+        self.ready = threading.Event()
+        self.status_page = status_page
+        self.multicaster = multicaster
 
-    def start(self):
+    def start(self, takeover = None):
         """
         Da inicio el server_socket y con ello, el procesamiento del token del cliente
+
+        Args:
+            takeover: (estado, descriptores) recibidos de handoff.receive_handoff; si se indica, se continúa
+                con el socket de escucha y las conexiones del proceso anterior en lugar de abrir el puerto
         """
-        self.server_socket = socket.socket(socket.AddressFamily.AF_INET, socket.SocketKind.SOCK_STREAM)
-        
-        try: 
-            self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(5)
+        try:
+            if self.handoff_path and handoff.supported():
+                # Solo con reinicio en caliente: un socketpair (no os.pipe) porque select en Windows solo acepta sockets
+                self._wake_r, self._wake_w = socket.socketpair()
+            if takeover:
+                self._adopt(*takeover)
+            else:
+                self.server_socket = socket.socket(socket.AddressFamily.AF_INET, socket.SocketKind.SOCK_STREAM)
+                self.server_socket.bind((self.host, self.port))
+                self.server_socket.listen(5)
+            self.server_socket.settimeout(self.RECV_POLL)
+            self.host, self.port = self.server_socket.getsockname()[:2] # Puerto real si se pidió el 0
             print(f"[SERVIDOR] Escuchando en {self.host}:{self.port}")
-            
-            # Hilo para mantener el puente en funcionamiento (procesar colas)
-            threading.Thread(target=self._bridge_scheduler, daemon=True).start()
+
+            # Núcleo del puente: único hilo que aplica las órdenes y procesa las colas
+            self._started_at = time.monotonic()
+            threading.Thread(target=self._bridge_actor, daemon=True).start()
+            if takeover:
+                self._resume_parked()
+                self._handoff_resumed(takeover[0])
+            if self.handoff_path:
+                if handoff.supported():
+                    threading.Thread(target=self._handoff_listener, daemon=True).start()
+                else:
+                    print("[HANDOFF] Este sistema no permite traspasar sockets; reinicio en caliente desactivado.")
+            self.ready.set()
 
             while self.running:
+                if self.handing_off:
+                    time.sleep(self.RECV_POLL) # Las conexiones nuevas esperan en el backlog al proceso sucesor
+                    continue
                 try:
-                    client_socket, addr = self.server_socket.accept()
-                    print(f"[SERVIDOR] Conexión aceptada de {addr}")
-                    # Iniciamos el hilo para el intercambio de solicitudes y respuesta entre el cliente
-                    threading.Thread(target=self.handle_client, args=(client_socket, addr), daemon=True).start()
-                except OSError as e:
+                    # Con reinicio en caliente también se vigila _wake_r: un traspaso no espera al timeout de accept
+                    watched = [self.server_socket] if self._wake_r is None else [self.server_socket, self._wake_r]
+                    readable, _, _ = select.select(watched, [], [], self.RECV_POLL)
+                    if self.server_socket not in readable:
+                        continue
+                    # _hand_off toma _accepting tras marcar handing_off: una conexión aceptada antes ya tiene
+                    # su hilo contado en _live_handlers, y después de eso no se acepta ninguna
+                    with self._accepting:
+                        if self.handing_off:
+                            continue # Queda en el backlog para el proceso sucesor
+                        client_socket, addr = self.server_socket.accept()
+                        print(f"[SERVIDOR] Conexión aceptada de {addr}")
+                        # Iniciamos el hilo para el intercambio de solicitudes y respuesta entre el cliente
+                        self._spawn_handler(client_socket, addr)
+                except socket.timeout:
+                    continue
+                except (OSError, ValueError) as e: # ValueError: select sobre el socket ya cerrado por stop()
                     if self.running: # Si el servidor se está cerrando, es un error esperado
                         print(f"[ERROR] Error al aceptar conexión: {e}")
                     break  # Servidor cerrado
@@ -93,21 +251,49 @@ class Server:
         """Cierra el servidor de forma controlada"""
         print("[SERVIDOR] Cerrando servidor...")
         self.running = False
+        if self.handed_off:
+            # Los sockets siguen abiertos en el proceso sucesor: solo se sueltan las copias locales (sin shutdown)
+            for parked in self._parked:
+                parked["socket"].close()
+            self._parked.clear()
+            self.active_clients.clear()
+            self.server_socket.close()
         # Unbind del puerto y cierre del socket del servidor
-        if self.server_socket:
+        elif self.server_socket:
             try:
                 self.server_socket.shutdown(socket.SHUT_RDWR)
                 self.server_socket.close()
             except Exception as e:
                 print(f"[ERROR] Error al cerrar socket del servidor: {e}")
-        # Cerrar todos los clientes activos
-        for car_id, client_socket in list(self.active_clients.items()): # Usar list() para copiar y evitar RuntimeError
-            try:
-                client_socket.shutdown(socket.SHUT_RDWR)
-                client_socket.close()
-            except Exception:
-                pass
-            self.active_clients.pop(car_id, None) # Remover después de intentar cerrar
+        # Cerrar todos los clientes activos (con bridge_lock: el núcleo puede estar terminando su último lote)
+        with self.bridge_lock.at("stop"):
+            for car_id, client_socket in list(self.active_clients.items()): # Usar list() para copiar y evitar RuntimeError
+                try:
+                    client_socket.shutdown(socket.SHUT_RDWR)
+                    client_socket.close()
+                except Exception:
+                    pass
+                self.active_clients.pop(car_id, None) # Remover después de intentar cerrar
+        for wake in (self._wake_r, self._wake_w):
+            if wake:
+                wake.close()
+        if self.status_page:
+            self.status_page.close()
+        if self.multicaster:
+            self.multicaster.close()
+        if self.event_log:
+            self.event_log.close()
+            print(f"[SERVIDOR] Registro de eventos guardado en {self.event_log.path} ({self.event_log.events} eventos).")
+        if self.capture:
+            self.capture.close()
+            print(f"[SERVIDOR] Captura guardada en {self.capture.path} ({self.capture.records} registros).")
+        stats = self.actor_stats()
+        print(f"[SERVIDOR] Núcleo: {stats['commands']} órdenes en {stats['batches']} lotes ({stats['commands_per_s']:.1f} órdenes/s).")
+        for prioridad, latency in self.wait_stats.snapshot().items():
+            print(f"[SERVIDOR] Espera {prioridad}: {latency['grants']} permisos, p50 {latency['p50']}s, p95 {latency['p95']}s, p99 {latency['p99']}s, máx {latency['max']}s.")
+        if self.tracer.output_path:
+            exported = self.tracer.export_chrome_trace()
+            print(f"[SERVIDOR] Traza exportada a {self.tracer.output_path} ({exported} eventos).")
         print("[SERVIDOR] Servidor cerrado.")
 
     def template_response(self, status, current_direction: Direccion, message, data = None):
@@ -133,10 +319,42 @@ class Server:
 
     def _send_response(self, client_socket, response_data, car_id=None):
         """Helper para enviar una respuesta a un socket de cliente específico."""
+        trace = self.car_traces.get(car_id)
+        if trace and 'trace_id' not in response_data:
+            response_data['trace_id'] = trace[0] # Identificador de correlación del ciclo actual del coche
+        message_str = json.dumps(response_data) + "\n"
+        return self._send_bytes(client_socket, message_str.encode('utf-8'), car_id, response_data.get('status', response_data.get('type')))
+
+    def _send_template(
+        self,
+        client_socket,
+        template: ResponseTemplate,
+        car_id = None,
+        data = None,
+        direction: Direccion = None,
+        raw_data = None
+    ):
+        """
+        Envía una respuesta pre-codificada (server.responses); equivale a _send_response con template_response
+        Args:
+            direction (Direccion): Dirección a informar (por defecto, la actual del puente)
+            raw_data (bytes): Campo data ya serializado
+        """
+        trace = self.car_traces.get(car_id)
+        frame = template.render(
+            direction or self.current_direction,
+            self.clock.now(),
+            car_id=car_id,
+            data=data,
+            trace_id=trace[0] if trace else None,
+            raw_data=raw_data
+        )
+        return self._send_bytes(client_socket, frame, car_id, template.status)
+
+    def _send_bytes(self, client_socket, frame, car_id, status):
         try:
-            message_str = json.dumps(response_data) + "\n"
-            client_socket.sendall(message_str.encode('utf-8'))
-            print(f"[DEBUG] Enviando a {car_id if car_id else 'desconocido'}: {response_data.get('status', response_data.get('type'))}")
+            client_socket.sendall(frame)
+            print(f"[DEBUG] Enviando a {car_id if car_id else 'desconocido'}: {status}")
             return True
         except (BrokenPipeError, ConnectionResetError) as e:
             print(f"[WARNING] Cliente {car_id} desconectado o error de pipe al enviar respuesta: {e}")
@@ -146,50 +364,76 @@ class Server:
             traceback.print_exc()
             return False
 
+    def _spawn_handler(self, client_socket, addr, car_id = None, registered_id = None, pending = b""):
+        with self._handlers:
+            self._live_handlers += 1 # Se cuenta antes de arrancar el hilo para que un traspaso lo espere
+        threading.Thread(
+            target=self.handle_client,
+            args=(client_socket, addr, car_id, registered_id, pending),
+            daemon=True
+        ).start()
+
     def handle_client(
         self,
         client_socket: socket.socket,
-        addr
+        addr,
+        car_id = None,
+        registered_id = None,
+        pending = b""
     ):
         """
         Metodo para el intercambio de mensajes entre el cliente y servidor
         Args:
             client_socket (socket): Socket de nuestro cliente
             Addr: Direccion del socket del cliente
+            car_id, registered_id, pending: Estado de una conexión recibida en un traspaso
+                (último id, id registrado y bytes de una trama incompleta)
         """
-        car_id = None
+        parked = False
+        conn_id = self.capture.connection_opened() if self.capture else None
         try:
-            buffer = b""
-            client_socket.settimeout(300) # Timeout para inactividad prolongada (5 minutos)
+            framer = LineFramer()
+            if pending:
+                framer.feed(pending)
+            client_socket.settimeout(self.CLIENT_IDLE_TIMEOUT) # Timeout para inactividad prolongada (5 minutos)
             while self.running:
-                data = client_socket.recv(4096) # Aumentar buffer de recepción
-                if not data:
+                # Con reinicio en caliente se vigila también _wake_r, que se vuelve legible al iniciar un traspaso
+                watched = [client_socket] if self._wake_r is None else [client_socket, self._wake_r]
+                readable, _, _ = select.select(watched, [], [], self.CLIENT_IDLE_TIMEOUT)
+                if self.handing_off:
+                    # Se suelta la conexión sin cerrarla; el proceso sucesor la retoma con lo ya leído
+                    self._park(client_socket, addr, car_id, registered_id, framer.pending())
+                    parked = True
+                    break
+                if not readable:
+                    raise socket.timeout()
+                if not framer.recv_into(client_socket):
                     print(f"[INFO] Cliente {car_id if car_id else addr} cerró la conexión.")
                     break  # El cliente cerró la conexión
                 
-                buffer += data
-                while b"\n" in buffer:
-                    msg_bytes, buffer = buffer.split(b"\n", 1)
+                for msg_bytes in framer.frames():
                     if not msg_bytes.strip():
                         continue # Saltar mensajes vacíos
+                    if self.capture:
+                        self.capture.record(conn_id, msg_bytes)
                     
                     try:
-                        message = json.loads(msg_bytes.decode('utf-8'))
-                    except json.JSONDecodeError:
-                        print(f"[ERROR] No se pudo decodificar JSON del cliente {car_id if car_id else addr}: {msg_bytes.decode(errors='ignore')}")
+                        message = json.loads(msg_bytes.decode('utf-8')) # UnicodeDecodeError también es ValueError
+                    except ValueError:
+                        message = None
+                    if not isinstance(message, dict) or not isinstance(message.get('id'), (str, int, type(None))):
+                        print(f"[ERROR] Mensaje malformado del cliente {car_id if car_id else addr}: {msg_bytes.decode(errors='ignore')[:200]}")
                         continue # Saltar mensaje malformado y seguir esperando
                     
-                    car_id = message.get('id')
-                    if car_id:
-                        # Si ya hay un socket para este car_id y es diferente, ciérralo y reemplázalo
-                        old_socket = self.active_clients.get(car_id)
-                        if old_socket and old_socket != client_socket:
-                            try:
-                                old_socket.shutdown(socket.SHUT_RDWR)
-                                old_socket.close()
-                            except Exception:
-                                pass
-                        self.active_clients[car_id] = client_socket
+                    # Una trama sin id se atribuye al coche ya registrado en la conexión
+                    car_id = message.get('id') or registered_id
+                    if car_id and car_id != registered_id:
+                        if registered_id:
+                            # La conexión cambió de id: el anterior deja de estar en el puente y en las colas
+                            self._call(Command(CommandKind.DISCONNECT, registered_id, client_socket=client_socket))
+                        # El núcleo asocia el car_id con este socket (y cierra una conexión anterior del mismo coche)
+                        self._call(Command(CommandKind.REGISTER, car_id, client_socket=client_socket, message=message))
+                        registered_id = car_id
                     
                     self.process_client_request(car_id, message, client_socket)
                     
@@ -197,219 +441,603 @@ class Server:
             print(f"[INFO] Cliente {car_id if car_id else addr} inactivo por mucho tiempo. Cerrando conexión.")
         except ConnectionResetError:
             print(f"[INFO] Cliente {car_id if car_id else addr} desconectado abruptamente.")
+        except OSError as e:
+            if self.running: # Al cerrar el servidor, stop() cierra los sockets bajo los hilos de conexión
+                print(f"[ERROR] Error de conexión con el cliente {car_id if car_id else addr}: {e}")
+                traceback.print_exc()
         except Exception as e:
             print(f"[ERROR] Error en el manejo del cliente {car_id if car_id else addr}: {e}")
             traceback.print_exc()
         finally:
-            if car_id and car_id in self.active_clients:
-                del self.active_clients[car_id]
-            try:
-                client_socket.close()
-            except Exception:
-                pass # Ignorar errores al cerrar socket ya cerrado
-            self.client_disconnect(client_id=car_id)
-            print(f"[INFO] Conexión con cliente {car_id if car_id else addr} cerrada.")
+            if self.capture:
+                self.capture.connection_closed(conn_id)
+            if not parked:
+                # Primero se quita el socket de active_clients y luego se cierra: si no, el núcleo podría escribir
+                # en un descriptor ya cerrado (o reutilizado por otra conexión). Se desconecta el id registrado,
+                # que es el que quedó en active_clients y en las colas
+                self._call(Command(CommandKind.DISCONNECT, registered_id, client_socket=client_socket))
+                try:
+                    client_socket.close()
+                except Exception:
+                    pass # Ignorar errores al cerrar socket ya cerrado
+                print(f"[INFO] Conexión con cliente {car_id if car_id else addr} cerrada.")
+            with self._handlers:
+                self._live_handlers -= 1
+                self._handlers.notify_all()
 
     def process_client_request(self, car_id, message, client_socket):
+        msg_type_str = message.get('type')
+        query = self.queries.get(msg_type_str) if isinstance(msg_type_str, str) else None
+        if query is not None:
+            # Administración e historial no llevan dirección
+            query(car_id, message, client_socket)
+            return
+
         car_direction_str = message.get('direction')
         if not car_direction_str:
-            self._send_response(client_socket, self.template_response(
-                status=MessageType.PERMISSION_DENIED.value,
-                current_direction=Direccion.NONE,
-                message="Dirección de vehículo no especificada."
-            ), car_id)
+            self._send_template(client_socket, responses.NO_DIRECTION, car_id, direction=Direccion.NONE)
             return
 
-        try:
-            car_direction = Direccion[car_direction_str.upper()]
-        except KeyError:
-            self._send_response(client_socket, self.template_response(
-                status=MessageType.PERMISSION_DENIED.value,
-                current_direction=Direccion.NONE,
-                message=f"Dirección de vehículo inválida: {car_direction_str}."
-            ), car_id)
-            return
+        car_direction = self.DIRECTIONS.get(car_direction_str) if isinstance(car_direction_str, str) else None
+        if car_direction is None:
+            try:
+                car_direction = Direccion[car_direction_str.upper()] # Otras grafías ("Left")
+            except (KeyError, AttributeError):
+                self._send_response(client_socket, self.template_response(
+                    status=MessageType.PERMISSION_DENIED.value,
+                    current_direction=Direccion.NONE,
+                    message=f"Dirección de vehículo inválida: {car_direction_str}."
+                ), car_id)
+                return
 
-        msg_type_str = message.get('type')
         if not msg_type_str:
+            self._send_template(client_socket, responses.NO_TYPE, car_id)
+            return
+
+        handler = self.dispatch.get(msg_type_str) if isinstance(msg_type_str, str) else None
+        if handler is not None:
+            handler(car_id, car_direction, message, client_socket)
+        elif not isinstance(msg_type_str, str) or msg_type_str not in self.MESSAGE_TYPES:
             self._send_response(client_socket, self.template_response(
                 status=MessageType.PERMISSION_DENIED.value,
                 current_direction=self.current_direction,
-                message="Tipo de mensaje no especificado."
+                message=f"Tipo de mensaje desconocido: {msg_type_str}."
             ), car_id)
+        else:
+            self._send_template(client_socket, responses.UNKNOWN_TYPE, car_id)
+
+    def _on_request(self, car_id, car_direction: Direccion, message, client_socket):
+        self._call(Command(CommandKind.REQUEST, car_id, car_direction, client_socket, message))
+
+    def _on_end_cross(self, car_id, car_direction: Direccion, message, client_socket):
+        self._call(Command(CommandKind.EXIT, car_id, car_direction, client_socket, message))
+
+    def _on_reserve(self, car_id, car_direction: Direccion, message, client_socket):
+        # Se valida todo antes de llegar al núcleo: ReservationBook no admite NaN (rompe el orden de bisect)
+        try:
+            valid = car_direction != Direccion.NONE and self._valid_reservation_time(float(message.get('not_before')))
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            self._send_template(client_socket, responses.BAD_RESERVATION, car_id)
+            return
+        self._call(Command(CommandKind.RESERVE, car_id, car_direction, client_socket, message))
+
+    def _valid_reservation_time(self, not_before):
+        """not_before es finito y cae entre las reservas que aún no vencieron y RESERVATION_HORIZON hacia adelante."""
+        now = time.time()
+        return math.isfinite(not_before) and now - self.RESERVATION_GRACE <= not_before <= now + self.RESERVATION_HORIZON
+
+    def _on_status_update(self, car_id, car_direction: Direccion, message, client_socket):
+        # Sin pasar por el núcleo: la última copia publicada es consistente e inmutable
+        snapshot = self.snapshot
+        if message.get('version') == snapshot.version:
+            self._send_template(
+                client_socket,
+                responses.STATUS_NOT_MODIFIED,
+                car_id,
+                data={"version": snapshot.version},
+                direction=snapshot.current_direction
+            )
             return
+        self._send_template(
+            client_socket,
+            responses.BRIDGE_STATUS,
+            car_id,
+            direction=snapshot.current_direction,
+            raw_data=snapshot.payload
+        )
 
+    def _on_history(self, car_id, message, client_socket):
+        """Agregados por segundo entre since y until (segundos epoch), de a step segundos."""
         try:
-            msg_type = MessageType(msg_type_str)
-        except ValueError:
+            self._history_bounds(message)
+        except (TypeError, ValueError):
             self._send_response(client_socket, self.template_response(
                 status=MessageType.PERMISSION_DENIED.value,
                 current_direction=self.current_direction,
-                message=f"Tipo de mensaje desconocido: {msg_type_str}."
+                message="Consulta de historial inválida: since, until y step deben ser números."
             ), car_id)
             return
+        history = self._call(Command(CommandKind.HISTORY, car_id, message=message))
+        if history is None:
+            return # El núcleo se detuvo
+        self._send_template(client_socket, responses.HISTORY, car_id, data=history)
 
-        if msg_type == MessageType.REQUEST:
-            with self.bridge_lock:
-                # Caso 1: El coche ya está en el puente.
-                if car_id in self.cars_on_bridge_ids:
-                    print(f"[DEBUG] Coche {car_id} envió REQUEST pero ya está en el puente. Dirección: {self.current_direction.value}")
-                    self._send_response(client_socket, self.template_response(
-                        status=MessageType.STATUS_UPDATE.value,
-                        current_direction=self.current_direction,
-                        message=f"Coche {car_id} ya está en el puente. Cruzando en dirección {self.current_direction.value}."
-                    ), car_id)
-                    return
-                # Caso 2: El coche no está en el puente y solicita acceso.
-                if self.puede_cruzar(car_id, car_direction):
-                    self.cars_on_bridge += 1
-                    self.cars_on_bridge_ids.append(car_id)
-                    self.current_direction = car_direction
-                    # Si era el notificado, limpiar el flag
-                    if self.next_expected_car_id == car_id:
-                        self.next_expected_car_id = None
-                    self._send_response(client_socket, self.template_response(
-                        status=MessageType.PERMISSION_GRANTED.value,
-                        current_direction=self.current_direction,
-                        message="Tienes permiso para cruzar. ¡Adelante!"
-                    ), car_id)
-                    print(f"[PUENTE] Coche {car_id} ingresa directamente al puente. Dirección: {car_direction.value}")
-                    self.print_bridge_status()
-                else:
-                    # Caso 3: El coche no puede cruzar ahora, se encola.
-                    queue_added = False
-                    if car_direction == Direccion.LEFT:
-                        if car_id not in list(self.left_traffic.queue):
-                            self.left_traffic.put(car_id)
-                            print(f"[COLA] Coche {car_id} encolado a la izquierda. Cola actual: {list(self.left_traffic.queue)}")
-                            queue_added = True
-                        else:
-                            print(f"[COLA] Coche {car_id} ya estaba encolado a la izquierda.")
-                    elif car_direction == Direccion.RIGHT:
-                        if car_id not in list(self.right_traffic.queue):
-                            self.right_traffic.put(car_id)
-                            print(f"[COLA] Coche {car_id} encolado a la derecha. Cola actual: {list(self.right_traffic.queue)}")
-                            queue_added = True
-                        else:
-                            print(f"[COLA] Coche {car_id} ya estaba encolado a la derecha.")
-                    self._send_response(client_socket, self.template_response(
-                        status=MessageType.PERMISSION_DENIED.value,
-                        current_direction=self.current_direction,
-                        message="Puente ocupado o esperando alternancia. Debes esperar tu turno."
-                    ), car_id)
-                    self.print_bridge_status()
-        elif msg_type == MessageType.END_CROSS:
-            with self.bridge_lock:
-                if car_id in self.cars_on_bridge_ids:
-                    self.cars_on_bridge -= 1
-                    self.cars_on_bridge_ids.remove(car_id)
-                    print(f"[PUENTE] Coche {car_id} ha salido del puente. Coches restantes: {self.cars_on_bridge}")
-                    self._send_response(client_socket, self.template_response(
-                        status=MessageType.STATUS_UPDATE.value,
-                        current_direction=self.current_direction,
-                        message=f"El vehículo {car_id} ha cruzado el puente exitosamente."
-                    ), car_id)
-                    self.print_bridge_status()
-                    self.bridge_condition.notify_all() # Notificar al scheduler del puente
-                else:
-                    self._send_response(client_socket, self.template_response(
-                        status=MessageType.PERMISSION_DENIED.value,
-                        current_direction=self.current_direction,
-                        message=f"Error: El vehículo {car_id} no estaba registrado en el puente."
-                    ), car_id)
-                    print(f"[WARNING] Coche {car_id} envió END_CROSS pero no estaba en cars_on_bridge_ids.")
-        elif msg_type == MessageType.STATUS_UPDATE:
+    @staticmethod
+    def _history_bounds(message):
+        """
+        Returns:
+            tuple[float | None, float | None, int]: since, until y step de una consulta HISTORY
+
+        Raises:
+            ValueError: Si since, until o step no son números finitos (NaN e infinito pasan por float())
+        """
+        since = message.get('since')
+        until = message.get('until')
+        since = None if since is None else float(since)
+        until = None if until is None else float(until)
+        step = float(message.get('step', 1))
+        if not all(math.isfinite(value) for value in (since, until, step) if value is not None):
+            raise ValueError("since, until y step deben ser finitos")
+        return since, until, int(step)
+
+    @staticmethod
+    def _profile_params(message):
+        """
+        Returns:
+            tuple[float, float]: Duración (0.1 a 300 s) e intervalo de muestreo (al menos MIN_INTERVAL) de la orden profile
+
+        Raises:
+            ValueError: Si alguno no es un número finito
+        """
+        seconds = float(message.get('seconds', 5))
+        interval = float(message.get('interval', 0.005))
+        if not (math.isfinite(seconds) and math.isfinite(interval)):
+            raise ValueError("seconds e interval deben ser finitos")
+        return min(max(seconds, 0.1), 300), max(interval, SamplingProfiler.MIN_INTERVAL)
+
+    def _handle_admin(self, car_id, message, client_socket):
+        """
+        Órdenes de diagnóstico sobre el servidor en ejecución (solo desde conexiones locales):
+            lock_stats: espera/retención de bridge_lock y de la cola de órdenes por sitio
+            reset_stats: reinicia los acumuladores
+            profile: perfila todos los hilos durante 'seconds' y devuelve pilas colapsadas
+            latency: percentiles de espera hasta el permiso por clase de prioridad
+        """
+        try:
+            peer = client_socket.getpeername()[0]
+        except OSError:
+            return
+        if peer not in ("127.0.0.1", "::1"):
             self._send_response(client_socket, self.template_response(
-                status=MessageType.STATUS_UPDATE.value,
-                message="Datos del Puente",
+                status=MessageType.PERMISSION_DENIED.value,
                 current_direction=self.current_direction,
-                data={
-                    "bridge_occupied": self.cars_on_bridge > 0,
-                    "cars_on_bridge": self.cars_on_bridge_ids,
-                    "left_traffic_size": self.left_traffic.qsize(),
-                    "right_traffic_size": self.right_traffic.qsize()
-                }
+                message="Las órdenes de administración solo se aceptan desde el equipo local."
             ), car_id)
+            return
+
+        action = message.get('action')
+        if action == "lock_stats":
+            data = {
+                "bridge_lock": self.bridge_lock.stats.snapshot(per_thread=bool(message.get('per_thread'))),
+                "commands": self.command_stats.snapshot(),
+                "actor": self.actor_stats(),
+                "hot_restart": self.last_handoff
+            }
+        elif action == "latency":
+            data = self.wait_stats.snapshot()
+        elif action == "reset_stats":
+            self.bridge_lock.stats.reset()
+            self.command_stats.reset()
+            self.wait_stats = WaitStats()
+            data = {}
+        elif action == "profile":
+            try:
+                seconds, interval = self._profile_params(message)
+            except (TypeError, ValueError):
+                self._send_response(client_socket, self.template_response(
+                    status=MessageType.PERMISSION_DENIED.value,
+                    current_direction=self.current_direction,
+                    message="Perfilado inválido: seconds e interval deben ser números."
+                ), car_id)
+                return
+            print(f"[ADMIN] Perfilando durante {seconds:.1f}s a pedido de {car_id or peer}...")
+            try:
+                collapsed, samples = SamplingProfiler(interval=interval).run(seconds)
+            except RuntimeError as e:
+                self._send_response(client_socket, self.template_response(
+                    status=MessageType.PERMISSION_DENIED.value,
+                    current_direction=self.current_direction,
+                    message=str(e)
+                ), car_id)
+                return
+            data = {"seconds": seconds, "samples": samples, "collapsed": collapsed}
         else:
             self._send_response(client_socket, self.template_response(
                 status=MessageType.PERMISSION_DENIED.value,
                 current_direction=self.current_direction,
-                message="Tipo de mensaje desconocido."
+                message=f"Orden de administración desconocida: {action}."
             ), car_id)
-            
-    def _bridge_scheduler(self):
+            return
+        self._send_response(client_socket, self.template_response(
+            status=MessageType.ADMIN.value,
+            current_direction=self.current_direction,
+            message=f"Orden {action} completada.",
+            data=data
+        ), car_id)
+
+    def _call(self, command: Command):
         """
-        Hilo que se encarga de decidir qué coche puede cruzar el puente
-        cuando este está libre. Se despierta cuando un coche sale del puente.
+        Envía una orden al núcleo del puente y espera a que la aplique.
+
+        Returns:
+            Any: Resultado de la orden, o None si el servidor se está cerrando
         """
-        while self.running:
-            with self.bridge_condition:
-                # Esperar hasta que el puente esté desocupado o se notifique un cambio
-                while self.cars_on_bridge > 0 and self.running:
-                    self.bridge_condition.wait() # Espera pasivamente
+        if not self.running:
+            return None
+        self.commands.put(command)
+        return command.wait(timeout=self.COMMAND_TIMEOUT)
 
-                if not self.running:
+    def _bridge_actor(self):
+        """
+        Núcleo del puente: único hilo que modifica el estado. Toma las órdenes de self.commands
+        en lotes, las aplica en orden de llegada y, cuando el puente queda libre, decide el siguiente coche.
+        """
+        last_decision = 0.0
+        while self.running:
+            try:
+                batch = [self.commands.get(timeout=self.SCHEDULER_INTERVAL)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < self.command_batch_size:
+                try:
+                    batch.append(self.commands.get_nowait())
+                except queue.Empty:
                     break
 
-                self.next_car()
-            time.sleep(0.1) # Pequeña pausa para evitar un bucle de CPU excesivo
+            for command in batch:
+                site = self.LOCK_SITES[command.kind]
+                applied_at = time.perf_counter()
+                try:
+                    with self.bridge_lock.at(site):
+                        result = self._apply(command)
+                    command.complete(result)
+                except Exception as e:
+                    print(f"[ERROR] Error al aplicar {command.kind.value} de {command.car_id}: {e}")
+                    traceback.print_exc()
+                    command.complete(None)
+                # Espera en la cola de órdenes (contención del núcleo) y tiempo de servicio por sitio
+                self.command_stats.add(site, (Tracer.now_us() - command.submitted_us) / 1e6, time.perf_counter() - applied_at)
+
+            # Misma cadencia que el antiguo hilo planificador: inmediatamente al liberarse el puente
+            # y luego cada SCHEDULER_INTERVAL mientras siga libre
+            now = time.monotonic()
+            if (self.running and not self._frozen and self.cars_on_bridge == 0 and not self._awaiting_expected(now)
+                    and (self._bridge_freed or now - last_decision >= self.SCHEDULER_INTERVAL)):
+                self._bridge_freed = False
+                last_decision = now
+                with self.bridge_lock.at("next_car"):
+                    self.next_car()
+
+            if batch:
+                self.commands_processed += len(batch)
+                self.command_batches += 1
+            self.history.observe(self.left_traffic.qsize(), self.right_traffic.qsize(), self.cars_on_bridge > 0)
+            if self.event_log:
+                self.event_log.maybe_flush()
+
+        # Liberar a los hilos que aún esperan respuesta
+        while True:
+            try:
+                self.commands.get_nowait().complete(None)
+            except queue.Empty:
+                break
+
+    def _awaiting_expected(self, now):
+        """
+        El coche notificado por next_car todavía tiene el turno guardado. Si no lo usa en GRANT_TIMEOUT
+        (por ejemplo, no recibió el aviso), se libera para que el planificador elija a otro.
+        """
+        if self.next_expected_car_id is None:
+            return False
+        if now - self.next_expected_at < self.GRANT_TIMEOUT:
+            return True
+        print(f"[PUENTE] Coche {self.next_expected_car_id} no usó su turno en {self.GRANT_TIMEOUT}s. Se le da a otro.")
+        with self.bridge_lock.at("next_car"):
+            self.next_expected_car_id = None
+        return False
+
+    def _apply(self, command: Command):
+        """Aplica una orden sobre el estado del puente. Solo se llama desde _bridge_actor."""
+        if command.message and command.car_id:
+            self._remember_trace(command.car_id, command.message)
+        trace_id = self._trace_of(command.car_id)
+        self.tracer.complete("server.command_wait", trace_id, command.submitted_us, Tracer.now_us(), kind=command.kind.value)
+        if command.kind == CommandKind.REGISTER:
+            return self._register_client(command.car_id, command.client_socket, command.message)
+        if command.kind == CommandKind.REQUEST:
+            return self._apply_request(command.car_id, command.direction, command.client_socket, trace_id)
+        if command.kind == CommandKind.EXIT:
+            with self.tracer.span("server.end_cross", trace_id, car_id=command.car_id):
+                return self._apply_exit(command.car_id, command.client_socket, trace_id)
+        if command.kind == CommandKind.DISCONNECT:
+            return self.client_disconnect(command.car_id, command.client_socket)
+        if command.kind == CommandKind.HISTORY:
+            return self.history.query(*self._history_bounds(command.message))
+        if command.kind == CommandKind.HANDOFF:
+            self._frozen = True
+            return self.export_state()
+        if command.kind == CommandKind.RESERVE:
+            return self._apply_reserve(command.car_id, command.direction, float(command.message['not_before']), command.client_socket)
+        return None
+
+    def _register_client(self, car_id, client_socket, message = None):
+        """
+        Asocia car_id con su socket; si ya había otra conexión para ese coche, se cierra.
+        La clase de prioridad se toma del primer mensaje de la conexión (NORMAL si no la declara).
+        """
+        try:
+            self.car_priorities[car_id] = Prioridad((message or {}).get('priority', Prioridad.NORMAL.value))
+        except ValueError:
+            print(f"[WARNING] Coche {car_id} declaró una prioridad inválida: {message.get('priority')}. Se usa NORMAL.")
+            self.car_priorities[car_id] = Prioridad.NORMAL
+        old_socket = self.active_clients.get(car_id)
+        if old_socket and old_socket != client_socket:
+            # Solo shutdown: el hilo de esa conexión ve EOF y cierra el socket él mismo. Cerrarlo desde aquí
+            # liberaría el descriptor mientras ese hilo sigue en select/recv, y el número podría reutilizarse
+            # para otra conexión nueva
+            try:
+                old_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.active_clients[car_id] = client_socket
+
+    def _apply_request(self, car_id, car_direction: Direccion, client_socket, trace_id):
+        self.estimator.record_request(car_id)
+        self.reservations.claim(car_id, car_direction) # La demanda reservada ya es demanda real
+        # Caso 1: El coche ya está en el puente.
+        if car_id in self.cars_on_bridge_ids:
+            print(f"[DEBUG] Coche {car_id} envió REQUEST pero ya está en el puente. Dirección: {self.current_direction.value}")
+            self._send_template(client_socket, responses.ALREADY_ON_BRIDGE, car_id)
+            return
+        # Caso 2: El coche no está en el puente y solicita acceso.
+        if self.puede_cruzar(car_id, car_direction):
+            self.cars_on_bridge += 1
+            self.cars_on_bridge_ids.append(car_id)
+            # Si ya estaba encolado (repitió REQUEST con el puente libre antes de que decidiera el planificador), sale de la cola
+            enqueued_at = self.enqueued_at.pop(car_id, None)
+            if self.left_traffic.remove(car_id) | self.right_traffic.remove(car_id):
+                self.tracer.end("server.queued", trace_id, car_id=car_id)
+            # Si era el notificado, limpiar el flag (su permiso ya se contó en next_car)
+            if self.next_expected_car_id == car_id:
+                self.next_expected_car_id = None
+            else:
+                waited = time.monotonic() - enqueued_at if enqueued_at is not None else 0.0 # 0: pasó sin hacer cola
+                self._count_grant(car_direction)
+                self.wait_stats.record(self._priority_of(car_id), waited)
+                self.history.record_wait(waited)
+                if self.current_direction not in (Direccion.NONE, car_direction):
+                    self._log_event(EventLog.SWITCH, direction=car_direction)
+                    self.history.record_switch()
+                self._log_event(EventLog.GRANT, car_id, car_direction)
+            self._log_event(EventLog.ENTER, car_id, car_direction)
+            self.current_direction = car_direction
+            self.estimator.record_grant(car_id, car_direction)
+            self.tracer.instant("server.grant", trace_id, car_id=car_id, direction=car_direction.value)
+            self.tracer.begin("server.crossing", trace_id, car_id=car_id)
+            self._send_template(client_socket, responses.GRANTED, car_id)
+            print(f"[PUENTE] Coche {car_id} ingresa directamente al puente. Dirección: {car_direction.value}")
+            self._state_changed()
+        else:
+            # Caso 3: El coche no puede cruzar ahora, se encola.
+            enqueued = False
+            if car_direction == Direccion.LEFT:
+                if car_id not in self.left_traffic:
+                    enqueued = True
+                    self.left_traffic.put(car_id, self._priority_of(car_id))
+                    self.enqueued_at[car_id] = time.monotonic()
+                    self._log_event(EventLog.ENQUEUE, car_id, car_direction)
+                    self.tracer.begin("server.queued", trace_id, car_id=car_id, direction=car_direction.value)
+                    print(f"[COLA] Coche {car_id} encolado a la izquierda. Coches en la cola: {self.left_traffic.qsize()}")
+                else:
+                    print(f"[COLA] Coche {car_id} ya estaba encolado a la izquierda.")
+            elif car_direction == Direccion.RIGHT:
+                if car_id not in self.right_traffic:
+                    enqueued = True
+                    self.right_traffic.put(car_id, self._priority_of(car_id))
+                    self.enqueued_at[car_id] = time.monotonic()
+                    self._log_event(EventLog.ENQUEUE, car_id, car_direction)
+                    self.tracer.begin("server.queued", trace_id, car_id=car_id, direction=car_direction.value)
+                    print(f"[COLA] Coche {car_id} encolado a la derecha. Coches en la cola: {self.right_traffic.qsize()}")
+                else:
+                    print(f"[COLA] Coche {car_id} ya estaba encolado a la derecha.")
+            # Un coche nuevo puede quedar delante de otros (emergencia, servicio o el reparto entre direcciones):
+            # se calculan todas las posiciones una vez, para su respuesta y para avisar a los que se movieron
+            estimates = self._queue_estimates() if enqueued else None
+            self._send_template(client_socket, responses.WAIT_TURN, car_id, data=self._wait_estimate(car_id, car_direction, estimates))
+            if enqueued:
+                self._send_queue_positions(estimates)
+            self._state_changed()
+
+    def _apply_exit(self, car_id, client_socket, trace_id):
+        if car_id in self.cars_on_bridge_ids:
+            self.tracer.end("server.crossing", trace_id, car_id=car_id)
+            self.estimator.record_exit(car_id)
+            self._log_event(EventLog.EXIT, car_id, self.current_direction)
+            self.history.record_crossing()
+            self.cars_on_bridge -= 1
+            self.cars_on_bridge_ids.remove(car_id)
+            print(f"[PUENTE] Coche {car_id} ha salido del puente. Coches restantes: {self.cars_on_bridge}")
+            self._send_template(client_socket, responses.CROSSED, car_id)
+            self._state_changed()
+            self._bridge_freed = True # El núcleo decide el siguiente coche al terminar el lote
+        else:
+            self._send_template(client_socket, responses.NOT_ON_BRIDGE, car_id)
+            print(f"[WARNING] Coche {car_id} envió END_CROSS pero no estaba en cars_on_bridge_ids.")
+
+    def _apply_reserve(self, car_id, direction: Direccion, not_before, client_socket):
+        """Registra la reserva del próximo cruce del coche y confirma cuántas hay antes en esa dirección."""
+        self.reservations.reserve(car_id, direction, not_before)
+        ahead = self.reservations.count_between(direction, 0.0, not_before)
+        self._publish_snapshot() # Cambian las reservas pendientes que informa STATUS_UPDATE
+        print(f"[RESERVA] Coche {car_id} reserva cruce {direction.value} desde {datetime.datetime.fromtimestamp(not_before).strftime('%H:%M:%S')} ({ahead} antes).")
+        self._send_template(client_socket, responses.RESERVED, car_id, data={"not_before": not_before, "reservations_ahead": ahead})
+
+    def _upcoming(self, direction: Direccion, now):
+        """Reservas de la dirección que llegan dentro del horizonte de la política."""
+        return self.reservations.count_between(direction, now - self.RESERVATION_GRACE, now + self.policy.lookahead)
+
+    def _priority_of(self, car_id):
+        return self.car_priorities.get(car_id, Prioridad.NORMAL)
+
+    def _queue_of(self, direction: Direccion):
+        return self.left_traffic if direction == Direccion.LEFT else self.right_traffic
+
+    def _queue_estimates(self, until = None):
+        """Posición y tiempo estimado de los coches encolados, según la política activa (CrossingEstimator.estimate_waits)."""
+        return self.estimator.estimate_waits(
+            self.left_traffic.entries(),
+            self.right_traffic.entries(),
+            self.current_direction,
+            self.direction_streak,
+            self.policy,
+            self.cars_on_bridge_ids,
+            expected=self.next_expected_car_id,
+            until=until
+        )
+
+    def _wait_estimate(self, car_id, car_direction: Direccion, estimates = None):
+        """
+        Posición en la cola y tiempo estimado hasta el permiso de un coche encolado. estimates: resultado
+        de _queue_estimates() si ya se calculó; si no, se calcula solo hasta este coche.
+        """
+        if estimates is None:
+            estimates = self._queue_estimates(until=car_id)
+        position, eta = estimates.get(car_id, (self._queue_of(car_direction).qsize(), 0.0))
+        self.queue_positions[car_id] = position # Ya informada en la respuesta al REQUEST
+        return {"queue_position": position, "eta_seconds": round(eta, 2)}
+
+    def _send_queue_positions(self, estimates = None):
+        """
+        Informa a los coches encolados su nueva posición y tiempo estimado. Se calculan todas en una pasada
+        (o se usan las estimates ya calculadas) y solo se envía a los que cambiaron de lugar desde el último aviso.
+        Se llama cuando un coche recibe el turno, entra a una cola o sale de ella al desconectarse.
+        """
+        previous, self.queue_positions = self.queue_positions, {}
+        for car_id, (position, eta) in (self._queue_estimates() if estimates is None else estimates).items():
+            self.queue_positions[car_id] = position
+            if previous.get(car_id) == position:
+                continue
+            client_socket = self.active_clients.get(car_id)
+            if client_socket:
+                self._send_template(client_socket, responses.QUEUE_POSITION, car_id, data={"queue_position": position, "eta_seconds": round(eta, 2)})
+
+    def _publish_snapshot(self):
+        """
+        Publica una copia nueva del estado para STATUS_UPDATE si algo cambió. Solo se llama desde el
+        núcleo (o antes de arrancarlo); los lectores toman self.snapshot sin bloqueo.
+        """
+        current = self.snapshot
+        state = (
+            self.current_direction,
+            tuple(self.cars_on_bridge_ids),
+            self.left_traffic.qsize(),
+            self.right_traffic.qsize(),
+            self.reservations.counts()
+        )
+        if current is not None and state == (current.current_direction, current.cars_on_bridge, current.left_size, current.right_size, current.reservations):
+            return current # Misma versión: los clientes al día reciben "sin cambios"
+        self.snapshot = BridgeSnapshot(current.version + 1 if current else 1, *state)
+        return self.snapshot
+
+    def actor_stats(self):
+        """
+        Returns:
+            dict[str, float]: Órdenes aplicadas, lotes y órdenes por segundo desde el inicio
+        """
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "commands": self.commands_processed,
+            "batches": self.command_batches,
+            "avg_batch": self.commands_processed / self.command_batches if self.command_batches else 0.0,
+            "commands_per_s": self.commands_processed / elapsed if elapsed > 0 else 0.0,
+            "queued": self.commands.qsize()
+        }
 
     def next_car(self):
         """
-        Decide qué coche puede cruzar a continuación, alternando la dirección si hay vehículos esperando
-        en la contraria y el puente está libre.
-        Esta función ya opera bajo bridge_lock debido a _bridge_scheduler.
+        Decide qué coche puede cruzar a continuación cuando el puente está libre; la política
+        (SchedulerPolicy) indica si se continúa en la misma dirección o se alterna.
+        Esta función se ejecuta en el núcleo del puente (_bridge_actor).
         """
+        decision_start = Tracer.now_us()
         next_car_id = None
-        next_direction = Direccion.NONE
-
-        # Alternar o continuar con la misma dirección
-        if self.current_direction == Direccion.LEFT:
-            if not self.right_traffic.empty():
-                next_car_id = self.right_traffic.get()
-                next_direction = Direccion.RIGHT
-                print(f"[PUENTE] Alternando dirección (LEFT -> RIGHT).")
-            elif not self.left_traffic.empty():
-                next_car_id = self.left_traffic.get()
-                next_direction = Direccion.LEFT
-        elif self.current_direction == Direccion.RIGHT:
-            if not self.left_traffic.empty():
-                next_car_id = self.left_traffic.get()
-                next_direction = Direccion.LEFT
-                print(f"[PUENTE] Alternando dirección (RIGHT -> LEFT).")
-            elif not self.right_traffic.empty():
-                next_car_id = self.right_traffic.get()
-                next_direction = Direccion.RIGHT
-        else: # Direccion.NONE (puente completamente libre al inicio o después de vaciarse ambas colas)
-            if not self.left_traffic.empty():
-                next_car_id = self.left_traffic.get()
-                next_direction = Direccion.LEFT
-            elif not self.right_traffic.empty():
-                next_car_id = self.right_traffic.get()
-                next_direction = Direccion.RIGHT
+
+        # Las reservas que nunca se concretaron dejan de contar como demanda
+        wall_now = time.time()
+        self.reservations.expire(wall_now - self.RESERVATION_GRACE)
+        # La política decide si se continúa en la misma dirección o se alterna
+        now = time.monotonic()
+        next_direction = self.policy.choose(
+            self.current_direction,
+            self.direction_streak,
+            self.left_traffic.qsize(),
+            self.right_traffic.qsize(),
+            self._head_wait(self.left_traffic, now),
+            self._head_wait(self.right_traffic, now),
+            self._upcoming(Direccion.LEFT, wall_now) if self.policy.lookahead else 0,
+            self._upcoming(Direccion.RIGHT, wall_now) if self.policy.lookahead else 0,
+            self.left_traffic.has_emergency(), # Cualquier emergencia en espera, no solo la primera
+            self.right_traffic.has_emergency()
+        )
+        if next_direction != Direccion.NONE:
+            next_car_id = self._queue_of(next_direction).get()
+            enqueued_at = self.enqueued_at.pop(next_car_id, None)
+            if enqueued_at is not None:
+                self.wait_stats.record(self._priority_of(next_car_id), now - enqueued_at)
+                self.history.record_wait(now - enqueued_at)
+            if self.current_direction not in (Direccion.NONE, next_direction):
+                print(f"[PUENTE] Alternando dirección ({self.current_direction.value} -> {next_direction.value}).")
+                self._log_event(EventLog.SWITCH, direction=next_direction)
+                self.history.record_switch()
+            self._log_event(EventLog.GRANT, next_car_id, next_direction)
 
         if next_car_id:
+            trace_id = self._trace_of(next_car_id)
+            self.tracer.end("server.queued", trace_id, car_id=next_car_id)
+            self.tracer.complete("server.scheduler_decision", trace_id, decision_start, Tracer.now_us(), direction=next_direction.value)
+            self._count_grant(next_direction)
             self.current_direction = next_direction
             self.next_expected_car_id = next_car_id  # Guardar el coche notificado
+            self.next_expected_at = now
             print(f"[PUENTE] Decidiendo: Siguiente coche {next_car_id} de {next_direction.value}. Notificando...")
-            self.notify_car_can_cross(next_car_id)
+            with self.tracer.span("server.notification", trace_id, car_id=next_car_id):
+                self.notify_car_can_cross(next_car_id)
+            self._send_queue_positions() # Todos los que esperaban avanzaron un lugar
         else:
             self.current_direction = Direccion.NONE
+            self.direction_streak = 0
             self.next_expected_car_id = None
             print("[PUENTE] No hay coches esperando en las colas. Puente permanece LIBRE.")
-        self.print_bridge_status()
+        self._state_changed()
+
+    def _count_grant(self, direction: Direccion):
+        """Lleva la cuenta de permisos seguidos en la misma dirección (para batch_size de la política)."""
+        self.direction_streak = self.direction_streak + 1 if direction == self.current_direction else 1
+
+    def _head_wait(self, traffic: PriorityTrafficQueue, now):
+        """Segundos que lleva esperando el primer coche de la cola."""
+        head = traffic.peek()
+        if head is None:
+            return 0.0
+        return now - self.enqueued_at.get(head[0], now)
 
     def notify_car_can_cross(self, car_id):
         """Notifica a un vehículo específico que puede cruzar el puente (desde el scheduler)."""
         client_socket = self.active_clients.get(car_id)
         if client_socket:
-            notification = self.template_response(
-                status=MessageType.PERMISSION_GRANTED.value,
-                message='Tu turno ha llegado. ¡Envía un REQUEST para cruzar!',
-                current_direction=self.current_direction
-            )
-            notification['expected_direction'] = self.current_direction.value
-            if self._send_response(client_socket, notification, car_id):
+            if self._send_template(client_socket, responses.TURN_ARRIVED, car_id):
                 print(f"[NOTIFICACIÓN] Enviada a {car_id}: puede cruzar (desde scheduler).")
             else:
                 print(f"[ADVERTENCIA] No se pudo enviar notificación a {car_id}, socket posiblemente cerrado.")
@@ -417,53 +1045,284 @@ class Server:
             print(f"[ADVERTENCIA] No se encontró socket para notificar a {car_id}. Posiblemente se desconectó y fue limpiado.")
 
 
-    def client_disconnect(self, client_id):
+    def export_state(self):
+        """
+        Estado del puente serializable a JSON para el proceso sucesor. Los instantes son de
+        time.monotonic(), que en Linux es el mismo reloj para todos los procesos.
+        """
+        return {
+            "current_direction": self.current_direction.value,
+            "cars_on_bridge_ids": list(self.cars_on_bridge_ids),
+            "next_expected_car_id": self.next_expected_car_id,
+            "next_expected_at": self.next_expected_at,
+            "direction_streak": self.direction_streak,
+            "queues": {
+                direction.value: [(car_id, prioridad.value, since) for car_id, prioridad, since in self._queue_of(direction).entries()]
+                for direction in (Direccion.LEFT, Direccion.RIGHT)
+            },
+            "enqueued_at": list(self.enqueued_at.items()),
+            "car_priorities": [(car_id, prioridad.value) for car_id, prioridad in self.car_priorities.items()],
+            "car_traces": [(car_id, trace_id, sampled) for car_id, (trace_id, sampled) in self.car_traces.items()],
+            "reservations": [(car_id, direction.value, not_before) for car_id, direction, not_before in self.reservations.items()],
+            "estimator": self.estimator.export(),
+            "history": self.history.export(),
+            "snapshot_version": self.snapshot.version,
+        }
+
+    def restore_state(self, state):
+        """Carga el estado exportado por export_state() antes de arrancar el núcleo."""
+        self.current_direction = Direccion(state["current_direction"])
+        self.cars_on_bridge_ids = list(state["cars_on_bridge_ids"])
+        self.cars_on_bridge = len(self.cars_on_bridge_ids)
+        self.next_expected_car_id = state["next_expected_car_id"]
+        self.next_expected_at = state.get("next_expected_at", time.monotonic())
+        self.direction_streak = state["direction_streak"]
+        for direction in (Direccion.LEFT, Direccion.RIGHT):
+            for car_id, prioridad, since in state["queues"][direction.value]:
+                self._queue_of(direction).put(car_id, Prioridad(prioridad), now=since)
+        self.enqueued_at = dict((car_id, t) for car_id, t in state["enqueued_at"])
+        self.car_priorities = {car_id: Prioridad(p) for car_id, p in state["car_priorities"]}
+        self.car_traces = {car_id: (trace_id, sampled) for car_id, trace_id, sampled in state["car_traces"]}
+        for car_id, direction, not_before in state["reservations"]:
+            self.reservations.reserve(car_id, Direccion(direction), not_before)
+        self.estimator.restore(state["estimator"])
+        self.history.restore(state.get("history", []))
+        # Las versiones siguen desde la del proceso anterior: un cliente no confunde estados de ambos
+        self.snapshot = BridgeSnapshot(state.get("snapshot_version", 0), Direccion.NONE, (), 0, 0, {})
+        self._publish_snapshot()
+
+    def _park(self, client_socket, addr, car_id, registered_id, pending):
+        with self._handlers:
+            self._parked.append({
+                "socket": client_socket,
+                "addr": addr,
+                "car_id": car_id,
+                "registered_id": registered_id,
+                "pending": pending
+            })
+
+    def _resume_parked(self):
+        """Vuelve a atender las conexiones detenidas (traspaso recibido o traspaso fallido)."""
+        with self._handlers:
+            parked, self._parked = self._parked, []
+        for conn in parked:
+            self._spawn_handler(conn["socket"], conn["addr"], conn["car_id"], conn["registered_id"], conn["pending"])
+
+    def _adopt(self, payload, fds):
+        """Toma el socket de escucha, las conexiones y el estado recibidos del proceso anterior."""
+        self.server_socket = socket.socket(fileno=fds[0])
+        self.restore_state(payload["state"])
+        for conn, fd in zip(payload["connections"], fds[1:]):
+            client_socket = socket.socket(fileno=fd)
+            if conn["registered_id"] is not None:
+                self.active_clients[conn["registered_id"]] = client_socket
+            self._parked.append({
+                "socket": client_socket,
+                "addr": tuple(conn["addr"]),
+                "car_id": conn["car_id"],
+                "registered_id": conn["registered_id"],
+                "pending": base64.b64decode(conn["pending"])
+            })
+
+    def _handoff_resumed(self, payload):
+        """Registra cuánto duró la pausa del reinicio en caliente, desde que el proceso anterior dejó de leer."""
+        timings = payload["timings"]
+        timings["resume_ms"] = round((time.time() - payload["started_at"]) * 1000 - timings["quiesce_ms"] - timings["snapshot_ms"], 3)
+        timings["pause_ms"] = round(timings["quiesce_ms"] + timings["snapshot_ms"] + timings["resume_ms"], 3)
+        timings["connections"] = len(payload["connections"])
+        self.last_handoff = timings
+        print(f"[HANDOFF] Reinicio en caliente: {timings['connections']} conexiones retomadas; pausa {timings['pause_ms']:.1f} ms "
+              f"(detener hilos {timings['quiesce_ms']:.1f}, exportar {timings['snapshot_ms']:.1f}, "
+              f"transferir y reanudar {timings['resume_ms']:.1f}).")
+
+    def _handoff_listener(self):
+        """Espera en handoff_path a un proceso sucesor y le traspasa el servidor."""
+        listener = handoff.listen(self.handoff_path)
+        listener.settimeout(self.RECV_POLL)
+        print(f"[HANDOFF] Esperando sucesor en {self.handoff_path}")
+        try:
+            while self.running:
+                try:
+                    conn, _ = listener.accept()
+                except socket.timeout:
+                    continue
+                with conn:
+                    if self._hand_off(conn):
+                        return
+        finally:
+            listener.close()
+            if not self.handed_off: # Tras el traspaso la ruta es del sucesor
+                try:
+                    os.unlink(self.handoff_path)
+                except FileNotFoundError:
+                    pass
+
+    def _hand_off(self, conn):
+        """
+        Detiene los hilos de conexión, exporta el estado y envía todo al sucesor
+
+        Returns:
+            bool: Si el sucesor confirmó; si no, este proceso sigue atendiendo
+        """
+        started_at = time.time()
+        start = time.perf_counter()
+        self.handing_off = True
+        with self._accepting:
+            pass # Si el bucle de aceptación estaba aceptando una conexión, termina de lanzar su hilo antes de esperarlos
+        self._wake_w.send(b"!") # Queda legible (no se consume) hasta que todos los hilos se detengan
+        print("[HANDOFF] Sucesor conectado. Deteniendo conexiones...")
+        with self._handlers:
+            quiesced = self._handlers.wait_for(lambda: self._live_handlers == 0, timeout=self.HANDOFF_QUIESCE_TIMEOUT)
+        quiesced_at = time.perf_counter()
+        state = self._call(Command(CommandKind.HANDOFF)) if quiesced else None
+        if state is None:
+            print("[HANDOFF] No se pudo detener el servidor a tiempo; se cancela el traspaso.")
+            self._abort_handoff()
+            return False
+        snapshot_at = time.perf_counter()
+        with self._handlers:
+            parked_conns = list(self._parked) # Una sola copia para las conexiones del estado y sus descriptores
+        payload = {
+            "state": state,
+            "connections": [
+                {
+                    "addr": list(parked["addr"]),
+                    "car_id": parked["car_id"],
+                    "registered_id": parked["registered_id"],
+                    "pending": base64.b64encode(parked["pending"]).decode("ascii")
+                }
+                for parked in parked_conns
+            ],
+            "started_at": started_at,
+            "timings": {
+                "quiesce_ms": round((quiesced_at - start) * 1000, 3),
+                "snapshot_ms": round((snapshot_at - quiesced_at) * 1000, 3)
+            }
+        }
+        fds = [self.server_socket.fileno()] + [parked["socket"].fileno() for parked in parked_conns]
+        try:
+            handoff.send_handoff(conn, payload, fds)
+        except (OSError, ConnectionError) as e:
+            print(f"[HANDOFF] Falló el traspaso ({e}); este proceso sigue atendiendo.")
+            self._abort_handoff()
+            return False
+        print(f"[HANDOFF] {len(parked_conns)} conexiones traspasadas en {(time.perf_counter() - start) * 1000:.1f} ms. Cerrando este proceso.")
+        self.handed_off = True
+        self.running = False
+        return True
+
+    def _abort_handoff(self):
+        self._frozen = False
+        self.handing_off = False
+        self._wake_r.recv(1)
+        self._resume_parked()
+
+    def _log_event(self, code, car_id = None, direction: Direccion = Direccion.NONE):
+        if self.event_log:
+            self.event_log.append(code, car_id, direction)
+
+    def _remember_trace(self, car_id, message):
+        """
+        Guarda el identificador de correlación que el cliente envía con cada mensaje. El ciclo se registra
+        solo si el cliente lo muestreó y además entra en el PUENTE_TRACE_SAMPLE del servidor (0: nunca).
+        """
+        trace_id = message.get('trace_id')
+        if trace_id:
+            self.car_traces[car_id] = (trace_id, bool(message.get('sampled')) and self.tracer.keeps(trace_id))
+
+    def _trace_of(self, car_id):
+        """Retorna el trace_id del coche solo si su ciclo actual está muestreado."""
+        trace = self.car_traces.get(car_id)
+        if trace and trace[1]:
+            return trace[0]
+        return None
+
+    def client_disconnect(self, client_id, client_socket = None):
         """
         Remueve un cliente de las colas si se desconecta.
-        Esta función se llama cuando el hilo del cliente termina.
-        """
-        with self.bridge_lock:
-            # Remover de cars_on_bridge_ids si estaba cruzando
-            if client_id in self.cars_on_bridge_ids:
-                self.cars_on_bridge_ids.remove(client_id)
-                self.cars_on_bridge -= 1
-                print(f"[SERVIDOR] Coche {client_id} se desconectó mientras estaba en el puente. Puente liberado.")
-                self.bridge_condition.notify_all() # Notificar que el puente se ha desocupado
-
-            # Reconstruir colas sin el cliente desconectado
-            temp_traffic_left = []
-            while not self.left_traffic.empty():
-                car_in_traffic = self.left_traffic.get_nowait()
-                if car_in_traffic != client_id:
-                    temp_traffic_left.append(car_in_traffic)
-            for car in temp_traffic_left:
-                self.left_traffic.put(car)
-
-            temp_traffic_right = []
-            while not self.right_traffic.empty():
-                car_in_traffic = self.right_traffic.get_nowait()
-                if car_in_traffic != client_id:
-                    temp_traffic_right.append(car_in_traffic)
-            for car in temp_traffic_right:
-                self.right_traffic.put(car)
-            
-            print(f"[LIMPIEZA] Colas actualizadas para {client_id}. Izq: {self.left_traffic.qsize()}, Der: {self.right_traffic.qsize()}")
-            self.print_bridge_status()
-            # La función _bridge_scheduler se encargará de llamar a next_car si es necesario
+        Se aplica en el núcleo del puente cuando el hilo del cliente termina.
+
+        Args:
+            client_id: Coche desconectado
+            client_socket: Conexión que se cerró; si el coche ya tiene otra conexión activa
+                (se reconectó con el mismo id) no se toca su estado
+        """
+        if client_socket is not None:
+            if self.active_clients.get(client_id) not in (None, client_socket):
+                print(f"[INFO] Conexión antigua de {client_id} cerrada; el coche sigue activo en otra conexión.")
+                return
+            self.active_clients.pop(client_id, None)
+        if client_id is not None:
+            self._log_event(EventLog.DISCONNECT, client_id, self.current_direction)
+        # Remover de cars_on_bridge_ids si estaba cruzando
+        if client_id in self.cars_on_bridge_ids:
+            self.cars_on_bridge_ids.remove(client_id)
+            self.cars_on_bridge -= 1
+            print(f"[SERVIDOR] Coche {client_id} se desconectó mientras estaba en el puente. Puente liberado.")
+            self._bridge_freed = True # Que el núcleo decida el siguiente coche
+        if client_id is not None and client_id == self.next_expected_car_id:
+            # Se fue antes de usar su turno: que no bloquee el puente hasta GRANT_TIMEOUT
+            self.next_expected_car_id = None
+            self._bridge_freed = True
+
+        self.car_traces.pop(client_id, None)
+        self.estimator.forget(client_id)
+        self.enqueued_at.pop(client_id, None)
+        self.queue_positions.pop(client_id, None)
+        self.reservations.cancel(client_id)
+        self.car_priorities.pop(client_id, None)
+        # Quitar al cliente desconectado de las colas (conservan el orden de los demás)
+        if self.left_traffic.remove(client_id) | self.right_traffic.remove(client_id):
+            self._send_queue_positions() # Los que estaban detrás avanzan
+        
+        print(f"[LIMPIEZA] Colas actualizadas para {client_id}. Izq: {self.left_traffic.qsize()}, Der: {self.right_traffic.qsize()}")
+        self._state_changed()
+        # _bridge_actor llamará a next_car al terminar el lote si el puente quedó libre
+
+    def _state_changed(self):
+        """
+        Se llama desde el núcleo del puente cada vez que cambia el estado del puente o de las colas.
+        Publica la copia versionada para STATUS_UPDATE y, a partir de ella, la página de estado y el multicast.
+        """
+        self.print_bridge_status()
+        snapshot = self._publish_snapshot()
+        if not (self.status_page or self.multicaster):
+            return
+        state = (
+            snapshot.current_direction,
+            len(snapshot.cars_on_bridge),
+            snapshot.left_size,
+            snapshot.right_size,
+            snapshot.cars_on_bridge
+        )
+        if self.status_page:
+            self.status_page.publish(*state)
+        if self.multicaster:
+            self.multicaster.publish(*state)
 
     def print_bridge_status(self):
         print(f"--- ESTADO ACTUAL DEL PUENTE ---")
         print(f"  Ocupado: {self.cars_on_bridge > 0} ({self.cars_on_bridge} vehículos)")
         print(f"  Dirección Actual: {self.current_direction.value}")
         print(f"  Vehículos en Puente: {self.cars_on_bridge_ids}")
-        print(f"  Cola Izquierda: {list(self.left_traffic.queue)}")
-        print(f"  Cola Derecha: {list(self.right_traffic.queue)}")
+        # Tamaño y primero de cada cola (se llama en cada cambio de estado: no se listan cientos de coches)
+        print(f"  Cola Izquierda: {self.left_traffic.qsize()} (primero: {self._head_id(self.left_traffic)})")
+        print(f"  Cola Derecha: {self.right_traffic.qsize()} (primero: {self._head_id(self.right_traffic)})")
         print(f"---------------------------------")
 
+    @staticmethod
+    def _head_id(traffic: PriorityTrafficQueue):
+        head = traffic.peek()
+        return head[0] if head else None
+
     def puede_cruzar(self, car_id, car_direction):
-        # Solo puede cruzar si el puente está completamente libre y es el notificado (o no hay notificado)
+        # Solo puede cruzar si el puente está completamente libre y es el notificado. Sin notificado, solo
+        # si no hay nadie en las colas: si no, un REQUEST aplicado en el mismo lote que el EXIT que liberó
+        # el puente pasaría delante de los que esperan (incluidas las emergencias) antes de que decida next_car
         if self.cars_on_bridge == 0:
-            if self.next_expected_car_id is None or self.next_expected_car_id == car_id:
+            if self.next_expected_car_id == car_id:
+                return True
+            if self.next_expected_car_id is None and self.left_traffic.empty() and self.right_traffic.empty():
                 return True
         return False
     
@@ -471,9 +1330,43 @@ class Server:
 
 if __name__ == "__main__":
     print("[SERVIDOR] Iniciando servidor de puente unidireccional...")
-    server = Server()
+    capture_path = os.environ.get("PUENTE_CAPTURE_FILE")
+    status_page_path = os.environ.get("PUENTE_STATUS_PAGE")
+    policy_path = os.environ.get("PUENTE_SCHEDULER_POLICY") # JSON generado por server/autotune.py
+    handoff_path = os.environ.get("PUENTE_HANDOFF_SOCKET") # Socket Unix para el reinicio en caliente
+    event_log_path = os.environ.get("PUENTE_EVENT_LOG") # Registro columnar para server/analytics.py
+    trace_path = os.environ.get("PUENTE_TRACE_FILE")
+    multicast = os.environ.get("PUENTE_MULTICAST") # "grupo:puerto[:interfaz]", p. ej. 239.255.77.77:7778
+    takeover = None
+    if handoff_path and handoff.supported():
+        # Si ya hay un servidor escuchando en handoff_path, este proceso lo reemplaza sin cortar conexiones
+        takeover = handoff.receive_handoff(handoff_path)
+        if takeover:
+            print(f"[HANDOFF] Recibidos el estado y {len(takeover[1]) - 1} conexiones del proceso anterior.")
+            # El proceso anterior sigue escribiendo sus archivos hasta terminar: el sucesor usa los suyos
+            capture_path, event_log_path, trace_path = (handoff.successor_path(path) for path in (capture_path, event_log_path, trace_path))
+    multicaster = None
+    if multicast:
+        parts = multicast.split(":")
+        multicaster = StatusMulticaster(
+            group=parts[0] or DEFAULT_GROUP,
+            port=int(parts[1]) if len(parts) > 1 else DEFAULT_PORT,
+            interface=parts[2] if len(parts) > 2 else "127.0.0.1"
+        )
+    server = Server(
+        tracer=Tracer.from_env(output_path=trace_path),
+        capture=TrafficCapture(capture_path) if capture_path else None,
+        status_page=StatusPageWriter(status_page_path) if status_page_path else None,
+        multicaster=multicaster,
+        policy=SchedulerPolicy.from_file(policy_path) if policy_path else None,
+        handoff_path=handoff_path,
+        event_log=EventLog(event_log_path) if event_log_path else None
+    )
+    print(f"[SERVIDOR] Política del planificador: {server.policy}")
+    if takeover:
+        print(f"[HANDOFF] Archivos de este proceso: {', '.join(p for p in (capture_path, event_log_path, trace_path) if p) or 'ninguno'}")
     try:
-        server.start()
+        server.start(takeover)
     except KeyboardInterrupt:
         print("[SERVIDOR] Interrupción por usuario.")
     finally:
@@ -0,0 +1,58 @@
+import json
+
+from model.Direccion import Direccion
+
+
+class BridgeSnapshot:
+    """
+    Copia inmutable y versionada del estado del puente. La publica el nucleo en cada cambio
+    (Server.snapshot) y los hilos de conexion la leen sin bloqueo: reemplazar la referencia es atomico,
+    y una vez creada nadie la modifica, asi que un lector nunca ve un estado a medio actualizar.
+
+    payload es el campo data de STATUS_UPDATE ya serializado, para no repetir json.dumps por lector.
+    """
+    __slots__ = ("version", "current_direction", "cars_on_bridge", "left_size", "right_size", "reservations", "payload")
+
+    def __init__(
+        self,
+        version: int,
+        current_direction: Direccion,
+        cars_on_bridge,
+        left_size: int,
+        right_size: int,
+        reservations
+    ):
+        """
+        Args:
+            version (int): Numero de publicacion; crece con cada cambio de estado
+            current_direction (Direccion): Direccion actual del puente
+            cars_on_bridge (tuple): car_id de los coches en el puente
+            left_size (int): Coches en la cola izquierda
+            right_size (int): Coches en la cola derecha
+            reservations (dict[str, int]): Reservas pendientes por direccion
+        """
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "current_direction", current_direction)
+        object.__setattr__(self, "cars_on_bridge", tuple(cars_on_bridge))
+        object.__setattr__(self, "left_size", left_size)
+        object.__setattr__(self, "right_size", right_size)
+        object.__setattr__(self, "reservations", dict(reservations))
+        object.__setattr__(self, "payload", json.dumps(self.data()).encode("ascii"))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("BridgeSnapshot es inmutable; publique una version nueva.")
+
+    def data(self):
+        """Campo data de la respuesta STATUS_UPDATE."""
+        return {
+            "version": self.version,
+            "bridge_occupied": len(self.cars_on_bridge) > 0,
+            "cars_on_bridge": list(self.cars_on_bridge),
+            "left_traffic_size": self.left_size,
+            "right_traffic_size": self.right_size,
+            "reservations": dict(self.reservations)
+        }
+
+    def __repr__(self):
+        return (f"BridgeSnapshot(version={self.version}, direction={self.current_direction.value}, "
+                f"on_bridge={list(self.cars_on_bridge)}, left={self.left_size}, right={self.right_size})")
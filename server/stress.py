@@ -0,0 +1,589 @@
+"""
+Prueba de carga y resistencia del servidor del puente, en el mismo proceso.
+
+Arranca un Server en un puerto libre y durante --duration segundos lo somete a --bots clientes
+aleatorios que cruzan, se desconectan a mitad de camino, reutilizan el id de otro coche, cambian de
+id en la misma conexión, envían tramas malformadas y hacen ráfagas de reconexiones. Mientras tanto
+un hilo verifica invariantes con bridge_lock tomado (el mismo que toma el núcleo en cada orden):
+
+    - nunca hay coches de dos direcciones en el puente (ni en el estado ni en la copia publicada)
+    - ningún coche está dos veces en las colas, en ambas a la vez o en una cola y en el puente
+    - ningún coche espera sin estar en su cola, en el puente o notificado (entrada perdida)
+    - el coche notificado sigue conectado, y enqueued_at coincide con las colas
+    - el puente no se queda quieto más de --stall segundos con coches esperando
+
+Cada --interval segundos registra cruces por segundo, conexiones, hilos, descriptores y tamaño de las
+tablas del servidor para detectar degradación y fugas.
+
+    python server/stress.py [--duration 60] [--bots 64] [--cars 48] [--seed 1] [--stall 10] [--json]
+
+Termina con código 1 si se violó algún invariante o el servidor registró excepciones.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from model.Direccion import Direccion
+from model.MessageType import MessageType
+from common.framing import LineFramer
+from server.server import Server
+
+# Acción de cada vuelta de un bot y su peso
+ACTIONS = (
+    ("cycle", 62),       # Ciclo completo: REQUEST, espera, cruce, END_CROSS y reserva del próximo
+    ("abort", 10),       # Se desconecta de golpe tras pedir paso, en la cola o sobre el puente
+    ("malformed", 8),    # Tramas inválidas (JSON roto, bytes no UTF-8, tipos y direcciones incorrectos)
+    ("storm", 6),        # Ráfaga de reconexiones con el mismo id
+    ("duplicate", 8),    # Se conecta con el id de otro bot activo
+    ("switch", 3),       # Cambia de id en la misma conexión
+    ("status", 3),       # Consultas de estado (con versión) e historial
+    ("anonymous", 4),    # Ya registrado y en la cola, envía tramas sin id y se desconecta
+)
+
+MALFORMED_FRAMES = (
+    b"{no es json\n",
+    b"\xff\xfe\x00garbage\n",
+    b"[1, 2, 3]\n",
+    b"\"solo un string\"\n",
+    b"null\n",
+    b'{"id": {"a": 1}, "direction": "LEFT", "type": "REQUEST_ACCESS"}\n',
+    b'{"id": ["x"], "type": "REQUEST_ACCESS"}\n',
+    b'{"id": "bad", "type": "REQUEST_ACCESS"}\n',
+    b'{"id": "bad", "direction": "UP", "type": "REQUEST_ACCESS"}\n',
+    b'{"id": "bad", "direction": 7, "type": "REQUEST_ACCESS"}\n',
+    b'{"id": "bad", "direction": "LEFT"}\n',
+    b'{"id": "bad", "direction": "LEFT", "type": "NOPE"}\n',
+    b'{"id": "bad", "direction": "LEFT", "type": ["REQUEST_ACCESS"]}\n',
+    b'{"id": "bad", "direction": "LEFT", "type": "RESERVE_CROSSING", "not_before": "pronto"}\n',
+    b'{"id": "bad", "direction": "LEFT", "type": "RESERVE_CROSSING", "not_before": NaN}\n',
+    b'{"id": "bad", "direction": "LEFT", "type": "RESERVE_CROSSING", "not_before": Infinity}\n',
+    b'{"id": "bad", "direction": "LEFT", "type": "RESERVE_CROSSING", "not_before": 1e20}\n',
+    b'{"id": "bad", "direction": "NONE", "type": "RESERVE_CROSSING", "not_before": 0}\n',
+    b'{"id": "bad", "type": "HISTORY_QUERY", "step": "x"}\n',
+    b'{"id": "bad", "type": "HISTORY_QUERY", "since": NaN}\n',
+    b'{"id": "bad", "type": "HISTORY_QUERY", "until": Infinity}\n',
+    b'{"id": "bad", "type": "HISTORY_QUERY", "step": 1e400}\n',
+    b"\n\n\n",
+)
+
+# Tramas sin id: el servidor las atribuye al coche ya registrado en la conexión
+IDLESS_FRAMES = (
+    b'{"direction": "RIGHT", "type": "UPDATE_BRIDGE_STATUS"}\n',
+    b'{"direction": "LEFT", "type": "UPDATE_BRIDGE_STATUS"}\n',
+    b'{"id": null, "type": "UPDATE_BRIDGE_STATUS"}\n',
+    b'{"id": "", "type": "HISTORY_QUERY", "step": 5}\n',
+)
+
+
+def direction_of(car_id):
+    """Dirección fija de cada coche del conjunto de prueba (par: LEFT, impar: RIGHT)."""
+    suffix = str(car_id).rsplit("-", 1)[-1]
+    return Direccion.RIGHT if suffix.isdigit() and int(suffix) % 2 else Direccion.LEFT
+
+
+class _ServerOutput(io.TextIOBase):
+    """Salida del servidor durante la prueba: se descarta, salvo las excepciones, que se cuentan."""
+    def __init__(self):
+        self.tracebacks = 0
+        self.last_errors = deque(maxlen=20)
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        if "Traceback" in text or ("[ERROR]" in text and "malformado" not in text):
+            with self._lock:
+                if "Traceback" in text:
+                    self.tracebacks += 1
+                self.last_errors.append(text.strip()[:300])
+        return len(text)
+
+
+class StressStats:
+    """Contadores compartidos por los bots y el verificador."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {"crossings": 0, "connects": 0, "aborts": 0, "malformed": 0, "storm_connects": 0,
+                       "duplicates": 0, "switches": 0, "status": 0, "not_modified": 0, "connect_errors": 0,
+                       "gave_up": 0}
+        self.owner = {}             # {car_id: bot que se conectó último con ese id}
+        self.waiting = {}           # {car_id: (bot, desde)} coches que esperan turno
+        self.last_progress = time.monotonic()
+        self.violations = []
+
+    def add(self, key, n = 1):
+        with self.lock:
+            self.counts[key] += n
+            if key == "crossings":
+                self.last_progress = time.monotonic()
+
+    def violation(self, kind, detail):
+        with self.lock:
+            if len(self.violations) < 200:
+                self.violations.append({"at": round(time.monotonic(), 3), "kind": kind, "detail": detail})
+
+
+class Bot(threading.Thread):
+    """Cliente aleatorio con el protocolo en crudo (sin la lógica de reintentos de client.Client)."""
+    def __init__(self, index, server: Server, stats: StressStats, cars, stall, seed, stop: threading.Event):
+        super().__init__(daemon=True, name=f"stress-bot-{index}")
+        self.server = server
+        self.stats = stats
+        self.cars = cars
+        self.stall = stall
+        self.random = random.Random(seed)
+        self.stop_event = stop
+        self.sock = None
+        self.framer = LineFramer()
+        self.car_id = None
+
+    # --- conexión ---
+
+    def _connect(self, car_id):
+        self._close()
+        try:
+            self.sock = socket.create_connection((self.server.host, self.server.port), timeout=5)
+        except OSError:
+            self.stats.add("connect_errors")
+            self.sock = None
+            return False
+        self.sock.settimeout(0.5)
+        self.framer = LineFramer()
+        self.car_id = car_id
+        with self.stats.lock:
+            self.stats.owner[car_id] = self
+        self.stats.add("connects")
+        return True
+
+    def _close(self, abrupt = False):
+        if self.sock is None:
+            return
+        try:
+            if abrupt:
+                # RST en lugar de FIN: el servidor ve ConnectionResetError
+                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, b"\x01\x00\x00\x00\x00\x00\x00\x00")
+            self.sock.close()
+        except OSError:
+            pass
+        self.sock = None
+
+    def _send(self, msg_type, car_id = None, direction: Direccion = None, **extra):
+        car_id = self.car_id if car_id is None else car_id
+        message = {'id': car_id, 'direction': (direction or direction_of(car_id)).value, 'type': msg_type}
+        message.update(extra)
+        self.sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+    def _recv(self):
+        """
+        Returns:
+            dict | None: Siguiente mensaje del servidor, o None si no llegó nada en 0.5 s
+
+        Raises:
+            ConnectionError: Si el servidor cerró la conexión (por ejemplo, otro bot tomó el id)
+        """
+        for frame in self.framer.frames():
+            return json.loads(frame)
+        try:
+            if not self.framer.recv_into(self.sock):
+                raise ConnectionError("El servidor cerró la conexión.")
+        except socket.timeout:
+            return None
+        for frame in self.framer.frames():
+            return json.loads(frame)
+        return None
+
+    # --- acciones ---
+
+    def run(self):
+        weights = [weight for _, weight in ACTIONS]
+        names = [name for name, _ in ACTIONS]
+        while not self.stop_event.is_set():
+            action = self.random.choices(names, weights)[0]
+            try:
+                getattr(self, f"_do_{action}")()
+            except (OSError, ConnectionError, ValueError):
+                self._close()
+            finally:
+                with self.stats.lock:
+                    if self.stats.waiting.get(self.car_id, (None,))[0] is self:
+                        del self.stats.waiting[self.car_id]
+        self._close()
+
+    def _pick_car(self):
+        return self.random.choice(self.cars)
+
+    def _ensure_connection(self):
+        if self.sock is None or self.random.random() < 0.3:
+            return self._connect(self._pick_car())
+        return True
+
+    def _do_cycle(self, abort_at = None):
+        """
+        Un cruce completo. abort_at ("request", "queued", "bridge") corta la conexión en ese punto.
+
+        Returns:
+            bool: Si el coche cruzó
+        """
+        if not self._ensure_connection():
+            return False
+        car_id = self.car_id
+        since = time.monotonic()
+        with self.stats.lock:
+            self.stats.waiting[car_id] = (self, since)
+        self._send(MessageType.REQUEST.value)
+        if abort_at == "request":
+            self._close(abrupt=True)
+            self.stats.add("aborts")
+            return False
+        sent_end = False
+        while not self.stop_event.is_set():
+            message = self._recv()
+            if message is None:
+                if not sent_end and time.monotonic() - since > self.stall:
+                    self._starved(car_id, since)
+                    return False
+                continue
+            status = message.get('status')
+            if status == MessageType.PERMISSION_GRANTED.value:
+                if 'expected_direction' in message: # Aviso del planificador: confirmar con REQUEST
+                    self._send(MessageType.REQUEST.value)
+                    continue
+                with self.stats.lock:
+                    self.stats.waiting.pop(car_id, None)
+                if abort_at == "bridge":
+                    time.sleep(self.random.uniform(0, 0.02))
+                    self._close(abrupt=True)
+                    self.stats.add("aborts")
+                    return False
+                time.sleep(self.random.uniform(0, 0.01)) # Cruzando
+                self._send(MessageType.END_CROSS.value)
+                sent_end = True
+            elif status == MessageType.STATUS_UPDATE.value and not message.get('data'):
+                if sent_end: # Confirmación del END_CROSS
+                    self.stats.add("crossings")
+                    self._send(MessageType.RESERVE.value, not_before=time.time() + self.random.uniform(0, 0.5))
+                    if self.random.random() < 0.3:
+                        self._close()
+                    return True
+                self._send(MessageType.END_CROSS.value) # Ya estaba en el puente (ciclo anterior cortado)
+                sent_end = True
+            elif status == MessageType.PERMISSION_DENIED.value:
+                if sent_end: # El servidor ya no lo tenía en el puente (otra conexión tomó el id)
+                    return False
+                if abort_at == "queued":
+                    self._close(abrupt=True)
+                    self.stats.add("aborts")
+                    return False
+        return False
+
+    def _do_abort(self):
+        self._do_cycle(abort_at=self.random.choice(("request", "queued", "bridge")))
+
+    def _do_malformed(self):
+        self._connect(f"bad-{self.random.randrange(1000)}")
+        if self.sock is None:
+            return
+        for frame in self.random.sample(MALFORMED_FRAMES, self.random.randint(1, 5)):
+            self.sock.sendall(frame)
+            self.stats.add("malformed")
+        if self.random.random() < 0.3:
+            self.sock.sendall(b"x" * 70000 + b"\n") # Trama por encima de max_frame_size
+            self.stats.add("malformed")
+        self._close(abrupt=self.random.random() < 0.5)
+
+    def _do_anonymous(self):
+        """Pide paso y, con la respuesta (en la cola o en el puente), envía tramas sin id y corta la conexión."""
+        if not self._ensure_connection():
+            return
+        self._send(MessageType.REQUEST.value)
+        deadline = time.monotonic() + 1
+        while time.monotonic() < deadline and self._recv() is None:
+            pass
+        for frame in self.random.sample(IDLESS_FRAMES, self.random.randint(1, len(IDLESS_FRAMES))):
+            self.sock.sendall(frame)
+            self.stats.add("malformed")
+        self._close(abrupt=self.random.random() < 0.5)
+
+    def _do_storm(self):
+        """Reconexiones seguidas con el mismo id: cada una pide paso y se corta enseguida."""
+        car_id = self._pick_car()
+        for _ in range(self.random.randint(5, 30)):
+            if self.stop_event.is_set() or not self._connect(car_id):
+                break
+            self._send(MessageType.REQUEST.value)
+            self.stats.add("storm_connects")
+            self._close(abrupt=self.random.random() < 0.5)
+
+    def _do_duplicate(self):
+        """Toma el id de otro bot activo; el servidor cierra la conexión anterior de ese coche."""
+        with self.stats.lock:
+            taken = [car_id for car_id, bot in self.stats.owner.items() if bot is not self and bot.sock is not None]
+        if not taken:
+            return
+        self.stats.add("duplicates")
+        self._connect(self.random.choice(taken))
+        self._do_cycle()
+
+    def _do_switch(self):
+        """Pide paso con un id y luego sigue con otro en la misma conexión."""
+        if not self._connect(self._pick_car()):
+            return
+        self._send(MessageType.REQUEST.value)
+        time.sleep(self.random.uniform(0, 0.05))
+        other = self._pick_car()
+        with self.stats.lock:
+            self.stats.owner[other] = self
+        self.car_id = other
+        self.stats.add("switches")
+        self._close() if self.random.random() < 0.5 else self._do_cycle_on_current()
+
+    def _do_cycle_on_current(self):
+        # Sigue en la conexión actual (sin _ensure_connection, que podría reconectar)
+        with self.stats.lock:
+            self.stats.waiting[self.car_id] = (self, time.monotonic())
+        self._send(MessageType.REQUEST.value)
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline and self._recv() is not None:
+            pass
+        self._close()
+
+    def _do_status(self):
+        if not self._ensure_connection():
+            return
+        version = None
+        for _ in range(self.random.randint(1, 20)):
+            self._send(MessageType.STATUS_UPDATE.value, version=version)
+            message = self._recv()
+            while message is not None and message.get('status') not in (MessageType.STATUS_UPDATE.value, MessageType.STATUS_NOT_MODIFIED.value):
+                message = self._recv() # Avisos de otros ciclos de este coche
+            if message is None:
+                break
+            self.stats.add("status")
+            if message['status'] == MessageType.STATUS_NOT_MODIFIED.value:
+                self.stats.add("not_modified")
+            elif message.get('data'):
+                version = message['data'].get('version')
+        self._send(MessageType.HISTORY.value, since=time.time() - 60, step=5)
+
+    def _starved(self, car_id, since):
+        """Esperó más de stall segundos: si sigue siendo dueño del id y el servidor no lo tiene en ningún lado, se perdió."""
+        self.stats.add("gave_up")
+        with self.stats.lock:
+            owner = self.stats.owner.get(car_id)
+            self.stats.waiting.pop(car_id, None)
+        if owner is not self:
+            return
+        server = self.server
+        with server.bridge_lock.at("stress_check"):
+            current = server.active_clients.get(car_id)
+            placed = (car_id in server.left_traffic or car_id in server.right_traffic
+                      or car_id in server.cars_on_bridge_ids or server.next_expected_car_id == car_id)
+            queues = (server.left_traffic.qsize(), server.right_traffic.qsize())
+        try:
+            ours = current is not None and current.getpeername() == self.sock.getsockname()
+        except OSError:
+            ours = False
+        if ours and not placed:
+            self.stats.violation("lost_entry", f"{car_id} espera hace {time.monotonic() - since:.1f}s sin estar en cola, puente ni notificado")
+        elif placed:
+            self.stats.violation("starvation", f"{car_id} espera hace {time.monotonic() - since:.1f}s (colas {queues})")
+        self._close()
+
+
+class InvariantChecker(threading.Thread):
+    """Verifica los invariantes del puente y registra una muestra por intervalo."""
+    def __init__(self, server: Server, stats: StressStats, stall, interval, period = 0.02):
+        super().__init__(daemon=True, name="stress-checker")
+        self.server = server
+        self.stats = stats
+        self.stall = stall
+        self.interval = interval
+        self.period = period
+        self.stop_event = threading.Event()
+        self.samples = []
+        self.checks = 0
+        self._stalled = False
+
+    def run(self):
+        started = last_sample = time.monotonic()
+        last_counts = dict(self.stats.counts)
+        while not self.stop_event.wait(self.period):
+            self.check()
+            now = time.monotonic()
+            if now - last_sample >= self.interval:
+                with self.stats.lock:
+                    counts = dict(self.stats.counts)
+                self.samples.append(self.sample(now - started, now - last_sample, counts, last_counts))
+                last_sample, last_counts = now, counts
+
+    def check(self):
+        server = self.server
+        self.checks += 1
+        with server.bridge_lock.at("stress_check"):
+            on_bridge = list(server.cars_on_bridge_ids)
+            count = server.cars_on_bridge
+            direction = server.current_direction
+            left = [entry[0] for entry in server.left_traffic.entries()]
+            right = [entry[0] for entry in server.right_traffic.entries()]
+            ordered = [len(queue._ordered) for queue in (server.left_traffic, server.right_traffic)]
+            expected = server.next_expected_car_id
+            # Un socket ya cerrado en active_clients es una conexión terminada cuyo DISCONNECT no limpió al coche
+            active = {car for car, sock in server.active_clients.items() if sock.fileno() != -1}
+            enqueued = set(server.enqueued_at)
+        snapshot = server.snapshot
+
+        if count != len(on_bridge) or len(set(on_bridge)) != len(on_bridge):
+            self.stats.violation("bridge_count", f"cars_on_bridge={count}, ids={on_bridge}")
+        for view, cars, current in (("estado", on_bridge, direction), ("copia publicada", snapshot.cars_on_bridge, snapshot.current_direction)):
+            directions = {direction_of(car) for car in cars}
+            if len(directions) > 1 or (cars and directions != {current}):
+                self.stats.violation("two_directions", f"{view}: {list(cars)} con dirección {current.value}")
+        queued = left + right
+        if len(set(queued)) != len(queued) or set(queued) & set(on_bridge):
+            self.stats.violation("duplicate_entry", f"izq={left} der={right} puente={on_bridge}")
+        if any(direction_of(car) != Direccion.LEFT for car in left) or any(direction_of(car) != Direccion.RIGHT for car in right):
+            self.stats.violation("wrong_queue", f"izq={left} der={right}")
+        if ordered != [server.left_traffic.qsize(), server.right_traffic.qsize()]:
+            self.stats.violation("queue_index", f"lista ordenada {ordered} vs índice {[len(left), len(right)]}")
+        if enqueued != set(queued):
+            self.stats.violation("enqueued_at", f"enqueued_at={sorted(enqueued)} colas={sorted(queued)}")
+        ghosts = [car for car in queued + on_bridge if car not in active]
+        if ghosts:
+            self.stats.violation("ghost", f"sin conexión pero en cola o puente: {ghosts}")
+        if expected is not None and (expected not in active or expected in queued):
+            self.stats.violation("stale_expected", f"next_expected_car_id={expected} (conectado: {expected in active})")
+
+        with self.stats.lock:
+            waiting = len(self.stats.waiting)
+            idle = time.monotonic() - self.stats.last_progress
+        if waiting and idle > self.stall:
+            if not self._stalled:
+                self._stalled = True
+                self.stats.violation("stall", f"{idle:.1f}s sin cruces con {waiting} coches esperando (colas {len(left)}/{len(right)}, puente {on_bridge}, notificado {expected})")
+        else:
+            self._stalled = False
+
+    def sample(self, elapsed, span, counts, last_counts):
+        server = self.server
+        return {
+            "t": round(elapsed, 1),
+            "crossings_per_s": round((counts["crossings"] - last_counts["crossings"]) / span, 1),
+            "connects_per_s": round((counts["connects"] - last_counts["connects"]) / span, 1),
+            "threads": threading.active_count(),
+            "fds": _open_fds(),
+            "rss_mb": _rss_mb(),
+            "handlers": server._live_handlers,
+            "active_clients": len(server.active_clients),
+            "car_priorities": len(server.car_priorities),
+            "car_traces": len(server.car_traces),
+            "estimator": len(server.estimator.by_vehicle),
+            "queued": server.left_traffic.qsize() + server.right_traffic.qsize(),
+            "commands_pending": server.commands.qsize(),
+        }
+
+
+def _open_fds():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError):
+        return None
+
+
+def run(duration = 60.0, bots = 64, cars = 48, seed = 1, stall = 10.0, interval = 5.0):
+    """
+    Ejecuta la prueba completa
+
+    Returns:
+        dict[str, Any]: Contadores, violaciones, excepciones del servidor y muestras por intervalo
+    """
+    output = _ServerOutput()
+    server = Server(port=0)
+    stats = StressStats()
+    stop = threading.Event()
+    car_ids = [f"car-{i:03d}" for i in range(cars)]
+    baseline = {"threads": threading.active_count(), "fds": _open_fds()}
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        threading.Thread(target=server.start, daemon=True).start()
+        if not server.ready.wait(5):
+            raise RuntimeError("El servidor no arrancó.")
+        checker = InvariantChecker(server, stats, stall, interval)
+        workers = [Bot(i, server, stats, car_ids, stall, seed * 1000 + i, stop) for i in range(bots)]
+        checker.start()
+        for worker in workers:
+            worker.start()
+        time.sleep(duration)
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=stall + 5)
+        time.sleep(1) # Que el servidor procese las desconexiones finales
+        checker.check()
+        checker.stop_event.set()
+        checker.join()
+        settled = {"threads": threading.active_count(), "fds": _open_fds(), "handlers": server._live_handlers,
+                   "active_clients": len(server.active_clients), "queued": server.left_traffic.qsize() + server.right_traffic.qsize()}
+        server.stop()
+
+    rates = [sample["crossings_per_s"] for sample in checker.samples]
+    third = max(1, len(rates) // 3)
+    first, last = sum(rates[:third]) / third if rates else 0.0, sum(rates[-third:]) / third if rates else 0.0
+    return {
+        "duration_s": duration,
+        "bots": bots,
+        "cars": cars,
+        "seed": seed,
+        "counts": stats.counts,
+        "invariant_checks": checker.checks,
+        "violations": stats.violations,
+        "server_exceptions": output.tracebacks,
+        "server_errors": list(output.last_errors),
+        "throughput_trend": round(last / first, 3) if first else None, # Último tercio / primer tercio
+        "baseline": baseline,
+        "after_bots": settled,
+        "samples": checker.samples,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=60.0, help="Segundos de prueba")
+    parser.add_argument("--bots", type=int, default=64, help="Clientes simultáneos")
+    parser.add_argument("--cars", type=int, default=48, help="Ids distintos (menos que bots: hay ids repetidos)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--stall", type=float, default=10.0, help="Segundos sin cruces (o de espera de un coche) que cuentan como bloqueo")
+    parser.add_argument("--interval", type=float, default=5.0, help="Segundos entre muestras")
+    parser.add_argument("--json", action="store_true", help="Informe completo en JSON")
+    args = parser.parse_args()
+
+    report = run(args.duration, args.bots, args.cars, args.seed, args.stall, args.interval)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"[STRESS] {args.duration:.0f}s, {args.bots} bots, {args.cars} ids, semilla {args.seed}")
+        print("[STRESS] " + ", ".join(f"{key} {value}" for key, value in report["counts"].items()))
+        print(f"{'t':>7} {'cruces/s':>9} {'conex/s':>8} {'hilos':>6} {'fds':>5} {'rss MB':>7} {'clientes':>9} {'cola':>5} {'órdenes':>8}")
+        for sample in report["samples"]:
+            print(f"{sample['t']:>7} {sample['crossings_per_s']:>9} {sample['connects_per_s']:>8} {sample['threads']:>6} {sample['fds']!s:>5} "
+                  f"{sample['rss_mb']!s:>7} {sample['active_clients']:>9} {sample['queued']:>5} {sample['commands_pending']:>8}")
+        print(f"[STRESS] Tendencia de cruces/s (último tercio / primero): {report['throughput_trend']}")
+        print(f"[STRESS] Al terminar: {report['after_bots']} (antes de arrancar: {report['baseline']})")
+        print(f"[STRESS] {report['invariant_checks']} verificaciones, {len(report['violations'])} violaciones, {report['server_exceptions']} excepciones del servidor")
+        for violation in report["violations"][:20]:
+            print(f"[VIOLACION] {violation['kind']}: {violation['detail']}")
+        for error in report["server_errors"][:10]:
+            print(f"[SERVIDOR] {error}")
+    sys.exit(1 if report["violations"] or report["server_exceptions"] else 0)